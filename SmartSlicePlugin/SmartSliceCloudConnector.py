@@ -1,4 +1,4 @@
-from typing import Dict, Tuple, Callable
+from typing import Dict, Tuple, Callable, Optional
 
 import os
 import uuid
@@ -31,6 +31,16 @@ from .SmartSliceCloudStatus import SmartSliceCloudStatus
 from .SmartSliceCloudProxy import SmartSliceCloudProxy
 from .SmartSlicePropertyHandler import SmartSlicePropertyHandler
 from .SmartSliceJobHandler import SmartSliceJobHandler
+from .cloud.ApiCalls import ApiCallExecutor
+from .cloud.Connectivity import ConnectivityState, ConnectivityTracker
+from .cloud.Compression import ArchiveCompression, CompressionPolicy, CompressionSelector
+from .cloud.GeometryUpload import GeometryUploader
+from .cloud.HttpSession import HttpSession, sessionScope, useSession
+from .cloud.InFlightJobs import InFlightJobs
+from .cloud.JobPackage import JobPackage
+from .cloud.JobScheduler import JobScheduler, JobState
+from .cloud.ResultCache import ResultCache
+from .cloud.JobWatcher import JobLongPoll, JobWatcher
 from .stage.ui.ResultTable import ResultTableData
 
 from .requirements_tool.SmartSliceRequirements import SmartSliceRequirements
@@ -39,6 +49,7 @@ from .select_tool.SmartSliceSelectTool import SmartSliceSelectTool
 from .utils import getPrintableNodes
 from .utils import getModifierMeshes
 from .utils import getNodeActiveExtruder
+from .utils import getResultCacheStore
 
 i18n_catalog = i18nCatalog("smartslice")
 
@@ -61,10 +72,18 @@ class SmartSliceCloudJob(Job):
         self.api_job_id = None
 
         self.canceled = False
+        self.watching = False # the job was submitted and the watcher follows it
+        self.priority = 0 # jobs with lower priorities are submitted first
+        self.job_hash = None # JobPackage.job_hash, once the job is prepared
+        self.geometry_hash = None
 
         self._job_status = None
         self._wait_time = 1.0
 
+        # The status the job showed last, restored when it is shown again. None for a job
+        #   that ended while another one was shown, its status follows from its result.
+        self.ui_status = None
+
         self.ui_status_per_job_type = {
             pywim.smartslice.job.JobType.validation : SmartSliceCloudStatus.BusyValidating,
             pywim.smartslice.job.JobType.optimization : SmartSliceCloudStatus.BusyOptimizing,
@@ -82,6 +101,14 @@ class SmartSliceCloudJob(Job):
             self._job_status = value
             Logger.log("d", "Status changed: {}".format(self.job_status))
 
+    # How the job ended for the scheduler
+    def endState(self) -> JobState:
+        if self.canceled:
+            return JobState.canceled
+        elif self.hasError() or not self.getResult():
+            return JobState.failed
+        return JobState.finished
+
     @property
     def saved(self):
         return self._saved
@@ -114,19 +141,7 @@ class SmartSliceCloudJob(Job):
     # - job_type: Job type to be sent. Can be either:
     #             > pywim.smartslice.job.JobType.validation
     #             > pywim.smartslice.job.JobType.optimization
-    def prepareJob(self, filename=None, filedir=None):
-        # Using tempfile module to probe for a temporary file path
-        # TODO: We can do this more elegant of course, too.
-
-        # Setting up file output
-        if not filename:
-            filename = "{}.3mf".format(uuid.uuid1())
-        if not filedir:
-            filedir = self.determineTempDirectory()
-        filepath = os.path.join(filedir, filename)
-
-        Logger.log("d", "Saving temporary (and custom!) 3MF file at: {}".format(filepath))
-
+    def buildPackage(self) -> Optional[JobPackage]:
         # Checking whether count of models == 1
         mesh_nodes = getPrintableNodes()
         mod_mesh = getModifierMeshes()
@@ -139,7 +154,6 @@ class SmartSliceCloudJob(Job):
             Logger.log("d", "Adding modifier mesh {} to validation".format(node.getName()))
             mesh_nodes.append(node)
 
-        Logger.log("d", "Writing 3MF file")
         job = self.connector.smartSliceJobHandle.buildJobFor3mf()
         if not job:
             Logger.log("d", "Error building the Smart Slice job for 3MF")
@@ -147,33 +161,53 @@ class SmartSliceCloudJob(Job):
 
         job.type = self.job_type
 
-        if not SmartSliceJobHandler.write3mf(filepath, mesh_nodes, job):
-            raise SmartSliceCloudJob.JobException(
-                "The Smart Slice job cannot be submitted because\nthe 3MFWriter Plugin is disabled."
-            )
+        package = SmartSliceJobHandler.buildJobPackage(mesh_nodes, job)
+        if package is None:
+            Logger.log("d", "No mesh data to write to the 3MF")
+
+        return package
 
-        if not os.path.exists(filepath):
+    # Collects the job for submission, it is only serialized (in memory) while uploading
+    def prepareJob(self) -> Optional[JobPackage]:
+        return self.buildPackage()
+
+    # Saves the 3MF to a file, e.g. for a debug package
+    def saveJob(self, filename=None, filedir=None):
+        # Setting up file output
+        if not filename:
+            filename = "{}.3mf".format(uuid.uuid1())
+        if not filedir:
+            filedir = self.determineTempDirectory()
+        filepath = os.path.join(filedir, filename)
+
+        package = self.buildPackage()
+        if package is None:
             return None
 
-        return filepath
+        Logger.log("d", "Saving 3MF file at: {}".format(filepath))
+        package.write(filepath)
 
-    def processCloudJob(self, filepath):
-        # Read the 3MF file into bytes
-        threemf_fd = open(filepath, 'rb')
-        threemf_data = threemf_fd.read()
-        threemf_fd.close()
+        return filepath
 
-        # Submit the 3MF data for a new task
-        job = self._client.submitSmartSliceJob(self, threemf_data)
-        return job
+    # Submits the job for a new task, the result is set once the task is finished
+    def processCloudJob(self, package: JobPackage):
+        return self._client.submitSmartSliceJob(self, package)
 
     def run(self) -> None:
+        # The submission this run belongs to, so its end can't be mistaken for a later one's
+        attempt = self.connector.jobScheduler.attempt(self)
+        try:
+            self.runAttempt()
+        finally:
+            self.connector.jobRunEnded.emit(self, attempt)
+
+    def runAttempt(self) -> None:
         if not self.job_type:
             error_message = Message()
             error_message.setTitle("Smart Slice")
             error_message.setText(i18n_catalog.i18nc("@info:status", "Job type not set for processing:\nDon't know what to do!"))
             error_message.show()
-            self.connector.cancelCurrentJob()
+            self.connector.cancelJob(self)
 
         Job.yieldThread()  # Should allow the UI to update earlier
 
@@ -186,15 +220,21 @@ class SmartSliceCloudJob(Job):
             self.setError(exc)
             return
 
-        task = self.processCloudJob(job)
+        if job is None:
+            Logger.log("w", "Smart Slice job could not be packaged")
+            return
 
-        try:
-            os.remove(job)
-        except:
-            Logger.log("w", "Unable to remove temporary 3MF {}".format(job))
+        self.job_hash = job.job_hash
+        self.geometry_hash = job.geometry_hash
+
+        # The same job was solved before
+        result = self.connector.resultCache.get(self.job_hash)
+        if result is not None:
+            Logger.log("i", "Smart Slice job {} is answered from the result cache".format(self.job_hash))
+            self.setResult(result)
+            return
 
-        if task and task.result:
-            self._result = task.result
+        self.processCloudJob(job)
 
 class SmartSliceCloudVerificationJob(SmartSliceCloudJob):
 
@@ -202,6 +242,7 @@ class SmartSliceCloudVerificationJob(SmartSliceCloudJob):
         super().__init__(connector)
 
         self.job_type = pywim.smartslice.job.JobType.validation
+        self.priority = 0
 
 
 class SmartSliceCloudOptimizeJob(SmartSliceCloudJob):
@@ -210,28 +251,36 @@ class SmartSliceCloudOptimizeJob(SmartSliceCloudJob):
         super().__init__(connector)
 
         self.job_type = pywim.smartslice.job.JobType.optimization
+        self.priority = 1
 
 
+# Status updates come from the thread watching the job, the connector applies them on the UI thread
 class JobStatusTracker:
-    def __init__(self, connector, status) -> None:
-        self._previous_status = status
+    def __init__(self, connector, cloud_job, followers=None) -> None:
         self.connector = connector
+        self.cloud_job = cloud_job
+        self.followers = followers # the identical jobs that wait for this one
 
-    def __call__(self, job: pywim.http.thor.JobInfo) -> bool:
+    def __call__(self, job: pywim.http.thor.JobInfo):
         Logger.log("d", "Current job status: {}".format(job.status))
-        self.connector.api_connection.clearErrorMessage()
-        self.connector._proxy.jobProgress = job.progress
-        if job.status == pywim.http.thor.JobInfo.Status.queued and self.connector.status is not SmartSliceCloudStatus.Queued:
-            self.connector.status = SmartSliceCloudStatus.Queued
-            self.connector.updateSliceWidget()
-        elif job.status == pywim.http.thor.JobInfo.Status.running and self.connector.status not in (SmartSliceCloudStatus.BusyOptimizing, SmartSliceCloudStatus.BusyValidating):
-            self.connector.status = self._previous_status
-            self.connector.updateSliceWidget()
 
-        if job.status == pywim.http.thor.JobInfo.Status.running and self.connector.status is SmartSliceCloudStatus.BusyOptimizing:
-            self.connector._proxy.sliceStatus = "Optimizing...&nbsp;&nbsp;&nbsp;&nbsp;(<i>Remaining Time: {}</i>)".format(Duration(job.runtime_remaining).getDisplayString())
+        cloud_jobs = [self.cloud_job] + (self.followers() if self.followers else [])
+        for cloud_job in cloud_jobs:
+            cloud_job.job_status = job.status
+            busy_status = cloud_job.ui_status_per_job_type[cloud_job.job_type]
+            self.connector.jobStatusReceived.emit(cloud_job, job, busy_status)
 
-        return self.connector.cloudJob.canceled if self.connector.cloudJob else True
+class UploadProgressTracker:
+    def __init__(self, connector, cloud_job) -> None:
+        self.connector = connector
+        self.cloud_job = cloud_job
+        self.reported = False
+        self.throughput = 0.
+
+    def __call__(self, sent: int, total: Optional[int], throughput: float):
+        self.reported = True
+        self.throughput = throughput
+        self.connector.uploadProgressReceived.emit(self.cloud_job, sent, total, throughput)
 
 # This class defines and contains our API connection. API errors, login and token
 #   checking is all handled here.
@@ -240,20 +289,48 @@ class SmartSliceAPIClient(QObject):
         genericInternetConnectionError = 1
         loginCredentialsError = 2
 
+    # Seconds an account or job management call may take with all its retries
+    call_deadline = 30.
+
     def __init__(self, connector):
         super().__init__()
         self._client = None
+        self._geometry_uploader = None
+        self._job_watcher = None
+        # New jobs never follow a canceled job, it may be aborted any time
+        self._in_flight = InFlightJobs(lambda primary: not primary.canceled)
+        self._session = HttpSession.shared()
         self.connector = connector
         self.extension = connector.extension
         self._token = None
         self._error_message = None
 
-        self._number_of_timeouts = 20
-        self._timeout_sleep = 3
+        self._api_calls = ApiCallExecutor(log=lambda message: Logger.log("e", message))
+        self._connectivity = ConnectivityTracker(on_changed=lambda state: self.connectionStateChanged.emit())
+        self._authenticating = False
+        self._authenticate_again = False
+
+        # Outcomes of the calls made for the UI, emitted on the calls' threads and handled on the UI thread
+        self.tokenChecked.connect(self._onTokenChecked)
+        self.loginReceived.connect(self._onLoginReceived)
+        self.apiCallFailed.connect(self._handleThorErrors)
 
         self._username_preference = "smartslice/username"
         self._app_preferences = Application.getInstance().getPreferences()
 
+        # One of the CompressionPolicy values, how the submitted 3MF is compressed
+        self._compression_preference = "smartslice/submission_compression"
+        self._app_preferences.addPreference(self._compression_preference, CompressionPolicy.default.value)
+
+        # The auto choices by geometry hash, as JSON, so a geometry is written the same way across sessions
+        self._compression_choices_preference = "smartslice/submission_compression_choices"
+        self._app_preferences.addPreference(self._compression_choices_preference, "{}")
+        try:
+            choices = json.loads(self._app_preferences.getValue(self._compression_choices_preference))
+        except (TypeError, ValueError):
+            choices = None
+        self._compression = CompressionSelector(choices=choices if isinstance(choices, dict) else None)
+
         #Login properties
         self._login_username = ""
         self._login_password = ""
@@ -306,107 +383,172 @@ class SmartSliceAPIClient(QObject):
             cluster=self._plugin_metadata.cluster
         )
 
+        # Keep-alive connections shared by all calls of the UI and the jobs, see executeApiCallAsync
+        if not useSession(pywim.http.thor):
+            Logger.log("w", "The Smart Slice API client doesn't go through the shared HTTP session")
+
+        self._geometry_uploader = GeometryUploader(self._client, pywim.http.thor.JobInfo, self._session)
+        self._job_watcher = None
+
         # To ensure that the user is tracked and has a proper subscription, we let them login and then use the token we recieve
         # to track them and their login status.
         self._getToken()
 
+        # Talking to the API happens in the background, this is called from the UI
+        self._authenticate()
+
+        Logger.log("d", "SmartSlice HTTP Client: {}".format(self._client.address))
+
+    # Checks the token and logs in if it isn't valid, one attempt at a time. The calls run in the
+    #   background, their outcomes are handled on the UI thread (_onTokenChecked, _onLoginReceived).
+    def _authenticate(self):
+        if self._authenticating:
+            # E.g. the login button was clicked again, once the current attempt is done
+            self._authenticate_again = True
+            return
+        self._authenticating = True
+
         #If there is a token, ensure it is a valid token
         self._checkToken()
 
+    def _onTokenChecked(self, api_code, api_result):
+        if api_code != 200:
+            self._token = None
+            self._createTokenFile()
+        else:
+            self._connectivity.recordSession(self._token)
+
         #If invalid token, attempt to Login.
         if not self.logged_in:
             self.loggedInChanged.emit()
-            self._login()
+            if self._login():
+                return
+
+        self._authenticated()
+
+    # The end of an authentication attempt
+    def _authenticated(self):
+        self._authenticating = False
 
         #If now a valid token, allow access
         if self.logged_in:
             self.loggedInChanged.emit()
 
-        Logger.log("d", "SmartSlice HTTP Client: {}".format(self._client.address))
+        if self._authenticate_again:
+            self._authenticate_again = False
+            self._authenticate()
 
     def _connectionCheck(self):
         try:
             self._client.info()
         except Exception as error:
             Logger.log("e", "An error has occured checking the internet connection: {}".format(error))
+            self._connectivity.recordTransportError()
             return (self.ConnectionErrorCodes.genericInternetConnectionError)
 
+        self._connectivity.recordResponse()
         return None
 
     # API calls need to be executed through this function using a lambda passed in, as well as a failure code.
     #  This prevents a fatal crash of Cura in some circumstances, as well as allows for a timeout/retry system.
     #  The failure codes give us better control over the messages that come from an internet disconnect issue.
-    def executeApiCall(self, endpoint: Callable[[], Tuple[int, object]], failure_code):
-        api_code = self._connectionCheck()
-        timeout_counter = 0
+    #  The call blocks the calling thread for at most deadline seconds (None for as long as the call retries),
+    #  so it is for the job threads. The UI uses executeApiCallAsync, which returns right away.
+    def executeApiCall(self, endpoint: Callable[[], Tuple[int, object]], failure_code, deadline: Optional[float] = None):
         self.clearErrorMessage()
 
-        if api_code is not None:
-            return api_code, None
-
-        while api_code is None and timeout_counter < self._number_of_timeouts:
-            try:
-                api_code, api_result = endpoint()
-            except Exception as error:
-                # If this error occurs, there was a connection issue
-                Logger.log("e", "An error has occured with an API call: {}".format(error))
-                timeout_counter += 1
-                time.sleep(self._timeout_sleep)
-
-            if timeout_counter == self._number_of_timeouts:
-                return failure_code, None
+        future = self.executeApiCallAsync(endpoint, failure_code, deadline)
+        api_code, api_result = self._api_calls.result(future, failure_code, deadline)
 
         self.clearErrorMessage()
 
         return api_code, api_result
 
+    # Starts the API call in the background, the returned future resolves to (code, result) and callback,
+    #  if any, is called with both on the call's thread.
+    def executeApiCallAsync(
+        self, endpoint: Callable[[], Tuple[int, object]], failure_code, deadline: Optional[float] = None,
+        callback: Callable[[Tuple[int, object]], None] = None
+    ) -> "concurrent.futures.Future":
+        def call():
+            # The client's requests only go through our session in here, not those of others using pywim
+            with sessionScope(self._session):
+                # Only probe the connection if no call got through lately
+                if self._connectivity.needsProbe():
+                    api_code = self._connectionCheck()
+                    if api_code is not None:
+                        return api_code, None
+
+                try:
+                    api_code, api_result = endpoint()
+                except Exception:
+                    self._connectivity.recordTransportError()
+                    raise
+
+            self._connectivity.recordResponse(api_code)
+            return api_code, api_result
+
+        return self._api_calls.call(call, failure_code, deadline, callback)
+
     def clearErrorMessage(self):
         if self._error_message is not None:
             self._error_message.hide()
             self._error_message = None
 
     # Login is fairly simple, the email and password is pulled from the Login popup that is displayed
-    #   on the Cura stage, and then sent to the API.
-    def _login(self):
+    #   on the Cura stage, and then sent to the API. Returns whether a login was sent.
+    def _login(self) -> bool:
         username = self._login_username
         password = self._login_password
 
         if self._token is None:
             self.loggedInChanged.emit()
 
-        if password != "":
-            api_code, user_auth = self.executeApiCall(
-                lambda: self._client.basic_auth_login(username, password),
-                self.ConnectionErrorCodes.loginCredentialsError
-            )
+        if password == "":
+            return False
 
-            if api_code != 200:
-                # If we get bad login credentials, this will set the flag that alerts the user on the popup
-                if api_code == 400:
-                    Logger.log("d", "API Code 400")
-                    self.badCredentials = True
-                    self._login_password = ""
-                    self.badCredentialsChanged.emit()
-                    self._token = None
+        self.clearErrorMessage()
+        self.executeApiCallAsync(
+            lambda: self._client.basic_auth_login(username, password),
+            self.ConnectionErrorCodes.loginCredentialsError,
+            self.call_deadline,
+            lambda outcome: self.loginReceived.emit(username, *outcome)
+        )
+        return True
 
-                else:
-                    self._handleThorErrors(api_code, user_auth)
+    def _onLoginReceived(self, username, api_code, user_auth):
+        if api_code != 200:
+            # If we get bad login credentials, this will set the flag that alerts the user on the popup
+            if api_code == 400:
+                Logger.log("d", "API Code 400")
+                self.badCredentials = True
+                self._login_password = ""
+                self.badCredentialsChanged.emit()
+                self._token = None
 
-            # If all goes well, we will be able to store the login token for the user
             else:
-                self.clearErrorMessage()
-                self.badCredentials = False
-                self._login_password = ""
-                self._app_preferences.setValue(self._username_preference, username)
-                self._token = self._client.get_token()
-                self._createTokenFile()
+                self._handleThorErrors(api_code, user_auth)
 
-    # Logout removes the current token, clears the last logged in username and signals the popup to reappear.
+        # If all goes well, we will be able to store the login token for the user
+        else:
+            self.clearErrorMessage()
+            self.badCredentials = False
+            self._login_password = ""
+            self._app_preferences.setValue(self._username_preference, username)
+            self._token = self._client.get_token()
+            self._createTokenFile()
+            self._connectivity.recordSession(self._token)
+
+        self._authenticated()
+
+    # Logout removes the current token, clears the last logged in username and the cached results and signals the popup to reappear.
     def logout(self):
         self._token = None
+        self._connectivity.recordSession(None)
         self._login_password = ""
         self._createTokenFile()
         self._app_preferences.setValue(self._username_preference, "")
+        self.connector.resultCache.clear()
         self.loggedInChanged.emit()
 
     # If our user has logged in before, their login token will be in the file.
@@ -428,92 +570,255 @@ class SmartSliceAPIClient(QObject):
     # Once we have pulled the token, we want to check with the API to make sure the token is valid.
     def _checkToken(self):
         self._client.set_token(self._token)
-        api_code, api_result = self.executeApiCall(
+
+        # Accepted a moment ago, e.g. the stage was opened once more
+        if self._connectivity.sessionValid(self._token):
+            self._onTokenChecked(200, None)
+            return
+
+        self.clearErrorMessage()
+        self.executeApiCallAsync(
             lambda: self._client.whoami(),
-            self.ConnectionErrorCodes.loginCredentialsError
+            self.ConnectionErrorCodes.loginCredentialsError,
+            self.call_deadline,
+            lambda outcome: self.tokenChecked.emit(*outcome)
         )
 
-        if api_code != 200:
-            self._token = None
-            self._createTokenFile()
-
     # If there is no token in the file, or the file does not exist, we create one.
     def _createTokenFile(self):
         with open(self._token_file_path, "w") as token_file:
             json.dump(self._token, token_file)
 
-    def getSubscription(self):
-        api_code, api_result = self.executeApiCall(
+    # Asks for the subscription without blocking the UI, the connector's subscriptionReceived
+    #   signal delivers the (code, result) on the UI thread.
+    def requestSubscription(self):
+        self.clearErrorMessage()
+
+        self.executeApiCallAsync(
             lambda: self._client.smartslice_subscription(),
-            self.ConnectionErrorCodes.genericInternetConnectionError
+            self.ConnectionErrorCodes.genericInternetConnectionError,
+            self.call_deadline,
+            lambda outcome: self.connector.subscriptionReceived.emit(*outcome)
         )
 
+    def subscriptionFrom(self, api_code, api_result):
         if api_code != 200:
             self._handleThorErrors(api_code, api_result)
             return None
 
         return api_result
 
+    # Aborts a task in the background, a failure is reported on the UI thread
     def cancelJob(self, job_id):
-        api_code, api_result = self.executeApiCall(
+        def aborted(outcome):
+            if outcome[0] != 200:
+                self.apiCallFailed.emit(*outcome)
+
+        self.executeApiCallAsync(
             lambda: self._client.smartslice_job_abort(job_id),
-            self.ConnectionErrorCodes.genericInternetConnectionError
+            self.ConnectionErrorCodes.genericInternetConnectionError,
+            self.call_deadline,
+            aborted
         )
 
-        if api_code != 200:
-            self._handleThorErrors(api_code, api_result)
+    # Watches all submitted jobs, on one thread
+    def _jobWatcher(self) -> JobWatcher:
+        if self._job_watcher:
+            return self._job_watcher
+
+        # The watcher asks for one job at a time, so every request has a deadline and
+        #   a job whose requests fail backs off while the others are watched
+        def fetch(job_id, include_results):
+            return self.executeApiCall(
+                lambda: self._client.smartslice_job(job_id, include_results),
+                self.ConnectionErrorCodes.genericInternetConnectionError,
+                self.call_deadline
+            )
+
+        long_poll = None
+        if self._geometry_uploader and self._geometry_uploader.capabilities().get("job_long_poll"):
+            job_long_poll = JobLongPoll(self._client, pywim.http.thor.JobInfo, self._session)
+            long_poll = lambda job_id, job, timeout: self.executeApiCall(
+                lambda: job_long_poll(job_id, job, timeout),
+                self.ConnectionErrorCodes.genericInternetConnectionError,
+                timeout + self.call_deadline
+            )
+
+        self._job_watcher = JobWatcher(
+            fetch, long_poll, log=lambda message: Logger.log("e", message),
+            transient_codes=(self.ConnectionErrorCodes.genericInternetConnectionError,)
+        )
+        return self._job_watcher
+
+    def _submissionCompression(self, package: JobPackage) -> ArchiveCompression:
+        try:
+            self._compression.policy = CompressionPolicy(self._app_preferences.getValue(self._compression_preference))
+        except ValueError:
+            self._compression.policy = CompressionPolicy.default
+
+        choices = self._compression.choices()
+        compression = self._compression.compression(package)
+
+        if self._compression.choices() != choices:
+            self._app_preferences.setValue(
+                self._compression_choices_preference, json.dumps(self._compression.choices())
+            )
+
+        return compression
 
     # If the user is correctly logged in, and has a valid token, we can use the 3mf data from
     #    the plugin to submit a job to the API, and the results will be handled when they are returned.
-    def submitSmartSliceJob(self, cloud_job, threemf_data):
+    def submitSmartSliceJob(self, cloud_job, package: JobPackage):
+        # An identical job is already submitted, this one gets its outcome
+        primary = self._in_flight.attach(package.job_hash, cloud_job)
+        if primary is not None:
+            Logger.log("i", "Smart Slice job {} is already in flight, waiting for it".format(package.job_hash))
+            self.connector.jobScheduler.attach(cloud_job)
+            return None
+
+        task = self._submitJob(cloud_job, package)
+
+        if not cloud_job.watching:
+            # The followers need to be submitted by themselves
+            for follower in self._in_flight.release(package.job_hash, cloud_job):
+                self.connector.jobScheduler.requeue(follower)
+
+        return task
+
+    def _submitJob(self, cloud_job, package: JobPackage):
+        package.compression = self._submissionCompression(package)
+        Logger.log("d", "Compressing the submission with {}".format(package.compression))
+
+        if self._geometry_uploader and self._geometry_uploader.supported():
+            # Only the job is sent if the server already has the geometry
+            Logger.log("d", "Submitting the job for geometry {}".format(package.geometry_hash))
+            upload_progress = UploadProgressTracker(self.connector, cloud_job)
+            # A canceled job is still uploaded while identical jobs wait for it
+            submit = lambda: self._geometry_uploader.submit(
+                package, progress=upload_progress,
+                should_stop=lambda: cloud_job.canceled and not self._in_flight.followers(cloud_job)
+            )
+        else:
+            upload_progress = None
+            threemf_data = package.threemf()
+
+            def submit():
+                started = time.monotonic()
+                result = self._client.new_smartslice_job(threemf_data)
+                self._compression.recordThroughput(len(threemf_data) / max(time.monotonic() - started, 1.e-3))
+                return result
+
         thor_status_code, task = self.executeApiCall(
-            lambda: self._client.new_smartslice_job(threemf_data),
+            submit,
             self.ConnectionErrorCodes.genericInternetConnectionError
         )
 
-        job_status_tracker = JobStatusTracker(self.connector, self.connector.status)
+        Logger.log("d", "HTTP connections after submitting: {}".format(self._session.stats()))
+
+        if upload_progress and upload_progress.reported:
+            self._compression.recordThroughput(upload_progress.throughput)
+
+        if cloud_job.canceled:
+            if thor_status_code != 200:
+                return None
+
+            # Canceled while uploading, the server has the job anyway. From here on a follower
+            # that leaves aborts it, without followers it is aborted right away.
+            cloud_job.api_job_id = task.id
+            if not self._in_flight.followers(cloud_job):
+                Logger.log("d", "Aborting Smart Slice job {}, it was canceled while uploading".format(task.id))
+                self.cancelJob(task.id)
+                return None
+
+            Logger.log("d", "Smart Slice job {} was canceled while uploading, watching it for identical jobs".format(task.id))
+
+        job_status_tracker = JobStatusTracker(
+            self.connector, cloud_job, lambda: self._in_flight.followers(cloud_job)
+        )
 
         Logger.log("d", "API Status after posting: {}".format(thor_status_code))
 
-        if thor_status_code != 200:
+        if thor_status_code == 400 and self._queueFull(task):
+            # Submitted again once the queue has room
+            Logger.log("d", "The Smart Slice queue is full, holding the job")
+            self.connector.jobScheduler.hold(cloud_job)
+            return None
+        elif thor_status_code != 200:
             self._handleThorErrors(thor_status_code, task)
-            self.connector.cancelCurrentJob()
+            self.connector.cancelJob(cloud_job)
+            return None
+
+        self.connector.jobScheduler.submitted(cloud_job)
 
         if getattr(task, 'status', None):
             Logger.log("d", "Job status after posting: {}".format(task.status))
 
-        # While the task status is not finished/failed/crashed/aborted continue to
-        # wait on the status using the API.
-        thor_status_code = None
-        while thor_status_code != self.ConnectionErrorCodes.genericInternetConnectionError and not cloud_job.canceled and task.status not in (
-            pywim.http.thor.JobInfo.Status.failed,
-            pywim.http.thor.JobInfo.Status.crashed,
-            pywim.http.thor.JobInfo.Status.aborted,
-            pywim.http.thor.JobInfo.Status.finished
-        ):
-
-            self.job_status = task.status
-            cloud_job.api_job_id = task.id
+        cloud_job.api_job_id = task.id
+        job_status_tracker(task)
+
+        # The job's thread is done, the watcher waits until the task is finished/failed/crashed/aborted.
+        # A canceled job is still watched while identical jobs wait for it.
+        cloud_job.watching = True
+        self._jobWatcher().add(
+            task,
+            job_status_tracker,
+            lambda code, task: self._onJobWatched(cloud_job, code, task),
+            lambda: cloud_job.canceled and not self._in_flight.followers(cloud_job)
+        )
 
-            thor_status_code, task = self.executeApiCall(
-                lambda: self._client.smartslice_job_wait(task.id, callback=job_status_tracker),
-                self.ConnectionErrorCodes.genericInternetConnectionError
-            )
+        return task
 
-            if thor_status_code == 200:
-                thor_status_code, task = self.executeApiCall(
-                    lambda: self._client.smartslice_job_wait(task.id, callback=job_status_tracker),
-                    self.ConnectionErrorCodes.genericInternetConnectionError
-                )
+    # The end of a submitted job (on the watcher's thread), handled on the UI thread
+    def _onJobWatched(self, cloud_job, thor_status_code, task):
+        self.connector.jobWatchEnded.emit(cloud_job, thor_status_code, task)
+
+    # The end of a submitted job and of the identical jobs that wait for it (on the UI thread)
+    def processWatchedJob(self, cloud_job, thor_status_code, task):
+        followers = self._in_flight.release(cloud_job.job_hash, cloud_job)
+
+        if thor_status_code == 200 and JobWatcher.statusName(task) == "aborted":
+            # Nothing to give the followers, they are submitted by themselves
+            for follower in followers:
+                if not follower.canceled:
+                    Logger.log("d", "Smart Slice job {} was aborted, submitting job {} again".format(task.id, follower._id))
+                    self.connector.jobScheduler.requeue(follower)
+            followers = []
 
-            if thor_status_code not in (200, None):
-                self._handleThorErrors(thor_status_code, task)
-                self.connector.cancelCurrentJob()
+        for ended_job in [cloud_job] + followers:
+            try:
+                self._processWatchedJob(ended_job, thor_status_code, task)
+            finally:
+                ended_job.watching = False
+                self.connector.jobScheduler.finish(ended_job, ended_job.endState())
+                self.connector._onJobFinished(ended_job)
+
+    # Aborts a submitted job, unless identical jobs still wait for it
+    def cancelSubmittedJob(self, cloud_job):
+        primary = self._in_flight.detach(cloud_job)
+
+        if primary is not None:
+            # The last follower of a canceled job
+            if primary.canceled and primary.api_job_id and not self._in_flight.followers(primary):
+                self.cancelJob(primary.api_job_id)
+            return
+
+        # An identical job that comes later is submitted by itself
+        self._in_flight.remove(cloud_job.job_hash, cloud_job)
+
+        if cloud_job.api_job_id and not self._in_flight.followers(cloud_job):
+            self.cancelJob(cloud_job.api_job_id)
+
+    def _processWatchedJob(self, cloud_job, thor_status_code, task):
+        if thor_status_code not in (200, None):
+            self._handleThorErrors(thor_status_code, task)
+            self.connector.cancelJob(cloud_job, abort=False)
 
         if not cloud_job.canceled:
             self.connector.propertyHandler._cancelChanges = False
 
-            if task.status == pywim.http.thor.JobInfo.Status.failed:
+            if thor_status_code is None:
+                cloud_job.setError(SmartSliceCloudJob.JobException("Lost track of the job's status"))
+            elif task.status == pywim.http.thor.JobInfo.Status.failed:
                 error_message = Message()
                 error_message.setTitle("Smart Slice Solver")
                 error_message.setText(i18n_catalog.i18nc(
@@ -522,7 +827,7 @@ class SmartSliceAPIClient(QObject):
                 ))
                 error_message.show()
 
-                self.connector.cancelCurrentJob()
+                self.connector.cancelJob(cloud_job, abort=False)
                 cloud_job.setError(SmartSliceCloudJob.JobException(error_message.getText()))
 
                 Logger.log(
@@ -530,9 +835,13 @@ class SmartSliceAPIClient(QObject):
                     "An error occured while sending and receiving cloud job: {}".format(error_message.getText())
                 )
                 self.connector.propertyHandler._cancelChanges = False
-                return None
+            elif JobWatcher.statusName(task) == "aborted":
+                # E.g. from the web site, nothing to show
+                cloud_job.setError(SmartSliceCloudJob.JobException("The job was aborted on the server"))
             elif task.status == pywim.http.thor.JobInfo.Status.finished:
-                return task
+                cloud_job.setResult(task.result)
+                if task.result is not None:
+                    self.connector.resultCache.put(cloud_job.job_hash, task.result, cloud_job.geometry_hash)
             elif len(task.errors) > 0:
                 error_message = Message()
                 error_message.setTitle("Smart Slice Solver")
@@ -542,7 +851,7 @@ class SmartSliceAPIClient(QObject):
                 ))
                 error_message.show()
 
-                self.connector.cancelCurrentJob()
+                self.connector.cancelJob(cloud_job, abort=False)
                 cloud_job.setError(SmartSliceCloudJob.JobException(error_message.getText()))
 
                 Logger.log(
@@ -550,7 +859,6 @@ class SmartSliceAPIClient(QObject):
                     "An unexpected status occured while sending and receiving cloud job: {}".format(error_message.getText())
                 )
                 self.connector.propertyHandler._cancelChanges = False
-                return None
 
 
     # When something goes wrong with the API, the errors are sent here. The http_error_code is an int that indicates
@@ -563,7 +871,7 @@ class SmartSliceAPIClient(QObject):
         self._error_message.setTitle("Smart Slice API")
 
         if http_error_code == 400:
-            if returned_object.error.startswith('User\'s maximum job queue count reached'):
+            if self._queueFull(returned_object):
                 print(self._error_message.getActions())
                 self._error_message.setTitle("")
                 self._error_message.setText("You have exceeded the maximum allowable "
@@ -589,6 +897,11 @@ class SmartSliceAPIClient(QObject):
             self._error_message.setText(i18n_catalog.i18nc("@info:status", "SmartSlice Server Error (HTTP Error: {})".format(http_error_code)))
         self._error_message.show()
 
+    # Whether the API refused a job because the user's queue is full
+    @staticmethod
+    def _queueFull(returned_object):
+        return str(getattr(returned_object, "error", "")).startswith('User\'s maximum job queue count reached')
+
     @staticmethod
     def errorMessageAction(msg, action):
         msg.hide()
@@ -597,12 +910,30 @@ class SmartSliceAPIClient(QObject):
     def onLoginButtonClicked(self):
         self.openConnection()
 
+    # Requests sent, connection pool hits / misses and TLS resumptions of the shared HTTP session
+    @pyqtSlot(result="QVariantMap")
+    def connectionStats(self):
+        return self._session.stats()
+
     @pyqtProperty(str, constant=True)
     def smartSliceUrl(self):
         return self._plugin_metadata.url
 
     badCredentialsChanged = pyqtSignal()
     loggedInChanged = pyqtSignal()
+    tokenChecked = pyqtSignal(object, object)
+    loginReceived = pyqtSignal(str, object, object)
+    apiCallFailed = pyqtSignal(object, object)
+    connectionStateChanged = pyqtSignal()
+
+    # One of the ConnectivityState values: unknown, online or offline
+    @pyqtProperty(str, notify=connectionStateChanged)
+    def connectionState(self):
+        return self._connectivity.state.value
+
+    @pyqtProperty(bool, notify=connectionStateChanged)
+    def online(self):
+        return self._connectivity.state is not ConnectivityState.offline
 
     @pyqtProperty(bool, notify=loggedInChanged)
     def logged_in(self):
@@ -638,6 +969,9 @@ class SmartSliceCloudConnector(QObject):
     debug_save_smartslice_package_preference = "smartslice/debug_save_smartslice_package"
     debug_save_smartslice_package_location = "smartslice/debug_save_smartslice_package_location"
 
+    # Ended jobs that are kept with their results, besides the current one
+    MAX_KEPT_JOBS = 8
+
     class SubscriptionTypes(Enum):
         subscriptionExpired = 0
         trialExpired = 1
@@ -657,6 +991,27 @@ class SmartSliceCloudConnector(QObject):
         self._proxy.sliceButtonClicked.connect(self.onSliceButtonClicked)
         self._proxy.secondaryButtonClicked.connect(self.onSecondaryButtonClicked)
 
+        # Emitted by the job threads, handled on the UI thread
+        self._uploading = False
+        self.jobStatusReceived.connect(self._onJobStatusReceived)
+        self.uploadProgressReceived.connect(self._onUploadProgressReceived)
+        self.jobWatchEnded.connect(self._onJobWatchEnded)
+        self.jobRunEnded.connect(self._onJobRunEnded)
+        self.jobStateChanged.connect(self._onJobStateChanged)
+
+        # The subscription is asked for in the background when the slice button is clicked
+        self._subscription_pending = False
+        self.subscriptionReceived.connect(self._onSubscriptionReceived)
+
+        # Results of recent jobs, to answer the same job again without submitting it
+        self.resultCache = ResultCache(pywim.smartslice.result.Result.from_dict, store=getResultCacheStore())
+
+        # Submits the jobs, a few at a time
+        self.jobScheduler = JobScheduler(
+            lambda job: job.start(),
+            on_state_changed=lambda job, state: self.jobStateChanged.emit(job, state)
+        )
+
         self.extension = extension
 
         # Debug stuff
@@ -684,6 +1039,12 @@ class SmartSliceCloudConnector(QObject):
         self.api_connection = SmartSliceAPIClient(self)
 
     onSmartSlicePrepared = pyqtSignal()
+    jobStatusReceived = pyqtSignal(object, object, object)
+    uploadProgressReceived = pyqtSignal(object, object, object, float)
+    jobWatchEnded = pyqtSignal(object, object, object)
+    jobRunEnded = pyqtSignal(object, object)
+    jobStateChanged = pyqtSignal(object, object)
+    subscriptionReceived = pyqtSignal(object, object)
 
     @property
     def cloudJob(self) -> SmartSliceCloudJob:
@@ -695,7 +1056,9 @@ class SmartSliceCloudConnector(QObject):
     def addJob(self, job_type: pywim.smartslice.job.JobType):
 
         self.propertyHandler._cancelChanges = False
-        self._current_job += 1
+
+        # Jobs shown before may have been older ones, the new one gets a new id
+        self._current_job = max(self._jobs) + 1
 
         if job_type == pywim.smartslice.job.JobType.optimization:
             self._jobs[self._current_job] = SmartSliceCloudOptimizeJob(self)
@@ -703,29 +1066,81 @@ class SmartSliceCloudConnector(QObject):
             self._jobs[self._current_job] = SmartSliceCloudVerificationJob(self)
 
         self._jobs[self._current_job]._id = self._current_job
-        self._jobs[self._current_job].finished.connect(self._onJobFinished)
+
+        # A job is packaged when it is submitted, with the setup at that time, so a waiting job of
+        #   the same type would submit the same setup as the new one. Jobs of other types and the
+        #   jobs in flight go on, their results are kept with them.
+        for job in self.jobScheduler.jobs(*JobState.waiting()):
+            if job.job_type == job_type:
+                self.cancelJob(job)
+
+        self._pruneJobs()
+
+    # Forgets the oldest ended jobs beyond MAX_KEPT_JOBS
+    def _pruneJobs(self):
+        ended = [
+            job_id for job_id, job in sorted(self._jobs.items())
+            if job and job_id != self._current_job and not job.watching and self.jobScheduler.state(job) is None
+        ]
+
+        for job_id in ended[:max(0, len(ended) - self.MAX_KEPT_JOBS)]:
+            del self._jobs[job_id]
+
+    # Shows a job that was started before, with its status or results
+    def showJob(self, job_id: int):
+        job = self._jobs.get(job_id)
+        if not job or job is self.cloudJob or job.canceled:
+            return
+
+        current = self.cloudJob
+        if current:
+            current.ui_status = self.status
+
+        self._current_job = job_id
+
+        if job.watching or self.jobScheduler.state(job) is not None:
+            self.status = job.ui_status or SmartSliceCloudStatus.Queued
+        elif job.ui_status is not None:
+            self.status = job.ui_status
+            if job.getResult():
+                self.processAnalysisResult()
+        else:
+            self._showJobResult(job)
+
+    # Submits the current job as soon as the scheduler has a slot for it
+    def scheduleCurrentJob(self):
+        job = self._jobs[self._current_job]
+        self.jobScheduler.add(job, job.priority)
 
     def cancelCurrentJob(self):
-        if self._jobs[self._current_job] and not self._jobs[self._current_job].canceled:
+        self.cancelJob(self._jobs[self._current_job])
+
+    # abort=False for a job that already ended on the server
+    def cancelJob(self, job, abort: bool = True):
+        if job and not job.canceled:
 
             # Cancel the job if it has been submitted
-            if self._jobs[self._current_job].api_job_id:
-                self.api_connection.cancelJob(self._jobs[self._current_job].api_job_id)
+            if abort:
+                self.api_connection.cancelSubmittedJob(job)
 
-            if not self._jobs[self._current_job].canceled:
+            if job is self.cloudJob:
                 self.status = SmartSliceCloudStatus.Cancelling
                 self.updateStatus()
 
-            self._jobs[self._current_job].cancel()
-            self._jobs[self._current_job].canceled = True
-            self._jobs[self._current_job].setResult(None)
+            job.cancel()
+            job.canceled = True
+            job.setResult(None)
+
+            # Submitted jobs leave the scheduler when the watcher lets go of them
+            if not job.watching:
+                self.jobScheduler.cancel(job)
 
     # Resets all of the tracked properties and jobs
     def clearJobs(self):
 
-        # Cancel the running job (if any)
-        if len(self._jobs) > 0 and self._jobs[self._current_job] and self._jobs[self._current_job].isRunning():
-            self.cancelCurrentJob()
+        # Cancel the waiting and running jobs (if any)
+        for job in self.jobScheduler.jobs():
+            self.cancelJob(job)
 
         # Clear out the jobs
         self._jobs.clear()
@@ -745,7 +1160,7 @@ class SmartSliceCloudConnector(QObject):
         jobname = Application.getInstance().getPrintInformation().jobName
         debug_filename = "{}_smartslice.3mf".format(jobname)
         debug_filedir = self.app_preferences.getValue(self.debug_save_smartslice_package_location)
-        dummy_job = dummy_job.prepareJob(filename=debug_filename, filedir=debug_filedir)
+        dummy_job = dummy_job.saveJob(filename=debug_filename, filedir=debug_filedir)
 
     def getProxy(self, engine=None, script_engine=None):
         return self._proxy
@@ -776,7 +1191,70 @@ class SmartSliceCloudConnector(QObject):
     def _refreshMachine(self):
         self.activeMachine = Application.getInstance().getMachineManager().activeMachine
 
+    # A job was held, submitted, etc. by the scheduler (on the UI thread)
+    def _onJobStateChanged(self, cloud_job, state):
+        Logger.log("d", "Smart Slice job {} is {}".format(cloud_job._id, state.value))
+
+        if cloud_job.canceled:
+            return
+
+        if state in JobState.waiting():
+            self._setJobStatus(cloud_job, SmartSliceCloudStatus.Queued)
+        elif state in (JobState.submitting, JobState.attached) and cloud_job.ui_status in (None, SmartSliceCloudStatus.Queued):
+            self._setJobStatus(cloud_job, cloud_job.ui_status_per_job_type[cloud_job.job_type])
+
+    # Keeps the status of a job, and shows it if it is the current job
+    def _setJobStatus(self, cloud_job, status):
+        cloud_job.ui_status = status
+
+        if cloud_job is self.cloudJob and self.status is not status:
+            self.status = status
+
+    # A status of a job being watched (on the UI thread)
+    def _onJobStatusReceived(self, cloud_job, job, busy_status):
+        if cloud_job.canceled:
+            return
+
+        if job.status == pywim.http.thor.JobInfo.Status.queued:
+            self._setJobStatus(cloud_job, SmartSliceCloudStatus.Queued)
+        elif job.status == pywim.http.thor.JobInfo.Status.running and cloud_job.ui_status not in (SmartSliceCloudStatus.BusyOptimizing, SmartSliceCloudStatus.BusyValidating):
+            self._setJobStatus(cloud_job, busy_status)
+
+        if cloud_job is not self.cloudJob:
+            return
+
+        self.api_connection.clearErrorMessage()
+        self._proxy.jobProgress = job.progress
+
+        if self._uploading:
+            # Back from the upload progress to the job's own status
+            self.updateSliceWidget()
+
+        if job.status == pywim.http.thor.JobInfo.Status.running and self.status is SmartSliceCloudStatus.BusyOptimizing:
+            self._proxy.sliceStatus = "Optimizing...&nbsp;&nbsp;&nbsp;&nbsp;(<i>Remaining Time: {}</i>)".format(Duration(job.runtime_remaining).getDisplayString())
+
+    # Upload progress of a job's geometry (on the UI thread)
+    def _onUploadProgressReceived(self, cloud_job, sent, total, throughput):
+        if cloud_job is not self.cloudJob:
+            return
+
+        self._uploading = True
+
+        megabyte = 1024. ** 2
+        if total:
+            self._proxy.jobProgress = int(100 * sent / total)
+            uploaded = "{:.1f} of {:.1f} MB".format(sent / megabyte, total / megabyte)
+        else:
+            uploaded = "{:.1f} MB".format(sent / megabyte)
+
+        self._proxy.progressBarVisible = total is not None
+        self._proxy.sliceStatus = "Uploading...&nbsp;&nbsp;&nbsp;&nbsp;(<i>{} at {:.1f} MB/s</i>)".format(
+            uploaded, throughput / megabyte
+        )
+
     def updateSliceWidget(self):
+        self._uploading = False
+
         if self.status is SmartSliceCloudStatus.Errors:
             self._proxy.sliceStatus = ""
             self._proxy.sliceHint = ""
@@ -935,15 +1413,24 @@ class SmartSliceCloudConnector(QObject):
 
         sel_tool = SmartSliceSelectTool.getInstance()
 
+    # A run of the job ended. Unless it held, attached or submitted the job, which ends
+    #   later, or the job was submitted again since, the job ended with it.
+    def _onJobRunEnded(self, job, attempt):
+        if attempt is not None and self.jobScheduler.finish(job, job.endState(), attempt):
+            self._onJobFinished(job)
+
+    def _onJobWatchEnded(self, job, thor_status_code, task):
+        self.api_connection.processWatchedJob(job, thor_status_code, task)
+
     def _onJobFinished(self, job):
-        if not self._jobs[self._current_job] or self._jobs[self._current_job].canceled:
+        if not job or job.canceled:
             Logger.log("d", "Smart Slice Job was Cancelled")
             return
 
-        if self._jobs[self._current_job].hasError():
-            exc = self._jobs[self._current_job].getError()
+        if job.hasError():
+            exc = job.getError()
             error = str(exc) if exc else "Unknown Error"
-            self.cancelCurrentJob()
+            self.cancelJob(job)
             Logger.logException("e", error)
             Message(
                 title='Smart Slice Job Unexpectedly Failed',
@@ -952,12 +1439,21 @@ class SmartSliceCloudConnector(QObject):
             ).show()
             return
 
+        if job is not self.cloudJob:
+            # Another job is shown, this one keeps its result until the user asks for it
+            self._jobFinishedMessage(job)
+            return
+
+        self._showJobResult(job)
+
+    # Shows the result of a job that ended, as the current job
+    def _showJobResult(self, job):
         self.propertyHandler._propertiesChanged.clear()
         self._proxy.shouldRaiseConfirmation = False
 
-        if self._jobs[self._current_job].getResult():
-            if len(self._jobs[self._current_job].getResult().analyses) > 0:
-                if self._jobs[self._current_job].job_type == pywim.smartslice.job.JobType.optimization:
+        if job.getResult():
+            if len(job.getResult().analyses) > 0:
+                if job.job_type == pywim.smartslice.job.JobType.optimization:
                     self.status = SmartSliceCloudStatus.Optimized
                     self.processAnalysisResult()
                 else:
@@ -967,7 +1463,7 @@ class SmartSliceCloudConnector(QObject):
             else:
                 if self.status != SmartSliceCloudStatus.ReadyToVerify and self.status != SmartSliceCloudStatus.Errors:
                     self.status = SmartSliceCloudStatus.ReadyToVerify
-                    results = self._jobs[self._current_job].getResult().feasibility_result['structural']
+                    results = job.getResult().feasibility_result['structural']
                     Message(
                         title="Smart Slice Error",
                         text="<p>Smart Slice cannot find a solution for the problem, "
@@ -988,6 +1484,34 @@ class SmartSliceCloudConnector(QObject):
                         dismissable=True
                     ).show()
 
+        job.ui_status = self.status
+
+    # Tells about a job that ended while another one was shown
+    def _jobFinishedMessage(self, job):
+        if not job.getResult():
+            return
+
+        job_name = "optimization" if job.job_type == pywim.smartslice.job.JobType.optimization else "validation"
+
+        message = Message(
+            title="Smart Slice",
+            text=i18n_catalog.i18nc("@info:status", "The {} started earlier has finished.".format(job_name)),
+            lifetime=0,
+            dismissable=True
+        )
+        message.addAction(
+            "show_job_{}".format(job._id),
+            i18n_catalog.i18nc("@action", "Show Results"),
+            "", ""
+        )
+        message.actionTriggered.connect(self._onJobFinishedMessageAction)
+        message.show()
+
+    def _onJobFinishedMessageAction(self, msg, action):
+        msg.hide()
+        if action.startswith("show_job_"):
+            self.showJob(int(action[len("show_job_"):]))
+
     def processAnalysisResult(self, selectedRow=0):
         job = self._jobs[self._current_job]
         active_extruder = getNodeActiveExtruder(getPrintableNodes()[0])
@@ -997,7 +1521,61 @@ class SmartSliceCloudConnector(QObject):
             self._proxy.updatePropertiesFromResults(resultData)
 
         elif job.job_type == pywim.smartslice.job.JobType.optimization and active_extruder:
-            self._proxy.resultsTable.setResults(job.getResult().analyses, selectedRow)
+            analyses = self._feasibleAnalyses(job)
+            self._proxy.resultsTable.setResults(analyses, selectedRow)
+
+            if len(analyses) == 0:
+                Message(
+                    title="Smart Slice",
+                    text=i18n_catalog.i18nc(
+                        "@info:status",
+                        "None of the {} optimization results meets the current requirements. "
+                        "Please adjust the requirements or optimize again.".format(len(job.getResult().analyses))
+                    ),
+                    lifetime=0,
+                    dismissable=True
+                ).show()
+
+    # The analyses of an optimization that meet the current requirements
+    def _feasibleAnalyses(self, job) -> list:
+        req_tool = SmartSliceRequirements.getInstance()
+        return ResultTableData.feasibleAnalyses(
+            job.getResult().analyses, req_tool.targetSafetyFactor, req_tool.maxDisplacement
+        )
+
+    """
+      rerankOptimizationResults()
+        Shows the results of the optimization that meet changed requirements, without another
+        optimization. Returns False if none of them does. The results keep the order the
+        optimization ranked them in by its objective, the ones that no longer meet the
+        requirements are left out and the rest are numbered again from the top.
+    """
+
+    def rerankOptimizationResults(self) -> bool:
+        job = self.cloudJob
+        if not job or job.job_type != pywim.smartslice.job.JobType.optimization or not job.getResult():
+            return False
+
+        analyses = self._feasibleAnalyses(job)
+        if len(analyses) == 0:
+            return False
+
+        # Stay with the selected result if it still meets the requirements
+        row = 0
+        shown = self._proxy.resultsTable.analyses
+        if len(shown) > 0:
+            selected = shown[self._proxy.resultsTable.getSelectedResultId()]
+            if selected in analyses:
+                row = analyses.index(selected)
+
+        Logger.log("d", "{} of {} optimization results meet the requirements".format(
+            len(analyses), len(job.getResult().analyses))
+        )
+
+        self._proxy.resultsTable.setResults(analyses, row)
+        self.status = SmartSliceCloudStatus.Optimized
+
+        return True
 
     def updateStatus(self, show_warnings=False):
         if not self.smartSliceJobHandle:
@@ -1013,9 +1591,9 @@ class SmartSliceCloudConnector(QObject):
         Application.getInstance().activityChanged.emit()
 
     def doVerification(self):
-        self.status = SmartSliceCloudStatus.BusyValidating
         self.addJob(pywim.smartslice.job.JobType.validation)
-        self._jobs[self._current_job].start()
+        self.status = SmartSliceCloudStatus.BusyValidating
+        self.scheduleCurrentJob()
 
     """
       prepareOptimization()
@@ -1030,9 +1608,9 @@ class SmartSliceCloudConnector(QObject):
         if len(getModifierMeshes()) > 0:
             self.propertyHandler.askToRemoveModMesh()
         else:
-            self.status = SmartSliceCloudStatus.BusyOptimizing
             self.addJob(pywim.smartslice.job.JobType.optimization)
-            self._jobs[self._current_job].start()
+            self.status = SmartSliceCloudStatus.BusyOptimizing
+            self.scheduleCurrentJob()
 
     def _checkSubscription(self, subscription):
         if subscription.status == pywim.http.thor.Subscription.Status.inactive:
@@ -1082,8 +1660,16 @@ class SmartSliceCloudConnector(QObject):
     def onSliceButtonClicked(self):
         if self.status in SmartSliceCloudStatus.busy():
             self._jobs[self._current_job].cancel()
-        else:
-            self._subscription = self.api_connection.getSubscription()
+        elif not self._subscription_pending:
+            # The button acts once the subscription is known, see _onSubscriptionReceived
+            self._subscription_pending = True
+            self.api_connection.requestSubscription()
+
+    def _onSubscriptionReceived(self, api_code, api_result):
+        self._subscription_pending = False
+
+        if self.status not in SmartSliceCloudStatus.busy():
+            self._subscription = self.api_connection.subscriptionFrom(api_code, api_result)
             if self._subscription is not None:
                 if self.status is SmartSliceCloudStatus.ReadyToVerify:
                     if self._checkSubscription(self._subscription):
@@ -16,6 +16,7 @@ from .SmartSliceCloudConnector import SmartSliceCloudConnector
 from .SmartSliceCloudProxy import SmartSliceCloudProxy
 from .SmartSliceCloudStatus import SmartSliceCloudStatus
 from .utils import getPrintableNodes
+from .stage.SmartSliceScene import AnalyzeMeshJob
 
 import pywim
 
@@ -29,6 +30,9 @@ class SmartSliceExtension(Extension):
 
         self.metadata = PluginMetaData()
 
+        # Opt in to analyzing meshes for face selection in a worker process
+        Application.getInstance().getPreferences().addPreference(AnalyzeMeshJob.process_preference, False)
+
         # Proxy to the UI, and the cloud connector for the cloud
         self.proxy = SmartSliceCloudProxy()
         self.cloud = SmartSliceCloudConnector(self.proxy, self)
@@ -1,8 +1,8 @@
 import os
 import io
 import time
+import datetime
 import json
-import zipfile
 import re
 from string import Formatter
 from typing import Dict, Tuple, Optional
@@ -17,6 +17,8 @@ from UM.i18n import i18nCatalog
 from UM.PluginRegistry import PluginRegistry
 from UM.Application import Application
 from UM.Logger import Logger
+from UM.Math.Matrix import Matrix
+from UM.Math.Vector import Vector
 from UM.Message import Message
 from UM.Settings.SettingFunction import SettingFunction
 from UM.Signal import Signal
@@ -32,6 +34,8 @@ from .utils import getPrintableNodes
 from .utils import getModifierMeshes
 from .utils import getNodeActiveExtruder
 from .utils import findChildSceneNode
+from .cloud import ThreeMF
+from .cloud.JobPackage import JobPackage
 from .stage.SmartSliceScene import Root
 
 i18n_catalog = i18nCatalog("smartslice")
@@ -269,21 +273,89 @@ class SmartSliceJobHandler:
 
         return job
 
-    # Writes a smartslice job to a 3MF file
+    # Writes a smartslice job to a 3MF file, threemf_file is a path or a seekable binary stream
     @classmethod
-    def write3mf(self, threemf_path, mesh_nodes, job: pywim.smartslice.job.Job):
-        # Getting 3MF writer and write our file
-        threeMF_Writer = Application.getInstance().getMeshFileHandler().getWriter("3MFWriter")
-        if threeMF_Writer is not None:
-            threeMF_Writer.write(threemf_path, mesh_nodes)
+    def write3mf(self, threemf_file, mesh_nodes, job: pywim.smartslice.job.Job):
+        package = self.buildJobPackage(mesh_nodes, job)
+        if package is None:
+            return False
 
-            threemf_file = zipfile.ZipFile(threemf_path, 'a')
-            threemf_file.writestr('SmartSlice/job.json', job.to_json() )
-            threemf_file.close()
+        package.write(threemf_file)
 
-            return True
+        return True
 
-        return False
+    # Collects the meshes and the job of a submission. The meshes are later streamed straight
+    # from their vertex / index arrays, laid out the way Cura's 3MFWriter does it.
+    @classmethod
+    def buildJobPackage(self, mesh_nodes, job: pywim.smartslice.job.Job) -> Optional[JobPackage]:
+        global_stack = Application.getInstance().getGlobalContainerStack()
+
+        # Cura is Y up with the origin in the center of the build plate, 3MF is Z up
+        # with the origin in the front left corner
+        transformation = Matrix()
+        transformation._data[1, 1] = 0
+        transformation._data[1, 2] = -1
+        transformation._data[2, 1] = 1
+        transformation._data[2, 2] = 0
+
+        translation = Matrix()
+        translation.setByTranslation(Vector(
+            x=global_stack.getProperty("machine_width", "value") / 2,
+            y=global_stack.getProperty("machine_depth", "value") / 2,
+            z=0
+        ))
+        transformation.preMultiply(translation)
+
+        objects = []
+        for node in mesh_nodes:
+            threemf_object = self._threeMFObject(node, transformation, global_stack)
+            if threemf_object:
+                objects.append(threemf_object)
+
+        if len(objects) == 0:
+            return None
+
+        creation_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        return JobPackage(
+            objects,
+            job.to_json(),
+            metadata={
+                "Application": Application.getInstance().getApplicationDisplayName(),
+                "CreationDate": creation_date,
+                "ModificationDate": creation_date
+            }
+        )
+
+    @classmethod
+    def _threeMFObject(self, node, transformation: Matrix, global_stack) -> Optional[ThreeMF.ThreeMFObject]:
+        mesh_data = node.getMeshData()
+        if mesh_data is None:
+            return None
+
+        metadata = {}
+
+        # Per object settings (& per object mesh types), the same as Cura stores them
+        stack = node.callDecoration("getStack")
+        if stack is not None:
+            changed_setting_keys = stack.getTop().getAllKeys()
+
+            if global_stack.getProperty("machine_extruder_count", "value") > 1:
+                changed_setting_keys.add("extruder_nr")
+
+            for key in changed_setting_keys:
+                metadata["cura:" + key] = str(stack.getProperty(key, "value"))
+
+        for key, value in getattr(node, "metadata", {}).items():
+            metadata[key] = value
+
+        return ThreeMF.ThreeMFObject(
+            node.getName(),
+            mesh_data.getVertices(),
+            mesh_data.getIndices(),
+            node.getWorldTransformation().preMultiply(transformation).getData(),
+            metadata
+        )
 
     # Reads a 3MF file into a smartslice job
     @classmethod
@@ -325,7 +325,12 @@ class SmartSlicePropertyHandler(QObject):
             for p in self._req_tool_properties:
                 p.cache()
 
-        # Optimizing or optimized, confirm the changes
+        # Optimized, show the results that meet the new requirements
+        elif self.connector.status == SmartSliceCloudStatus.Optimized and self.connector.rerankOptimizationResults():
+            for p in self._req_tool_properties:
+                p.cache()
+
+        # Optimizing, or optimized and no result meets the requirements - confirm the changes
         elif self.connector.status == SmartSliceCloudStatus.Optimized or \
             (self.connector.status in SmartSliceCloudStatus.busy() and self.connector.cloudJob and self.connector.cloudJob.job_type == pywim.smartslice.job.JobType.optimization):
             self.confirmPendingChanges(
@@ -0,0 +1,115 @@
+from typing import Any, Callable, Optional, Tuple
+
+import concurrent.futures
+import random
+import threading
+import time
+
+"""
+  ApiCalls
+
+    Runs Smart Slice API calls in the background. Every call gets a future that
+    resolves to the usual (code, result) tuple, so callers either block on it
+    with a deadline of their own choosing (worker threads), or attach a
+    callback and return right away (the UI thread).
+
+    A call that raises, e.g. because the connection dropped, is retried after
+    an exponentially growing delay with full jitter (a random delay between 0
+    and the backoff), so clients that lost the connection together don't all
+    come back at the same moment. Retries stop at the call's deadline or after
+    the policy's number of attempts, and the future then resolves to
+    (failure_code, None).
+
+    Calls run on daemon threads so a call stuck in a request never keeps Cura
+    from closing.
+
+"""
+
+# Python 3.8+ raises when a canceled future gets a result, earlier versions take it silently
+_InvalidStateError = getattr(concurrent.futures, "InvalidStateError", ())
+
+
+class RetryPolicy:
+    def __init__(self, attempts: int = 20, base_delay: float = 0.5, max_delay: float = 8.):
+        self.attempts = attempts
+        self.base_delay = base_delay # seconds
+        self.max_delay = max_delay # seconds
+
+    def delay(self, attempt: int) -> float:
+        """ Seconds to wait after the attempt'th failure (counting from 0) """
+        return random.uniform(0., min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class ApiCallExecutor:
+    MAX_IN_FLIGHT = 8
+
+    def __init__(self, retry: RetryPolicy = None, max_in_flight: int = MAX_IN_FLIGHT, log: Callable[[str], None] = None):
+        self.retry = retry or RetryPolicy()
+        self.log = log
+
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def call(
+        self, endpoint: Callable[[], Tuple[Any, Any]], failure_code: Any, deadline: Optional[float] = None,
+        callback: Callable[[Tuple[Any, Any]], None] = None
+    ) -> concurrent.futures.Future:
+        """
+        Starts endpoint in the background and returns a future of its (code, result).
+        deadline is in seconds from now, None to retry until the attempts run out.
+        callback is called with the (code, result) on the call's thread, unless the
+        future was canceled. Canceling the future stops any further attempts.
+        """
+        future = concurrent.futures.Future()
+        expires = None if deadline is None else time.monotonic() + deadline
+
+        if callback:
+            future.add_done_callback(lambda done: None if done.cancelled() else callback(done.result()))
+
+        thread = threading.Thread(target=self._run, args=(future, endpoint, failure_code, expires), daemon=True)
+        thread.start()
+
+        return future
+
+    def result(self, future: concurrent.futures.Future, failure_code: Any, deadline: Optional[float] = None):
+        """ Waits for a call's (code, result), at most deadline seconds, after which the call is abandoned """
+        try:
+            return future.result(timeout=deadline)
+        except (concurrent.futures.TimeoutError, concurrent.futures.CancelledError):
+            future.cancel()
+            return failure_code, None
+
+    def _run(self, future: concurrent.futures.Future, endpoint, failure_code, expires: Optional[float]):
+        with self._slots:
+            outcome = (failure_code, None)
+            attempt = 0
+
+            while attempt < self.retry.attempts and not future.cancelled():
+                try:
+                    outcome = endpoint()
+                    break
+                except Exception as error:
+                    # A connection issue, try again after a while
+                    self._log("An error has occured with an API call: {}".format(error))
+
+                delay = self.retry.delay(attempt)
+                attempt += 1
+
+                if attempt == self.retry.attempts:
+                    self._log("Giving up on an API call after {} attempts".format(attempt))
+                    break
+                elif expires is not None and time.monotonic() + delay > expires:
+                    self._log("Giving up on an API call at its deadline after {} attempts".format(attempt))
+                    break
+
+                time.sleep(delay)
+
+        if not future.cancelled():
+            try:
+                future.set_result(outcome)
+            except _InvalidStateError:
+                # Canceled in the meantime
+                pass
+
+    def _log(self, message: str):
+        if self.log:
+            self.log(message)
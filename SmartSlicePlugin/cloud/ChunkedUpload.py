@@ -0,0 +1,244 @@
+from typing import Callable, Iterable, Optional, Union
+
+import hashlib
+import io
+import time
+
+import requests
+
+"""
+  ChunkedUpload
+
+    Uploads a payload to a URL as a sequence of PUT requests, one chunk each, so
+    only a chunk is held in memory per request and a dropped connection doesn't
+    start the upload over. Every chunk carries a Content-Range header:
+
+      Content-Range: bytes <first>-<last>/<total>    (total is * while unknown)
+
+    The server answers 308 with the number of bytes it has so far in the
+    Upload-Offset header, or 200 / 201 / 204 once the last chunk is in. After a
+    connection error, a HEAD request to the same URL returns the Upload-Offset the
+    server has acknowledged and the upload continues from there.
+
+    The payload can be bytes, a binary file object (seekable files resume from any
+    offset) or an iterable of bytes, e.g. a generator, which can resume from
+    anywhere in the chunk that was in flight.
+
+    For bytes and seekable files every chunk also carries the size and SHA-256 of
+    the whole payload:
+
+      Upload-Digest: sha-256=<hex>
+
+    The server checks the completed upload against it and answers 4xx if a resumed
+    upload doesn't add up to the payload, the upload then has to start over.
+
+"""
+
+class ChunkedUploadError(Exception):
+    pass
+
+
+class ChunkedUploadCanceled(ChunkedUploadError):
+    pass
+
+
+class ChunkedUpload:
+    CHUNK_SIZE = 4 * 1024 ** 2 # bytes
+    MAX_RETRIES = 5
+    RETRY_DELAY = 1. # seconds, doubled after every failed attempt
+    TIMEOUT = 60. # seconds per request
+
+    OFFSET_HEADER = "Upload-Offset"
+    DIGEST_HEADER = "Upload-Digest"
+
+    def __init__(
+        self, url: str, payload: Union[bytes, io.IOBase, Iterable[bytes]],
+        total: Optional[int] = None, headers: dict = None, chunk_size: int = CHUNK_SIZE,
+        progress: Callable[[int, Optional[int], float], None] = None,
+        should_stop: Callable[[], bool] = None,
+        session=requests
+    ):
+        """
+        progress is called after every acknowledged chunk with the bytes sent, the total
+        (None if unknown) and the throughput in bytes per second. should_stop is polled
+        before every chunk and cancels the upload.
+        """
+        self.url = url
+        self.headers = headers or {}
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.should_stop = should_stop
+        self.session = session
+
+        if isinstance(payload, (bytes, bytearray, memoryview)):
+            payload = io.BytesIO(payload)
+
+        self._file = None
+        self._chunks = None
+
+        if hasattr(payload, "read"):
+            self._file = payload
+            if total is None and self._seekable():
+                position = payload.tell()
+                total = payload.seek(0, io.SEEK_END) - position
+                payload.seek(position)
+            self._start = payload.tell() if self._seekable() else 0
+        else:
+            self._chunks = iter(payload)
+
+        self.total = total
+        self.digest = self._digest() if self._seekable() else None
+
+        # The chunk being sent, kept until the server acknowledges it
+        self._pending = b""
+        self._pending_offset = 0
+        self._exhausted = False
+
+        self.sent = 0
+
+    def upload(self, offset: int = 0) -> requests.Response:
+        """
+        Sends the payload from offset (bytes the server already has) and returns the
+        server's final response, or the first response that is neither a completion
+        nor an acknowledgement. Raises ChunkedUploadError if the connection keeps failing.
+        """
+        self._seek(offset)
+
+        started = time.monotonic()
+        started_offset = offset
+        retries = 0
+
+        while True:
+            if self.should_stop and self.should_stop():
+                raise ChunkedUploadCanceled("Upload canceled at {} bytes".format(self.sent))
+
+            chunk = self._nextChunk()
+            first = self._pending_offset
+            last = first + len(chunk) - 1
+
+            total = self.total
+            if total is None and self._exhausted:
+                total = first + len(chunk)
+
+            headers = dict(self.headers)
+            if self.digest:
+                headers[self.DIGEST_HEADER] = "sha-256={}".format(self.digest)
+            if len(chunk) == 0:
+                headers["Content-Range"] = "bytes */{}".format(total)
+            else:
+                headers["Content-Range"] = "bytes {}-{}/{}".format(first, last, "*" if total is None else total)
+
+            try:
+                response = self.session.put(self.url, data=chunk, headers=headers, timeout=self.TIMEOUT)
+            except (requests.ConnectionError, requests.Timeout) as error:
+                retries += 1
+                if retries > self.MAX_RETRIES:
+                    raise ChunkedUploadError("Upload failed at {} bytes: {}".format(self.sent, error))
+
+                time.sleep(self.RETRY_DELAY * 2 ** (retries - 1))
+
+                response = self._acknowledged()
+                if response is None:
+                    continue
+            else:
+                retries = 0
+
+            if response.status_code in (200, 201, 204):
+                self.sent = self.total if self.total is not None else last + 1
+                self._report(started, started_offset)
+                return response
+            elif response.status_code != 308:
+                return response
+
+            self._seek(int(response.headers.get(self.OFFSET_HEADER, last + 1)))
+            self._report(started, started_offset)
+
+    def _acknowledged(self) -> Optional[requests.Response]:
+        """ Asks the server how much it has after a failure, None if it can't be reached either """
+        try:
+            response = self.session.head(self.url, headers=self.headers, timeout=self.TIMEOUT)
+        except (requests.ConnectionError, requests.Timeout):
+            return None
+
+        if response.status_code in (200, 201, 204):
+            return response
+
+        # Anything else means the upload is still incomplete
+        response.status_code = 308
+        if self.OFFSET_HEADER not in response.headers:
+            response.headers[self.OFFSET_HEADER] = "0"
+
+        return response
+
+    def _digest(self) -> str:
+        """ SHA-256 of the file from the start of the payload, the file stays where it was """
+        hasher = hashlib.sha256()
+        self._file.seek(self._start)
+        for data in iter(lambda: self._file.read(self.chunk_size), b""):
+            hasher.update(data)
+        self._file.seek(self._start)
+        return hasher.hexdigest()
+
+    def _seek(self, offset: int):
+        """ Continues the upload at offset """
+        self.sent = offset
+
+        if self._pending_offset <= offset <= self._pending_offset + len(self._pending):
+            self._pending = self._pending[offset - self._pending_offset:]
+            self._pending_offset = offset
+            return
+
+        if self._file is not None and self._seekable():
+            self._file.seek(self._start + offset)
+            self._pending = b""
+            self._pending_offset = offset
+            self._exhausted = False
+            return
+
+        raise ChunkedUploadError(
+            "Can't resume at byte {}, the payload can only continue from byte {}".format(offset, self._pending_offset)
+        )
+
+    def _nextChunk(self) -> bytes:
+        if len(self._pending) >= self.chunk_size or self._exhausted:
+            return self._pending[:self.chunk_size]
+
+        parts = [self._pending]
+        size = len(self._pending)
+
+        while size < self.chunk_size:
+            if self._file is not None:
+                data = self._file.read(self.chunk_size - size)
+            else:
+                data = next(self._chunks, b"")
+
+            if not data:
+                self._exhausted = True
+                break
+
+            parts.append(data)
+            size += len(data)
+
+        self._pending = b"".join(parts)
+
+        # A generator can hand out more than a chunk at once, the rest stays pending
+        chunk = self._pending[:self.chunk_size]
+        if len(chunk) < len(self._pending):
+            self._exhausted = False
+
+        return chunk
+
+    def _seekable(self) -> bool:
+        try:
+            return self._file.seekable()
+        except AttributeError:
+            return False
+
+    def _report(self, started: float, started_offset: int):
+        if not self.progress:
+            return
+
+        elapsed = time.monotonic() - started
+        throughput = (self.sent - started_offset) / elapsed if elapsed > 0. else 0.
+
+        self.progress(self.sent, self.total, throughput)
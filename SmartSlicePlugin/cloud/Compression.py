@@ -0,0 +1,229 @@
+from typing import Dict, Optional
+
+import collections
+import concurrent.futures
+import os
+import time
+import zipfile
+import zlib
+
+from enum import Enum
+
+"""
+  Compression
+
+    How the submission 3MF is compressed. Deflating the model XML is by far the
+    most expensive part of writing the package, so the level is a trade between
+    CPU time and bytes on the wire:
+
+      stored    - no compression, for fast local links
+      fast      - deflate level 1
+      default   - deflate level 6, zlib's default
+      max       - deflate level 9, for slow or metered links
+      parallel  - deflate level 6, the model entry compressed by several threads
+      auto      - whichever of the above gives the shortest compress + upload time
+                  for the link throughput measured on previous uploads
+
+    The auto estimate compresses a sample of the model XML with each candidate.
+    Compression time and compressed size both grow linearly with the model, so
+    the candidate with the lowest seconds per input byte, compressing plus
+    sending the output, wins regardless of the model size. The choice is made
+    once per geometry hash (the default before any throughput was measured) and
+    kept, so a geometry isn't written differently when the upload resumes.
+
+"""
+
+class CompressionPolicy(Enum):
+    stored = "stored"
+    fast = "fast"
+    default = "default"
+    max = "max"
+    parallel = "parallel"
+    auto = "auto"
+
+
+class ArchiveCompression:
+    """ zipfile method and deflate level of the package, threads > 1 compresses the model entry in parallel """
+    def __init__(self, method: int = zipfile.ZIP_DEFLATED, level: Optional[int] = None, threads: int = 1):
+        self.method = method
+        self.level = level
+        self.threads = threads
+
+    def __eq__(self, other):
+        return isinstance(other, ArchiveCompression) and \
+            (self.method, self.level, self.threads) == (other.method, other.level, other.threads)
+
+    def __repr__(self):
+        return "ArchiveCompression({}, {}, {})".format(self.method, self.level, self.threads)
+
+
+def parallelThreads() -> int:
+    return max(1, min(os.cpu_count() or 1, ParallelDeflate.MAX_THREADS))
+
+
+def compressionFor(policy: CompressionPolicy) -> ArchiveCompression:
+    """ The settings of a fixed policy, auto has none of its own and gets the default """
+    if policy is CompressionPolicy.stored:
+        return ArchiveCompression(zipfile.ZIP_STORED)
+    elif policy is CompressionPolicy.fast:
+        return ArchiveCompression(zipfile.ZIP_DEFLATED, 1)
+    elif policy is CompressionPolicy.max:
+        return ArchiveCompression(zipfile.ZIP_DEFLATED, 9)
+    elif policy is CompressionPolicy.parallel:
+        return ArchiveCompression(zipfile.ZIP_DEFLATED, 6, parallelThreads())
+    return ArchiveCompression(zipfile.ZIP_DEFLATED, 6)
+
+
+class CompressionSelector:
+    """
+    Picks the compression of each package for the policy. Uploads report their
+    throughput through recordThroughput, which the auto policy bases its choice on.
+    """
+
+    SAMPLE_SIZE = 1024 ** 2 # bytes of model XML compressed per candidate
+    MAX_CHOICES = 32
+    CANDIDATES = (
+        CompressionPolicy.stored,
+        CompressionPolicy.fast,
+        CompressionPolicy.default,
+        CompressionPolicy.max,
+        CompressionPolicy.parallel
+    )
+
+    def __init__(self, policy: CompressionPolicy = CompressionPolicy.default, choices: Dict[str, str] = None):
+        """ choices are the auto choices of an earlier session, as returned by choices() """
+        self.policy = policy
+        self.throughput = None # bytes per second
+
+        # Auto choices by geometry hash, made the first time a geometry is written, so it
+        # is always written the same way and an interrupted upload can be resumed
+        self._choices = collections.OrderedDict()
+        for key, value in (choices or {}).items():
+            try:
+                self._choices[key] = CompressionPolicy(value)
+            except ValueError:
+                pass
+        self._trimChoices()
+
+    def choices(self) -> Dict[str, str]:
+        """ The auto choices by geometry hash, oldest first, to keep them for the next session """
+        return collections.OrderedDict((key, policy.value) for key, policy in self._choices.items())
+
+    def recordThroughput(self, throughput: float):
+        if throughput <= 0.:
+            return
+        if self.throughput is None:
+            self.throughput = throughput
+        else:
+            self.throughput = 0.5 * (self.throughput + throughput)
+
+    def compression(self, package: "JobPackage") -> ArchiveCompression:
+        if self.policy is not CompressionPolicy.auto:
+            return compressionFor(self.policy)
+
+        key = package.geometry_hash
+        if key not in self._choices:
+            if self.throughput is None:
+                # Nothing measured yet, this geometry stays with the default from now on
+                self._choices[key] = CompressionPolicy.default
+            else:
+                self._choices[key] = self.choose(package.sample(self.SAMPLE_SIZE), self.throughput)
+            self._trimChoices()
+
+        return compressionFor(self._choices[key])
+
+    def _trimChoices(self):
+        while len(self._choices) > self.MAX_CHOICES:
+            self._choices.popitem(last=False)
+
+    @classmethod
+    def choose(cls, sample: bytes, throughput: float) -> CompressionPolicy:
+        """ The candidate with the shortest estimated compress and upload time for data like the sample """
+        if not sample:
+            return CompressionPolicy.default
+
+        threads = parallelThreads()
+
+        best = None
+        best_cost = None
+
+        for policy in cls.CANDIDATES:
+            if policy is CompressionPolicy.parallel and threads == 1:
+                continue
+
+            compression = compressionFor(policy)
+
+            if compression.method == zipfile.ZIP_STORED:
+                seconds, size = 0., len(sample)
+            else:
+                start = time.perf_counter()
+                size = len(_deflate(sample, compression.level, True))
+                seconds = time.perf_counter() - start
+
+            if compression.threads > 1:
+                seconds /= compression.threads
+
+            cost = (seconds + size / throughput) / len(sample)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = policy, cost
+
+        return best
+
+
+class ParallelDeflate:
+    """
+    A stand-in for zlib.compressobj(level, DEFLATED, -15) that deflates blocks of the
+    input on a thread pool, like pigz. Every block but the last ends on a sync flush,
+    so the blocks' output concatenates into one raw deflate stream. Blocks don't share
+    a dictionary, which costs a little ratio at the block boundaries.
+    """
+
+    BLOCK_SIZE = 1024 ** 2 # bytes
+    MAX_THREADS = 8
+
+    def __init__(self, level: int = -1, threads: Optional[int] = None):
+        self.level = level
+        self.threads = threads or parallelThreads()
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(self.threads)
+        self._buffer = []
+        self._buffered = 0
+        self._pending = collections.deque()
+
+    def compress(self, data: bytes) -> bytes:
+        self._buffer.append(data)
+        self._buffered += len(data)
+
+        if self._buffered >= self.BLOCK_SIZE:
+            data = b"".join(self._buffer)
+            full = len(data) - len(data) % self.BLOCK_SIZE
+            for start in range(0, full, self.BLOCK_SIZE):
+                self._submit(data[start:start + self.BLOCK_SIZE], False)
+            self._buffer = [data[full:]]
+            self._buffered = len(data) - full
+
+        # Keep a couple of blocks per thread in flight, wait on the oldest beyond that
+        return self._collect(2 * self.threads)
+
+    def flush(self, mode: int = zlib.Z_FINISH) -> bytes:
+        self._submit(b"".join(self._buffer), True)
+        self._buffer = []
+        self._buffered = 0
+
+        output = self._collect(0)
+        self._executor.shutdown()
+        return output
+
+    def _submit(self, block: bytes, final: bool):
+        self._pending.append(self._executor.submit(_deflate, block, self.level, final))
+
+    def _collect(self, in_flight: int) -> bytes:
+        output = []
+        while self._pending and (self._pending[0].done() or len(self._pending) > in_flight):
+            output.append(self._pending.popleft().result())
+        return b"".join(output)
+
+
+def _deflate(data: bytes, level: int, final: bool) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
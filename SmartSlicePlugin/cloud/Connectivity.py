@@ -0,0 +1,99 @@
+from typing import Callable, Optional
+
+import threading
+import time
+
+from enum import Enum
+
+"""
+  Connectivity
+
+    What we know about the connection to the Smart Slice API and the login
+    session, from the responses of recent calls. A call that got any response
+    proves the API was reachable, so there is no need to probe it with info()
+    before the next call as long as that was less than TTL seconds ago. A
+    transport error (the call raised) makes the state offline right away, and
+    the next call probes again.
+
+    The session is the token that whoami accepted last. It is trusted for the
+    same TTL, and dropped when a call is answered with 401 or on logout.
+
+"""
+
+class ConnectivityState(Enum):
+    unknown = "unknown"
+    online = "online"
+    offline = "offline"
+
+
+class ConnectivityTracker:
+    TTL = 60. # seconds
+
+    def __init__(self, ttl: float = TTL, on_changed: Callable[["ConnectivityState"], None] = None):
+        self.ttl = ttl
+        self.on_changed = on_changed
+
+        self._lock = threading.Lock()
+        self._state = ConnectivityState.unknown
+        self._confirmed = None # time of the last response
+
+        self._session_token = None
+        self._session_confirmed = None
+
+    @property
+    def state(self) -> ConnectivityState:
+        with self._lock:
+            if self._state is ConnectivityState.online and not self._fresh(self._confirmed):
+                return ConnectivityState.unknown
+            return self._state
+
+    def needsProbe(self) -> bool:
+        """ Whether a call should check the connection first, i.e. the API wasn't reachable within the TTL """
+        return self.state is not ConnectivityState.online
+
+    def recordResponse(self, code=None):
+        """ A call was answered, with HTTP status code if known """
+        with self._lock:
+            self._confirmed = time.monotonic()
+            if code == 401:
+                self._session_token = None
+            changed = self._setState(ConnectivityState.online)
+        self._notify(changed)
+
+    def recordTransportError(self):
+        with self._lock:
+            self._confirmed = None
+            changed = self._setState(ConnectivityState.offline)
+        self._notify(changed)
+
+    def invalidate(self):
+        """ Forgets everything, the next call probes the connection and the session is checked again """
+        with self._lock:
+            self._confirmed = None
+            self._session_token = None
+            changed = self._setState(ConnectivityState.unknown)
+        self._notify(changed)
+
+    def recordSession(self, token: Optional[str]):
+        """ The API accepted token (None: the session ended) """
+        with self._lock:
+            self._session_token = token
+            self._session_confirmed = time.monotonic()
+
+    def sessionValid(self, token: Optional[str]) -> bool:
+        """ Whether token was accepted within the TTL """
+        with self._lock:
+            return token is not None and token == self._session_token and self._fresh(self._session_confirmed)
+
+    def _fresh(self, confirmed: Optional[float]) -> bool:
+        return confirmed is not None and time.monotonic() - confirmed < self.ttl
+
+    def _setState(self, state: ConnectivityState) -> Optional[ConnectivityState]:
+        if state is self._state:
+            return None
+        self._state = state
+        return state
+
+    def _notify(self, changed: Optional[ConnectivityState]):
+        if changed is not None and self.on_changed:
+            self.on_changed(changed)
@@ -0,0 +1,179 @@
+from typing import Any, Callable, Optional, Tuple
+
+import requests
+
+from .ChunkedUpload import ChunkedUpload, ChunkedUploadCanceled
+from .JobPackage import JobPackage
+
+"""
+  GeometryUpload
+
+    Content addressed submission of Smart Slice jobs. The geometry of a job is
+    stored on the server under its hash and only uploaded if the server doesn't
+    have it yet, the job itself is then posted on its own and refers to the
+    geometry by hash. Re-running a job after changing a load or a requirement
+    therefore only sends the job JSON.
+
+    The endpoints, relative to the API address:
+
+      GET  /smartslice/capabilities          {"geometry_upload": true} if supported
+      HEAD /smartslice/geometry/<hash>       200 if stored, 404 if not (Upload-Offset: bytes so far)
+      PUT  /smartslice/geometry/<hash>       body: geometry-only 3MF, in chunks (see ChunkedUpload)
+      POST /smartslice/geometry/<hash>/job   body: job JSON, returns the JobInfo
+
+    Servers without the capability endpoint get the complete 3MF through the
+    regular job submission instead. tools/geometry_server.py implements these
+    endpoints for testing offline.
+
+"""
+
+class GeometryUploadError:
+    """ Returned in place of the JobInfo when the server rejects a request, like pywim's API results """
+    def __init__(self, error: str):
+        self.error = error
+
+
+class GeometryUploader:
+    CANCELED = 499 # returned when should_stop ended the upload, as nginx logs a closed request
+
+    CAPABILITIES_ENDPOINT = "/smartslice/capabilities"
+    GEOMETRY_ENDPOINT = "/smartslice/geometry/{}"
+    JOB_ENDPOINT = "/smartslice/geometry/{}/job"
+
+    TIMEOUT = 30. # seconds, the geometry upload itself isn't limited
+
+    def __init__(self, client: "pywim.http.thor.Client", job_info_type=None, session=requests):
+        self._client = client
+        self._job_info_type = job_info_type
+        self._session = session
+
+        self._capabilities = None
+
+        # Hashes the server is known to have
+        self._stored = set()
+
+    @property
+    def address(self) -> str:
+        return self._client.address
+
+    def capabilities(self) -> dict:
+        """ What the server supports beyond the regular API, asked once per connection """
+        if self._capabilities is None:
+            try:
+                response = self._session.get(
+                    self.address + self.CAPABILITIES_ENDPOINT, headers=self._headers(), timeout=self.TIMEOUT
+                )
+            except requests.RequestException:
+                # Don't remember anything, the next job will ask again
+                return {}
+
+            self._capabilities = self._json(response) if response.status_code == 200 else {}
+
+        return self._capabilities
+
+    def supported(self) -> bool:
+        """ Whether the server accepts content addressed jobs """
+        return bool(self.capabilities().get("geometry_upload"))
+
+    def submit(
+        self, package: JobPackage,
+        progress: Callable[[int, Optional[int], float], None] = None,
+        should_stop: Callable[[], bool] = None
+    ) -> Tuple[int, Any]:
+        """
+        Uploads the package's geometry if the server doesn't have it and posts the job.
+        Returns the HTTP status code and the JobInfo, or a GeometryUploadError on failure.
+        progress and should_stop are handed to the ChunkedUpload of the geometry.
+        """
+        geometry_hash = package.geometry_hash
+
+        # The server may have dropped the geometry since we last checked, upload once more if so
+        for _ in range(2):
+            if geometry_hash not in self._stored:
+                try:
+                    code, error = self._uploadGeometry(package, progress, should_stop)
+                except ChunkedUploadCanceled as canceled:
+                    return self.CANCELED, GeometryUploadError(str(canceled))
+                if code not in (200, 201, 204):
+                    return code, error
+
+                self._stored.add(geometry_hash)
+
+            response = self._session.post(
+                self.address + self.JOB_ENDPOINT.format(geometry_hash),
+                data=package.job_json.encode(),
+                headers=self._headers({"Content-Type": "application/json"}),
+                timeout=self.TIMEOUT
+            )
+
+            if response.status_code != 404:
+                break
+
+            self._stored.discard(geometry_hash)
+
+        if response.status_code != 200:
+            return response.status_code, self._error(response)
+
+        return response.status_code, self._jobInfo(self._json(response))
+
+    def _uploadGeometry(
+        self, package: JobPackage, progress=None, should_stop=None
+    ) -> Tuple[int, Optional[GeometryUploadError]]:
+        url = self.address + self.GEOMETRY_ENDPOINT.format(package.geometry_hash)
+
+        response = self._session.head(url, headers=self._headers(), timeout=self.TIMEOUT)
+        if response.status_code == 200:
+            return 200, None
+        elif response.status_code != 404:
+            return response.status_code, self._error(response)
+
+        # A previous, interrupted upload of the same geometry continues where it stopped
+        offset = int(response.headers.get(ChunkedUpload.OFFSET_HEADER, 0))
+
+        with package.spool(include_job=False) as geometry:
+            upload = ChunkedUpload(
+                url, geometry,
+                headers=self._headers({"Content-Type": "model/3mf"}),
+                progress=progress,
+                should_stop=should_stop,
+                session=self._session
+            )
+            response = upload.upload(offset)
+
+            if offset > 0 and 400 <= response.status_code < 500:
+                # The partial upload was of other bytes (e.g. another compression) and
+                # didn't complete to the size and digest of this one, send it all again
+                response = upload.upload(0)
+
+        if response.status_code not in (200, 201, 204):
+            return response.status_code, self._error(response)
+
+        return response.status_code, None
+
+    def _headers(self, headers: dict = None) -> dict:
+        headers = dict(headers or {})
+
+        token = self._client.get_token()
+        if token:
+            headers["Authorization"] = "Bearer {}".format(token)
+
+        return headers
+
+    def _jobInfo(self, data: dict):
+        if self._job_info_type is None:
+            return data
+        return self._job_info_type.from_dict(data)
+
+    @staticmethod
+    def _json(response: requests.Response) -> dict:
+        try:
+            data = response.json()
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    @classmethod
+    def _error(cls, response: requests.Response) -> GeometryUploadError:
+        return GeometryUploadError(
+            cls._json(response).get("error", "HTTP {}".format(response.status_code))
+        )
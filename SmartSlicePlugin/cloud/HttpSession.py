@@ -0,0 +1,254 @@
+from typing import Dict
+
+import contextlib
+import ssl
+import threading
+
+import requests
+import requests.adapters
+import requests.certs
+import urllib3.connectionpool
+
+"""
+  HttpSession
+
+    One requests session for everything the plugin sends to the Smart Slice
+    API, shared by the UI and all job threads. Its connection pools keep
+    connections alive between calls, so a sequence of short calls (login,
+    whoami, subscription, submit, status polls) only pays for the TCP and TLS
+    handshakes once. When a connection has to be opened again anyway, the TLS
+    session of the previous connection to the host is offered to the server so
+    it can resume it with an abbreviated handshake. That needs Python 3.6 or
+    later (ssl.SSLSession), with older ones every connection does a full
+    handshake.
+
+    The session counts what it did, see HttpSession.stats():
+
+      requests      - requests sent
+      pool_hits     - requests sent over a connection that was already open
+      pool_misses   - requests that needed a new connection
+      tls_handshakes, tls_resumed - TLS handshakes and how many resumed a session
+
+    useSession() lets a module that calls requests.get() etc. (e.g. pywim's
+    thor client) go through a session, but only for the calls made inside
+    sessionScope(session) on the same thread. Anyone else calling the module,
+    like another plugin using pywim, still gets the plain requests module.
+
+"""
+
+class _Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {
+            "requests": 0,
+            "pool_misses": 0,
+            "tls_handshakes": 0,
+            "tls_resumed": 0
+        }
+
+    def add(self, name: str, value: int = 1):
+        with self._lock:
+            self._values[name] += value
+
+    def values(self) -> Dict[str, int]:
+        with self._lock:
+            values = dict(self._values)
+        values["pool_hits"] = max(0, values["requests"] - values["pool_misses"])
+        return values
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """ Offers the TLS session of the last connection to a host when connecting to it again """
+
+    @staticmethod
+    def supported() -> bool:
+        # SSLSession, wrap_socket(session=), SSLSocket.session and session_reused came with Python 3.6
+        return hasattr(ssl, "SSLSession") and hasattr(ssl, "PROTOCOL_TLS_CLIENT")
+
+    def __new__(cls, counters: _Counters = None):
+        return super().__new__(cls, ssl.PROTOCOL_TLS_CLIENT)
+
+    def __init__(self, counters: _Counters = None):
+        # The protocol was given to __new__, SSLContext has no __init__ of its own
+        super().__init__()
+
+        # The CA bundle requests verifies with (certifi's), the system's store may be
+        # missing or outdated, e.g. on Windows and macOS installs of Cura
+        self.load_verify_locations(requests.certs.where())
+
+        self._counters = counters
+        self._lock = threading.Lock()
+        self._sessions = {}
+
+    def wrap_socket(self, sock, *args, server_hostname=None, session=None, **kwargs):
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(server_hostname)
+
+        try:
+            ssl_sock = super().wrap_socket(sock, *args, server_hostname=server_hostname, session=session, **kwargs)
+        except ssl.SSLError:
+            if session is None:
+                raise
+            # The server didn't like the session, e.g. it was for another protocol version
+            ssl_sock = super().wrap_socket(sock, *args, server_hostname=server_hostname, **kwargs)
+
+        if self._counters:
+            self._counters.add("tls_handshakes")
+            if ssl_sock.session_reused:
+                self._counters.add("tls_resumed")
+
+        self.remember(ssl_sock)
+
+        return ssl_sock
+
+    def remember(self, ssl_sock: ssl.SSLSocket):
+        """ Keeps the socket's session for the next connection to its host """
+        session = ssl_sock.session
+        if session is not None:
+            with self._lock:
+                self._sessions[ssl_sock.server_hostname] = session
+
+
+def _defaultSSLContext() -> ssl.SSLContext:
+    """ Verifies like ResumingSSLContext, without resuming sessions """
+    return ssl.create_default_context(cafile=requests.certs.where())
+
+
+def _countingPool(pool_class, counters: _Counters, ssl_context: ssl.SSLContext):
+    class CountingPool(pool_class):
+        def _new_conn(self):
+            counters.add("pool_misses")
+            return super()._new_conn()
+
+        def _put_conn(self, conn):
+            # With TLS 1.3 the session ticket only arrives after the handshake,
+            # it has been read by the time the connection is given back
+            if isinstance(ssl_context, ResumingSSLContext) and isinstance(getattr(conn, "sock", None), ssl.SSLSocket):
+                ssl_context.remember(conn.sock)
+            super()._put_conn(conn)
+
+    return CountingPool
+
+
+class PoolingAdapter(requests.adapters.HTTPAdapter):
+    POOL_CONNECTIONS = 4 # hosts
+    POOL_MAXSIZE = 8 # connections per host, one per concurrent job thread or so
+
+    def __init__(self, counters: _Counters):
+        self._counters = counters
+        if ResumingSSLContext.supported():
+            self._ssl_context = ResumingSSLContext(counters)
+        else:
+            self._ssl_context = _defaultSSLContext()
+        super().__init__(pool_connections=self.POOL_CONNECTIONS, pool_maxsize=self.POOL_MAXSIZE)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = self._ssl_context
+        super().init_poolmanager(*args, **kwargs)
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _countingPool(urllib3.connectionpool.HTTPConnectionPool, self._counters, self._ssl_context),
+            "https": _countingPool(urllib3.connectionpool.HTTPSConnectionPool, self._counters, self._ssl_context),
+        }
+
+    def send(self, request, *args, **kwargs):
+        self._counters.add("requests")
+        return super().send(request, *args, **kwargs)
+
+
+class HttpSession(requests.Session):
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self):
+        super().__init__()
+
+        self._counters = _Counters()
+
+        adapter = PoolingAdapter(self._counters)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    @classmethod
+    def shared(cls) -> "HttpSession":
+        """ The session of the plugin, created on first use """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def stats(self) -> Dict[str, int]:
+        return self._counters.values()
+
+
+# The session sessionScope() set for the calls of each thread
+_scope = threading.local()
+
+
+class _SessionModule:
+    """
+    Looks like the requests module, but sends requests through the session of the calling
+    thread's sessionScope(), or through requests outside of one. The functions take their
+    arguments like the module's (requests.api), which differ from the session's methods in
+    the positional arguments after the URL.
+    """
+    def request(self, method, url, **kwargs):
+        session = getattr(_scope, "session", None)
+        if session is None:
+            return requests.request(method, url, **kwargs)
+        return session.request(method, url, **kwargs)
+
+    def get(self, url, params=None, **kwargs):
+        kwargs.setdefault("allow_redirects", True)
+        return self.request("GET", url, params=params, **kwargs)
+
+    def options(self, url, **kwargs):
+        kwargs.setdefault("allow_redirects", True)
+        return self.request("OPTIONS", url, **kwargs)
+
+    def head(self, url, **kwargs):
+        kwargs.setdefault("allow_redirects", False)
+        return self.request("HEAD", url, **kwargs)
+
+    def post(self, url, data=None, json=None, **kwargs):
+        return self.request("POST", url, data=data, json=json, **kwargs)
+
+    def put(self, url, data=None, **kwargs):
+        return self.request("PUT", url, data=data, **kwargs)
+
+    def patch(self, url, data=None, **kwargs):
+        return self.request("PATCH", url, data=data, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+    def __getattr__(self, name):
+        # Exceptions, status codes, etc.
+        return getattr(requests, name)
+
+
+def useSession(module) -> bool:
+    """
+    Makes module's requests.get(), requests.post() etc. go through the session of the
+    calling thread's sessionScope(), if module uses the requests module that way. Returns
+    whether it does.
+    """
+    current = getattr(module, "requests", None)
+    if isinstance(current, _SessionModule):
+        return True
+    if current is requests:
+        module.requests = _SessionModule()
+        return True
+    return False
+
+
+@contextlib.contextmanager
+def sessionScope(session: requests.Session):
+    """ The modules useSession() was given send their requests through session within this """
+    previous = getattr(_scope, "session", None)
+    _scope.session = session
+    try:
+        yield session
+    finally:
+        _scope.session = previous
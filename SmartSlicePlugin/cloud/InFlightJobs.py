@@ -0,0 +1,79 @@
+from typing import Any, Callable, List, Optional
+
+import threading
+
+"""
+  InFlightJobs
+
+    The jobs that are being submitted or solved, by job hash (see JobPackage),
+    so a job that is identical to one of them isn't uploaded and solved a second
+    time. The first job with a hash is the primary, identical jobs that come
+    while it is in flight follow it and get its outcome when it ends.
+
+    A primary that was canceled doesn't take new followers: joinable(primary)
+    decides, and a removed primary doesn't either. The next identical job then
+    becomes the primary for its hash, while the earlier primary keeps the
+    followers it already had until it is released.
+
+"""
+
+class InFlightJobs:
+    def __init__(self, joinable: Callable[[Any], bool] = None):
+        self.joinable = joinable
+
+        self._lock = threading.Lock()
+        self._primaries = {} # job hash -> the primary new identical jobs follow
+        self._followers = {} # primary -> its followers
+        self._following = {} # follower -> its primary
+
+    def attach(self, job_hash: str, job) -> Optional[Any]:
+        """
+        Registers job, returns the primary it follows if an identical job is in flight and
+        joinable, otherwise job becomes the primary and None is returned.
+        """
+        with self._lock:
+            primary = self._primaries.get(job_hash)
+            if primary is None or primary is job or (self.joinable and not self.joinable(primary)):
+                self._primaries[job_hash] = job
+                self._followers.setdefault(job, [])
+                return None
+
+            self._followers[primary].append(job)
+            self._following[job] = primary
+            return primary
+
+    def primary(self, job_hash: str) -> Optional[Any]:
+        """ The primary new identical jobs would follow """
+        with self._lock:
+            return self._primaries.get(job_hash)
+
+    def followers(self, primary) -> List[Any]:
+        with self._lock:
+            return list(self._followers.get(primary, []))
+
+    def detach(self, job) -> Optional[Any]:
+        """ job doesn't follow anymore, returns the primary it followed (None if it wasn't a follower) """
+        with self._lock:
+            primary = self._following.pop(job, None)
+            if primary is not None:
+                self._followers[primary].remove(job)
+            return primary
+
+    def remove(self, job_hash: str, primary) -> bool:
+        """ New identical jobs don't follow primary anymore, returns whether they did """
+        with self._lock:
+            if self._primaries.get(job_hash) is not primary:
+                return False
+            del self._primaries[job_hash]
+            return True
+
+    def release(self, job_hash: str, primary) -> List[Any]:
+        """ primary isn't in flight anymore, returns its followers """
+        with self._lock:
+            if self._primaries.get(job_hash) is primary:
+                del self._primaries[job_hash]
+
+            followers = self._followers.pop(primary, [])
+            for follower in followers:
+                self._following.pop(follower, None)
+            return followers
@@ -0,0 +1,137 @@
+from typing import Dict, List, Optional
+
+import hashlib
+import io
+import json
+import tempfile
+
+import numpy
+
+from . import ThreeMF
+from .Compression import ArchiveCompression
+
+"""
+  JobPackage
+
+    The contents of a Smart Slice submission: the mesh objects, the 3MF model
+    metadata and the job JSON. Nothing is serialized up front - the package is
+    written either as one complete 3MF, or split into a geometry-only 3MF and the
+    job, whichever the upload path needs.
+
+    The geometry hash covers everything that ends up in the geometry 3MF (names,
+    vertices, triangles, transformations, per object settings and the model
+    metadata) but not the job, so changing a load or a requirement leaves it
+    unchanged. Neither does the compression, which only changes how the package is
+    written. Metadata that changes with every package, like the creation date, is
+    left out of the geometry 3MF, so the same hash is always written to the same
+    bytes and an interrupted upload resumes on the stream it started.
+
+    The job hash covers the job as well: the geometry hash and the job JSON in a
+    canonical form (sorted keys, no whitespace), so it is the same for two
+    packages that would be solved the same way.
+
+"""
+
+class JobPackage:
+    JOB_PATH = "SmartSlice/job.json"
+    SPOOL_SIZE = 64 * 1024 ** 2 # bytes
+
+    # Model metadata that differs between otherwise identical packages, only in the complete 3MF
+    VOLATILE_METADATA = ("CreationDate", "ModificationDate")
+
+    def __init__(self, objects: List[ThreeMF.ThreeMFObject], job_json: str, metadata: Optional[Dict[str, str]] = None):
+        self.objects = objects
+        self.job_json = job_json
+        self.metadata = metadata or {}
+        self.compression = ArchiveCompression()
+
+        self._geometry_hash = None
+        self._job_hash = None
+
+    @property
+    def geometry_hash(self) -> str:
+        if self._geometry_hash is None:
+            hasher = hashlib.sha256()
+
+            for threemf_object in self.objects:
+                hasher.update(threemf_object.name.encode())
+                for array in (threemf_object.vertices, threemf_object.indices, threemf_object.transform):
+                    array = numpy.ascontiguousarray(array)
+                    hasher.update("{}{}".format(array.dtype.str, array.shape).encode())
+                    hasher.update(array.view(numpy.uint8))
+                for key, value in sorted(threemf_object.metadata.items()):
+                    hasher.update("{}={};".format(key, value).encode())
+
+            for key, value in sorted(self.geometryMetadata().items()):
+                hasher.update("{}={};".format(key, value).encode())
+
+            self._geometry_hash = hasher.hexdigest()
+
+        return self._geometry_hash
+
+    @property
+    def job_hash(self) -> str:
+        if self._job_hash is None:
+            try:
+                job = json.dumps(json.loads(self.job_json), sort_keys=True, separators=(",", ":"))
+            except ValueError:
+                job = self.job_json
+
+            hasher = hashlib.sha256()
+            hasher.update(self.geometry_hash.encode())
+            hasher.update(job.encode())
+
+            self._job_hash = hasher.hexdigest()
+
+        return self._job_hash
+
+    def geometryMetadata(self) -> Dict[str, str]:
+        """ The model metadata of the geometry 3MF, without the volatile entries """
+        return {key: value for key, value in self.metadata.items() if key not in self.VOLATILE_METADATA}
+
+    def write(self, threemf_file, include_job: bool = True):
+        """
+        Writes the package to a path or binary stream. include_job=False writes the
+        geometry 3MF, without the job and the volatile metadata.
+        """
+        if include_job:
+            metadata = self.metadata
+            entries = {self.JOB_PATH: self.job_json}
+        else:
+            metadata = self.geometryMetadata()
+            entries = None
+
+        ThreeMF.write3mf(
+            threemf_file, self.objects, metadata, entries,
+            self.compression.method, self.compression.level, self.compression.threads
+        )
+
+    def sample(self, size: int) -> bytes:
+        """ The first size bytes of the model XML, uncompressed """
+        chunks = []
+        sampled = 0
+        for chunk in ThreeMF.modelChunks(self.objects, self.geometryMetadata()):
+            chunks.append(chunk)
+            sampled += len(chunk)
+            if sampled >= size:
+                break
+        return b"".join(chunks)[:size]
+
+    def threemf(self, include_job: bool = True) -> bytes:
+        buffer = io.BytesIO()
+        self.write(buffer, include_job)
+        return buffer.getvalue()
+
+    def geometryThreemf(self) -> bytes:
+        """ The 3MF with only the meshes, what is stored under geometry_hash """
+        return self.threemf(include_job=False)
+
+    def spool(self, include_job: bool = True) -> tempfile.SpooledTemporaryFile:
+        """
+        The 3MF in a file object positioned at the start, which stays in memory
+        up to SPOOL_SIZE bytes and moves to a temporary file beyond that
+        """
+        spooled = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_SIZE)
+        self.write(spooled, include_job)
+        spooled.seek(0)
+        return spooled
@@ -0,0 +1,233 @@
+from typing import Any, Callable, List, Optional
+
+import itertools
+import threading
+import time
+
+from enum import Enum
+
+"""
+  JobScheduler
+
+    Decides when the Smart Slice jobs the user asked for are submitted. At most
+    max_in_flight jobs are submitted and not yet ended at a time, the others
+    wait until a slot is free. Waiting jobs go in order of priority (lower
+    first, validations before optimizations) and then in the order they were
+    added.
+
+    The API limits how many jobs a user may have in its queue. A job the API
+    refused for that reason is held: it goes back to waiting, and no job is
+    submitted until one of ours ends or HOLD_DELAY passes. The delay doubles
+    with every refusal in a row, up to MAX_HOLD_DELAY.
+
+    A job that is identical to one in flight is attached to it and ends with
+    it, it doesn't take a slot of its own.
+
+    Every job has a JobState. Jobs are forgotten once they ended, state()
+    then returns None. Every submission of a job is an attempt with its own
+    number, so the end of an attempt that is reported late (e.g. on another
+    thread) can't finish the job once it was submitted again.
+
+"""
+
+class JobState(Enum):
+    pending = "pending" # waiting for a slot
+    held = "held" # refused because the API's queue was full, waiting to be submitted again
+    submitting = "submitting"
+    watching = "watching" # submitted, the API is working on it
+    attached = "attached" # follows an identical job that is in flight
+    finished = "finished"
+    failed = "failed"
+    canceled = "canceled"
+
+    @staticmethod
+    def waiting():
+        return JobState.pending, JobState.held
+
+    @staticmethod
+    def inFlight():
+        return JobState.submitting, JobState.watching
+
+    @staticmethod
+    def ended():
+        return JobState.finished, JobState.failed, JobState.canceled
+
+
+class ScheduledJob:
+    def __init__(self, job, priority: int, sequence: int):
+        self.job = job
+        self.priority = priority
+        self.sequence = sequence
+        self.state = JobState.pending
+        self.attempt = 0 # the number of the latest submission
+
+
+class JobScheduler:
+    MAX_IN_FLIGHT = 2
+    HOLD_DELAY = 30. # seconds
+    MAX_HOLD_DELAY = 300.
+
+    def __init__(
+        self, start: Callable[[Any], None], max_in_flight: int = MAX_IN_FLIGHT,
+        on_state_changed: Callable[[Any, JobState], None] = None
+    ):
+        """
+        start(job) submits a job, it is called outside of the scheduler's lock and on the
+        thread that freed the slot. on_state_changed(job, state) reports every new state.
+        """
+        self.start = start
+        self.max_in_flight = max_in_flight
+        self.on_state_changed = on_state_changed
+
+        self._lock = threading.RLock()
+        self._jobs = [] # type: List[ScheduledJob]
+        self._sequence = itertools.count()
+
+        self._held_until = None
+        self._hold_delay = self.HOLD_DELAY
+        self._timer = None
+
+    def add(self, job, priority: int = 0):
+        """ Submits job as soon as a slot is free """
+        with self._lock:
+            self._jobs.append(ScheduledJob(job, priority, next(self._sequence)))
+
+        if not self._dispatch():
+            self._notify([(job, JobState.pending)])
+
+    def state(self, job) -> Optional[JobState]:
+        with self._lock:
+            scheduled = self._find(job)
+            return scheduled.state if scheduled else None
+
+    def jobs(self, *states: JobState) -> List[Any]:
+        """ The jobs that are in any of states (all jobs without states), in the order they are submitted """
+        with self._lock:
+            return [
+                scheduled.job for scheduled in sorted(self._jobs, key=self._order)
+                if not states or scheduled.state in states
+            ]
+
+    def attempt(self, job) -> Optional[int]:
+        """ The number of job's latest submission, None if the scheduler doesn't have job """
+        with self._lock:
+            scheduled = self._find(job)
+            return scheduled.attempt if scheduled else None
+
+    @property
+    def inFlight(self) -> int:
+        with self._lock:
+            return self._inFlight()
+
+    def submitted(self, job):
+        """ The API accepted job """
+        with self._lock:
+            self._hold_delay = self.HOLD_DELAY
+            changed = self._setState(job, JobState.watching)
+        self._notify(changed)
+
+    def attach(self, job):
+        """ job follows an identical job in flight, its slot is free """
+        with self._lock:
+            changed = self._setState(job, JobState.attached)
+        self._notify(changed)
+        self._dispatch()
+
+    def requeue(self, job):
+        """ job waits for a slot again, e.g. the job it followed wasn't submitted after all """
+        with self._lock:
+            changed = self._setState(job, JobState.pending)
+        self._notify(changed)
+        self._dispatch()
+
+    def hold(self, job):
+        """ The API refused job because the user's queue is full """
+        with self._lock:
+            changed = self._setState(job, JobState.held)
+            if changed:
+                self._held_until = time.monotonic() + self._hold_delay
+                self._startTimer(self._hold_delay)
+                self._hold_delay = min(2. * self._hold_delay, self.MAX_HOLD_DELAY)
+        self._notify(changed)
+
+    def finish(self, job, state: JobState = JobState.finished, attempt: Optional[int] = None) -> bool:
+        """
+        job ended with state, its slot is free. With attempt, only if that submission is
+        still in flight, i.e. it didn't hand job on (held, attached or submitted) and job
+        wasn't submitted again since. Returns whether job was finished.
+        """
+        with self._lock:
+            scheduled = self._find(job)
+            if scheduled is None:
+                return False
+            if attempt is not None and (scheduled.attempt != attempt or scheduled.state is not JobState.submitting):
+                return False
+
+            freed = scheduled.state in JobState.inFlight()
+            self._jobs.remove(scheduled)
+
+            if freed:
+                # The API's queue has room now as well
+                self._held_until = None
+
+        self._notify([(job, state)])
+        self._dispatch()
+        return True
+
+    def cancel(self, job):
+        self.finish(job, JobState.canceled)
+
+    def _dispatch(self) -> bool:
+        """ Starts waiting jobs while there are free slots, returns whether one of them was started """
+        with self._lock:
+            if self._held_until is not None and time.monotonic() < self._held_until:
+                return False
+            self._held_until = None
+
+            waiting = sorted(
+                (scheduled for scheduled in self._jobs if scheduled.state in JobState.waiting()),
+                key=self._order
+            )
+            starting = waiting[:max(0, self.max_in_flight - self._inFlight())]
+            for scheduled in starting:
+                scheduled.state = JobState.submitting
+                scheduled.attempt += 1
+
+        self._notify([(scheduled.job, JobState.submitting) for scheduled in starting])
+
+        for scheduled in starting:
+            self.start(scheduled.job)
+
+        return len(starting) > 0
+
+    def _startTimer(self, delay: float):
+        if self._timer:
+            self._timer.cancel()
+        self._timer = threading.Timer(delay, self._dispatch)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _setState(self, job, state: JobState) -> list:
+        scheduled = self._find(job)
+        if scheduled is None or scheduled.state is state:
+            return []
+        scheduled.state = state
+        return [(job, state)]
+
+    def _find(self, job) -> Optional[ScheduledJob]:
+        for scheduled in self._jobs:
+            if scheduled.job is job:
+                return scheduled
+        return None
+
+    def _inFlight(self) -> int:
+        return sum(1 for scheduled in self._jobs if scheduled.state in JobState.inFlight())
+
+    @staticmethod
+    def _order(scheduled: ScheduledJob):
+        return scheduled.priority, scheduled.sequence
+
+    def _notify(self, changes: list):
+        if self.on_state_changed:
+            for job, state in changes:
+                self.on_state_changed(job, state)
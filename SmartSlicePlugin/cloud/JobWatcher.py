@@ -0,0 +1,307 @@
+from typing import Any, Callable, List, Optional, Tuple
+
+import threading
+import time
+
+import requests
+
+from .GeometryUpload import GeometryUploadError
+
+"""
+  JobWatcher
+
+    Follows submitted Smart Slice jobs until they end, all of them on one long
+    lived thread, so the threads that submitted the jobs are free as soon as
+    the upload is done. The thread sends one request at a time, to the job
+    whose turn is next. Servers that advertise "job_long_poll" in their
+    capabilities hold a status request until the job's status or progress
+    changes (or a timeout passes), so updates arrive as they happen:
+
+      GET /smartslice/<id>/wait?timeout=<s>&status=<status>&progress=<progress>
+
+    The jobs take turns, each may be held for LONG_POLL_TIMEOUT divided by the
+    number of jobs. Other servers are polled with intervals that suit the job's
+    state: short while it runs, long while it waits in the queue, and growing
+    while nothing changes. Only updates that differ from the previous status
+    are reported. The results are fetched once, after the job finished.
+
+    A request that fails with one of the transient codes (e.g. the connection
+    dropped) doesn't end the job. The job backs off instead, from FAILURE_DELAY
+    doubling up to MAX_FAILURE_DELAY, while the other jobs keep their turns, and
+    ends after MAX_FAILURES failures in a row. The fetch and long_poll calls need
+    to give up on their own after a while (a deadline), as one request at a time
+    is sent for all jobs.
+
+    The thread ends when there has been nothing to watch for IDLE_TIMEOUT
+    seconds, and is started again by the next job.
+
+"""
+
+class WatchedJob:
+    def __init__(self, job, on_update, on_done, should_stop):
+        self.job = job
+        self.on_update = on_update
+        self.on_done = on_done
+        self.should_stop = should_stop
+
+        self.interval = None # seconds between polls, None for the first
+        self.due = time.monotonic() # when the next request is sent
+        self.failures = 0 # transient failures in a row
+
+
+class JobWatcher:
+    RUNNING_INTERVAL = 1. # seconds
+    MAX_RUNNING_INTERVAL = 5.
+    QUEUED_INTERVAL = 5.
+    MAX_QUEUED_INTERVAL = 30.
+    BACKOFF = 1.5 # interval growth per poll without a change
+
+    LONG_POLL_TIMEOUT = 25. # seconds the server may hold a request
+    MIN_LONG_POLL_TIMEOUT = 2.
+
+    FAILURE_DELAY = 2. # seconds before a job is asked for again after a transient failure
+    MAX_FAILURE_DELAY = 30.
+    MAX_FAILURES = 8
+
+    STOP_CHECK = 0.25 # seconds between checks of should_stop while waiting
+    IDLE_TIMEOUT = 60. # seconds the thread waits for new jobs before it ends
+
+    TERMINAL = ("finished", "failed", "crashed", "aborted")
+    QUEUED = ("idle", "queued")
+
+    def __init__(
+        self, fetch: Callable[[str, bool], Tuple[int, Any]],
+        long_poll: Callable[[str, Any, float], Tuple[int, Any]] = None,
+        log: Callable[[str], None] = None, transient_codes: tuple = ()
+    ):
+        """
+        fetch(job_id, include_results) and long_poll(job_id, last_job, timeout) return the
+        (code, job) of an API call. Without long_poll the jobs are polled with fetch.
+        transient_codes are the codes of failed calls that are tried again later.
+        """
+        self.fetch = fetch
+        self.long_poll = long_poll
+        self.log = log
+        self.transient_codes = transient_codes
+
+        self._condition = threading.Condition()
+        self._jobs = [] # type: List[WatchedJob]
+        self._thread = None
+
+    @staticmethod
+    def statusName(job) -> str:
+        status = getattr(job, "status", None)
+        return getattr(status, "name", str(status))
+
+    @classmethod
+    def isDone(cls, job) -> bool:
+        return cls.statusName(job) in cls.TERMINAL
+
+    @property
+    def watching(self) -> int:
+        """ The number of jobs being watched """
+        with self._condition:
+            return len(self._jobs)
+
+    def add(
+        self, job, on_update: Callable[[Any], None] = None,
+        on_done: Callable[[Optional[int], Any], None] = None, should_stop: Callable[[], bool] = None
+    ):
+        """
+        Watches job until it ends and returns right away. on_update(job) is called with
+        every new status, on_done(code, job) once with the final job, including the results
+        if it finished, or with the code of a failed request, or with (None, job) when
+        should_stop returned True or watching it failed. Both are called on the watcher's
+        thread.
+        """
+        watched = WatchedJob(job, on_update, on_done, should_stop)
+        if not self.long_poll and not self.isDone(job):
+            self._schedule(watched, time.monotonic())
+
+        with self._condition:
+            self._jobs.append(watched)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                idle_since = time.monotonic()
+                while not self._jobs:
+                    remaining = idle_since + self.IDLE_TIMEOUT - time.monotonic()
+                    if remaining <= 0.:
+                        self._thread = None
+                        return
+                    self._condition.wait(remaining)
+
+                stopped = [watched for watched in self._jobs if watched.should_stop and watched.should_stop()]
+                for watched in stopped:
+                    self._jobs.remove(watched)
+
+                watched = min(self._jobs, key=lambda watched: watched.due) if self._jobs else None
+                if watched:
+                    wait = watched.due - time.monotonic()
+                    if wait > 0.:
+                        watched = None
+                        self._condition.wait(min(wait, self.STOP_CHECK))
+
+                watching = len(self._jobs)
+
+            for stopped_job in stopped:
+                self._done(stopped_job, None)
+
+            if watched:
+                try:
+                    self._step(watched, watching)
+                except Exception as error:
+                    # Not the end of the other jobs
+                    self._log("An error has occured watching job {}: {}".format(getattr(watched.job, "id", None), error))
+                    if self._remove(watched):
+                        self._finish(watched, None, watched.job)
+
+    def _step(self, watched: WatchedJob, watching: int):
+        """ Sends the next request for watched """
+        previous = watched.job
+        code = 200
+
+        if not self.isDone(previous):
+            started = time.monotonic()
+
+            if self.long_poll:
+                timeout = max(self.MIN_LONG_POLL_TIMEOUT, self.LONG_POLL_TIMEOUT / watching)
+                code, job = self.long_poll(previous.id, previous, timeout)
+            else:
+                code, job = self.fetch(previous.id, False)
+
+            if code != 200:
+                if not self._backOff(watched, code):
+                    self._done(watched, code, job)
+                return
+
+            watched.failures = 0
+            watched.job = job
+
+            changed = self._changed(previous, job)
+            if changed:
+                watched.interval = None
+                if watched.on_update:
+                    watched.on_update(job)
+
+            if not self.long_poll:
+                self._schedule(watched, time.monotonic())
+            elif changed:
+                # The other jobs' turn first
+                watched.due = time.monotonic()
+            else:
+                # Don't spin on a server that answers right away without a change
+                watched.due = max(time.monotonic(), started + self.RUNNING_INTERVAL)
+
+        job = watched.job
+        if self.isDone(job):
+            if self.statusName(job) == "finished" and getattr(job, "result", None) is None:
+                code, job = self.fetch(job.id, True)
+                if code != 200 and self._backOff(watched, code):
+                    return
+            self._done(watched, code, job)
+
+    def _backOff(self, watched: WatchedJob, code: int) -> bool:
+        """ Whether watched is asked for again later after the request failed with code """
+        if code not in self.transient_codes or watched.failures >= self.MAX_FAILURES:
+            return False
+
+        delay = min(self.FAILURE_DELAY * 2 ** watched.failures, self.MAX_FAILURE_DELAY)
+        watched.failures += 1
+        watched.due = time.monotonic() + delay
+
+        self._log("Watching job {} failed ({}), asking again in {:.1f} s".format(
+            getattr(watched.job, "id", None), code, delay
+        ))
+        return True
+
+    def _schedule(self, watched: WatchedJob, now: float):
+        watched.interval = self._interval(watched.job, watched.interval)
+        watched.due = now + watched.interval
+
+    def _interval(self, job, interval: Optional[float]) -> float:
+        if self.statusName(job) in self.QUEUED:
+            first, longest = self.QUEUED_INTERVAL, self.MAX_QUEUED_INTERVAL
+        else:
+            first, longest = self.RUNNING_INTERVAL, self.MAX_RUNNING_INTERVAL
+
+        if interval is None:
+            return first
+        return min(max(first, interval * self.BACKOFF), longest)
+
+    def _done(self, watched: WatchedJob, code: Optional[int], job=None):
+        self._remove(watched)
+        self._finish(watched, code, watched.job if job is None else job)
+
+    def _finish(self, watched: WatchedJob, code: Optional[int], job):
+        if watched.on_done:
+            try:
+                watched.on_done(code, job)
+            except Exception as error:
+                self._log("An error has occured handling the end of job {}: {}".format(getattr(job, "id", None), error))
+
+    def _remove(self, watched: WatchedJob) -> bool:
+        """ Stops watching, False if it wasn't watched anymore """
+        with self._condition:
+            if watched in self._jobs:
+                self._jobs.remove(watched)
+                return True
+        return False
+
+    def _log(self, message: str):
+        if self.log:
+            self.log(message)
+
+    @classmethod
+    def _changed(cls, previous, job) -> bool:
+        return cls.statusName(previous) != cls.statusName(job) or \
+            getattr(previous, "progress", None) != getattr(job, "progress", None)
+
+
+class JobLongPoll:
+    """ The long polling status request, for servers with the job_long_poll capability """
+
+    ENDPOINT = "/smartslice/{}/wait"
+
+    def __init__(self, client: "pywim.http.thor.Client", job_info_type=None, session=requests):
+        self._client = client
+        self._job_info_type = job_info_type
+        self._session = session
+
+    def __call__(self, job_id: str, job, timeout: float) -> Tuple[int, Any]:
+        headers = {}
+        token = self._client.get_token()
+        if token:
+            headers["Authorization"] = "Bearer {}".format(token)
+
+        response = self._session.get(
+            self._client.address + self.ENDPOINT.format(job_id),
+            params={
+                "timeout": int(timeout),
+                "status": JobWatcher.statusName(job),
+                "progress": getattr(job, "progress", 0)
+            },
+            headers=headers,
+            # Time for the server to answer on top of how long it may wait
+            timeout=timeout + 30.
+        )
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+
+        if not isinstance(data, dict):
+            data = {}
+
+        if response.status_code != 200:
+            return response.status_code, GeometryUploadError(data.get("error", "HTTP {}".format(response.status_code)))
+
+        if self._job_info_type is None:
+            return response.status_code, data
+        return response.status_code, self._job_info_type.from_dict(data)
@@ -0,0 +1,213 @@
+from typing import Any, Callable, Optional
+
+import collections
+import json
+import os
+import threading
+import time
+
+"""
+  ResultCache
+
+    The results of recent Smart Slice jobs, so submitting a job again without
+    changes (validating again after a stage switch, a workspace reload or a
+    cancel) gives the result right away instead of another cloud run. Results
+    are kept under the package's job hash, which covers the job JSON and the
+    geometry.
+
+    Results are stored serialized, as the JSON of their to_dict(), so a result
+    that is changed after it was stored or taken out doesn't change the stored
+    one. The least recently used results make room once there are more than
+    max_entries or they take more than max_bytes, and results older than
+    max_age are not given out anymore (the solver may have changed since).
+
+    With a store (anything with the get / put / remove / clear / keys interface
+    of utils.DiskCache) every result is written to disk as well, so results
+    outlive the application and the ones that made room in memory can still be
+    given out. The store bounds its own size.
+
+"""
+
+class ResultCache:
+    MAX_ENTRIES = 32
+    MAX_BYTES = 64 * 1024 ** 2
+    MAX_AGE = 12 * 60. * 60. # seconds
+
+    RESULT_FILE = "result.json"
+    ENTRY_FILE = "entry.json"
+
+    class Entry:
+        def __init__(self, data: bytes, geometry_hash: Optional[str], age: float = 0.):
+            self.data = data
+            self.geometry_hash = geometry_hash
+            self.stored = time.monotonic() - age
+
+    def __init__(
+        self, from_dict: Callable[[dict], Any] = None, max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES, max_age: float = MAX_AGE, store: 'DiskCache' = None
+    ):
+        """ from_dict makes a result from its dictionary, without it get() returns the dictionary """
+        self.from_dict = from_dict
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.store = store
+
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict() # least recently used first
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """ Bytes taken by the stored results """
+        with self._lock:
+            return self._bytes
+
+    def get(self, job_hash: str):
+        """ A copy of the result stored for job_hash, None if there is none """
+        with self._lock:
+            entry = self._entries.get(job_hash)
+            if entry and time.monotonic() - entry.stored > self.max_age:
+                self._remove(job_hash)
+                entry = None
+
+            if entry is not None:
+                self._entries.move_to_end(job_hash)
+                self.hits += 1
+
+        if entry is None:
+            entry = self._load(job_hash)
+
+            with self._lock:
+                if entry is None:
+                    self.misses += 1
+                    return None
+
+                self.hits += 1
+                if job_hash not in self._entries:
+                    self._add(job_hash, entry)
+
+        result = json.loads(entry.data.decode())
+        return self.from_dict(result) if self.from_dict else result
+
+    def put(self, job_hash: str, result, geometry_hash: str = None) -> bool:
+        """
+        Stores result (something with to_dict(), or a dictionary) for job_hash. Returns
+        False if it is larger than max_bytes by itself, and isn't stored.
+        """
+        result = result.to_dict() if hasattr(result, "to_dict") else result
+        data = json.dumps(result, separators=(",", ":")).encode()
+
+        with self._lock:
+            self._remove(job_hash)
+
+            if len(data) > self.max_bytes:
+                return False
+
+            self._add(job_hash, ResultCache.Entry(data, geometry_hash))
+
+        self._save(job_hash, data, geometry_hash)
+
+        return True
+
+    def invalidate(self, job_hash: str) -> bool:
+        """ Forgets the result of job_hash, returns whether there was one """
+        with self._lock:
+            removed = self._remove(job_hash)
+
+        if self.store and self.store.remove(job_hash):
+            removed = True
+
+        return removed
+
+    def invalidateGeometry(self, geometry_hash: str) -> int:
+        """ Forgets the results of all jobs on geometry_hash, returns how many there were """
+        with self._lock:
+            job_hashes = set(
+                job_hash for job_hash, entry in self._entries.items() if entry.geometry_hash == geometry_hash
+            )
+            for job_hash in job_hashes:
+                self._remove(job_hash)
+
+        if self.store:
+            for job_hash in self.store.keys():
+                entry = self._load(job_hash)
+                if entry and entry.geometry_hash == geometry_hash:
+                    self.store.remove(job_hash)
+                    job_hashes.add(job_hash)
+
+        return len(job_hashes)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+        if self.store:
+            self.store.clear()
+
+    def _add(self, job_hash: str, entry: 'ResultCache.Entry'):
+        self._entries[job_hash] = entry
+        self._bytes += len(entry.data)
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _save(self, job_hash: str, data: bytes, geometry_hash: Optional[str]):
+        if not self.store:
+            return
+
+        def write(path):
+            with open(os.path.join(path, self.RESULT_FILE), "wb") as f:
+                f.write(data)
+            with open(os.path.join(path, self.ENTRY_FILE), "w") as f:
+                json.dump({"geometry_hash": geometry_hash, "stored": time.time()}, f)
+
+        # An older result for the same job is replaced
+        try:
+            self.store.remove(job_hash)
+            self.store.put(job_hash, write)
+        except (IOError, OSError):
+            pass
+
+    def _load(self, job_hash: str) -> Optional['ResultCache.Entry']:
+        """ The entry for job_hash in the store, None if there is none or it's too old """
+        if not self.store:
+            return None
+
+        path = self.store.get(job_hash)
+        if path is None:
+            return None
+
+        try:
+            with open(os.path.join(path, self.ENTRY_FILE)) as f:
+                info = json.load(f)
+            with open(os.path.join(path, self.RESULT_FILE), "rb") as f:
+                data = f.read()
+
+            age = max(0., time.time() - float(info["stored"]))
+            geometry_hash = info.get("geometry_hash")
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            # Incomplete or corrupt
+            self.store.remove(job_hash)
+            return None
+
+        if age > self.max_age or len(data) > self.max_bytes:
+            self.store.remove(job_hash)
+            return None
+
+        return ResultCache.Entry(data, geometry_hash, age)
+
+    def _remove(self, job_hash: str) -> bool:
+        entry = self._entries.pop(job_hash, None)
+        if entry is None:
+            return False
+        self._bytes -= len(entry.data)
+        return True
@@ -0,0 +1,176 @@
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import zipfile
+import zlib
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy
+
+from .Compression import ParallelDeflate
+from .ZipStream import ZIP32_LIMIT, ZipStream
+
+"""
+  ThreeMF
+
+    Minimal 3MF writer for Smart Slice submissions. The model XML is generated
+    straight from the vertex / index arrays, a block of rows per string format
+    call, and streamed into the zip entry (see ZipStream), so no XML document of
+    the whole mesh is ever built. The package layout, the metadata and the number
+    formatting follow what Cura's 3MFWriter (Savitar) produces, so the backend and
+    SmartSliceJobHandler.extractSmartSliceJobFrom3MF read both the same way.
+
+"""
+
+MODEL_PATH = "3D/3dmodel.model"
+CONTENT_TYPES_PATH = "[Content_Types].xml"
+RELS_PATH = "_rels/.rels"
+
+# Every entry gets the same timestamp, so the bytes only depend on what is written: the
+# same objects, metadata and compression give the same package (see JobPackage for what
+# the geometry 3MF leaves out to keep that true per geometry hash)
+ENTRY_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+MODEL_NAMESPACE = "http://schemas.microsoft.com/3dmanufacturing/core/2015/02"
+CURA_NAMESPACE = "http://software.ultimaker.com/xml/cura/3mf/2015/10"
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml" />'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml" />'
+    '</Types>'
+)
+
+RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Target="/' + MODEL_PATH + '" Id="rel0" '
+    'Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel" />'
+    '</Relationships>'
+)
+
+# Rows formatted per call, bounds the size of the temporary strings
+ROWS_PER_CHUNK = 16384
+
+_VERTEX_FORMAT = '<vertex x="%.9g" y="%.9g" z="%.9g" />'
+_TRIANGLE_FORMAT = '<triangle v1="%d" v2="%d" v3="%d" />'
+
+
+class ThreeMFObject:
+    """
+    A mesh object of the 3MF build:
+
+      name      - object name
+      vertices  - (N, 3) vertex positions
+      indices   - (M, 3) vertex indices of the triangles, None for an unindexed
+                  vertex buffer where every 3 vertices make up a triangle
+      transform - (4, 4) transformation of the build item
+      metadata  - per object metadata, e.g. cura:infill_mesh -> True
+    """
+
+    def __init__(
+        self, name: str, vertices: numpy.ndarray, indices: Optional[numpy.ndarray] = None,
+        transform: Optional[numpy.ndarray] = None, metadata: Optional[Dict[str, str]] = None
+    ):
+        self.name = name
+        self.vertices = numpy.asarray(vertices, dtype=numpy.float32).reshape(-1, 3)
+
+        if indices is None:
+            triangle_count = len(self.vertices) // 3
+            self.indices = numpy.arange(triangle_count * 3, dtype=numpy.int32).reshape(-1, 3)
+        else:
+            self.indices = numpy.asarray(indices, dtype=numpy.int32).reshape(-1, 3)
+
+        self.transform = numpy.identity(4) if transform is None else numpy.asarray(transform, dtype=numpy.float64)
+        self.metadata = metadata or {}
+
+
+def write3mf(
+    threemf_file, objects: List[ThreeMFObject], metadata: Optional[Dict[str, str]] = None,
+    entries: Optional[Dict[str, bytes]] = None, compression: int = zipfile.ZIP_DEFLATED,
+    level: Optional[int] = None, threads: int = 1
+):
+    """
+    Writes the objects as a 3MF package to threemf_file (a path or a binary stream).
+    metadata is stored on the model, entries are any additional files of the package,
+    e.g. {'SmartSlice/job.json': ...}. level is the deflate level, threads > 1 deflates
+    the model entry on that many threads.
+    """
+    level = -1 if level is None else level
+
+    def compressor(entry_threads: int = 1):
+        if compression == zipfile.ZIP_STORED:
+            return None
+        elif entry_threads > 1:
+            return ParallelDeflate(level, entry_threads)
+        return zlib.compressobj(level, zlib.DEFLATED, -15)
+
+    with ZipStream(threemf_file, ENTRY_DATE_TIME) as archive:
+        archive.writestr(CONTENT_TYPES_PATH, CONTENT_TYPES, compressor())
+        archive.writestr(RELS_PATH, RELS, compressor())
+
+        # Upper bound of the formatted size, to know whether the entry needs zip64
+        model_size = sum(80 * len(o.vertices) + 64 * len(o.indices) for o in objects) + 65536
+
+        archive.write(MODEL_PATH, modelChunks(objects, metadata), compressor(threads), model_size > ZIP32_LIMIT)
+
+        for name, data in (entries or {}).items():
+            archive.writestr(name, data, compressor())
+
+
+def modelChunks(objects: List[ThreeMFObject], metadata: Optional[Dict[str, str]] = None) -> Iterator[bytes]:
+    """ The 3D/3dmodel.model document, as a sequence of encoded chunks """
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<model unit="millimeter" xml:lang="en-US" xmlns="{}" xmlns:cura="{}">'.format(MODEL_NAMESPACE, CURA_NAMESPACE)
+    ).encode()
+
+    for key, value in sorted((metadata or {}).items()):
+        yield '<metadata name={}>{}</metadata>'.format(quoteattr(key), escape(str(value))).encode()
+
+    yield b'<resources>'
+
+    for object_id, threemf_object in enumerate(objects, 1):
+        yield '<object id="{}" name={} type="model"><mesh><vertices>'.format(
+            object_id, quoteattr(threemf_object.name)
+        ).encode()
+
+        yield from formatRows(_VERTEX_FORMAT, threemf_object.vertices)
+
+        yield b'</vertices><triangles>'
+
+        yield from formatRows(_TRIANGLE_FORMAT, threemf_object.indices)
+
+        yield b'</triangles></mesh>'
+
+        if threemf_object.metadata:
+            yield b'<metadatagroup>'
+            for key, value in sorted(threemf_object.metadata.items()):
+                yield '<metadata name={} preserve="true" type="xs:string">{}</metadata>'.format(
+                    quoteattr(key), escape(str(value))
+                ).encode()
+            yield b'</metadatagroup>'
+
+        yield b'</object>'
+
+    yield b'</resources><build>'
+
+    for object_id, threemf_object in enumerate(objects, 1):
+        yield '<item objectid="{}" transform="{}" />'.format(
+            object_id, transformString(threemf_object.transform)
+        ).encode()
+
+    yield b'</build></model>'
+
+
+def formatRows(row_format: str, rows: numpy.ndarray) -> Iterator[bytes]:
+    """ Formats every row of rows with row_format, one string format call per chunk of rows """
+    for start in range(0, len(rows), ROWS_PER_CHUNK):
+        chunk = rows[start:start + ROWS_PER_CHUNK]
+        yield ((row_format * len(chunk)) % tuple(chunk.ravel().tolist())).encode()
+
+
+def transformString(transform: numpy.ndarray) -> str:
+    """ The 3MF (column major 3x4) form of a 4x4 transformation matrix """
+    transform = numpy.asarray(transform, dtype=numpy.float64)
+    return " ".join(repr(float(value)) for value in transform[:3, :].T.ravel())
@@ -0,0 +1,206 @@
+from typing import Iterable, Tuple
+
+import struct
+import zipfile
+import zlib
+
+"""
+  ZipStream
+
+    Writes a zip archive front to back, without seeking, from entries that are
+    compressed as their data is generated. Entries are written with a data
+    descriptor (the CRC and the sizes follow the data) and the central
+    directory comes last, the layout zipfile writes to unseekable streams.
+
+    Each entry takes its own compressor, anything with compress() and flush()
+    that produces a raw deflate stream, e.g. zlib.compressobj(level, DEFLATED,
+    -15) or a ParallelDeflate, or None to store the entry. zipfile only streams
+    entries at the archive's level and through its own compressor, so the
+    submission 3MF is written with this instead.
+
+    Every entry gets the same modification time, so the bytes only depend on the
+    entries' names, data and compression.
+
+"""
+
+ZIP32_LIMIT = 0xFFFFFFFF
+ZIP32_MAX_ENTRIES = 0xFFFF
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_DATA_DESCRIPTOR = struct.Struct("<IIII")
+_DATA_DESCRIPTOR64 = struct.Struct("<IIQQ")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_OF_CENTRAL_DIRECTORY = struct.Struct("<IHHHHIIH")
+_END_OF_CENTRAL_DIRECTORY64 = struct.Struct("<IQHHIIQQQQ")
+_END_OF_CENTRAL_DIRECTORY64_LOCATOR = struct.Struct("<IIQI")
+
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+
+_VERSION = 20
+_VERSION_ZIP64 = 45
+_CREATE_SYSTEM_UNIX = 3
+
+_ZIP64_EXTRA = 0x0001
+
+
+class ZipEntry:
+    def __init__(self, name: bytes, flags: int, method: int, offset: int, zip64: bool):
+        self.name = name
+        self.flags = flags
+        self.method = method
+        self.offset = offset
+        self.zip64 = zip64
+        self.crc = 0
+        self.compressed_size = 0
+        self.size = 0
+
+
+class ZipStream:
+    DATE_TIME = (1980, 1, 1, 0, 0, 0)
+    PERMISSIONS = 0o600
+
+    def __init__(self, zip_file, date_time: Tuple[int, int, int, int, int, int] = DATE_TIME):
+        """ zip_file is a path or a writable binary stream, which is left open """
+        if isinstance(zip_file, str):
+            self._file = open(zip_file, "wb")
+            self._owned = True
+        else:
+            self._file = zip_file
+            self._owned = False
+
+        self._date, self._time = self._dosDateTime(date_time)
+        self._entries = []
+        self._offset = 0
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._owned:
+            self._file.close()
+
+    def writestr(self, name: str, data, compressor=None):
+        """ Adds an entry with data (bytes or str) """
+        self.write(name, [data.encode() if isinstance(data, str) else data], compressor)
+
+    def write(self, name: str, chunks: Iterable[bytes], compressor=None, zip64: bool = False):
+        """
+        Adds an entry with the data of chunks, compressed by compressor (stored without).
+        zip64 has to be given for entries that may be 4 GiB or larger.
+        """
+        encoded = name.encode("utf-8")
+        flags = _FLAG_DATA_DESCRIPTOR
+        try:
+            name.encode("ascii")
+        except UnicodeEncodeError:
+            flags |= _FLAG_UTF8
+
+        method = zipfile.ZIP_STORED if compressor is None else zipfile.ZIP_DEFLATED
+        entry = ZipEntry(encoded, flags, method, self._offset, zip64)
+
+        if zip64:
+            # The sizes follow in the data descriptor, the extra field only announces zip64
+            extra = struct.pack("<HHQQ", _ZIP64_EXTRA, 16, 0, 0)
+            sizes = ZIP32_LIMIT
+        else:
+            extra = b""
+            sizes = 0
+
+        self._write(_LOCAL_HEADER.pack(
+            0x04034b50, _VERSION_ZIP64 if zip64 else _VERSION, flags, method, self._time, self._date,
+            0, sizes, sizes, len(encoded), len(extra)
+        ))
+        self._write(encoded)
+        self._write(extra)
+
+        crc = 0
+        for chunk in chunks:
+            if not chunk:
+                continue
+            crc = zlib.crc32(chunk, crc)
+            entry.size += len(chunk)
+            entry.compressed_size += self._write(compressor.compress(chunk) if compressor else chunk)
+
+        if compressor:
+            entry.compressed_size += self._write(compressor.flush())
+
+        entry.crc = crc & 0xFFFFFFFF
+
+        if not zip64 and max(entry.size, entry.compressed_size) > ZIP32_LIMIT:
+            raise zipfile.LargeZipFile("{} is larger than 4 GiB and wasn't written as zip64".format(name))
+
+        if zip64:
+            self._write(_DATA_DESCRIPTOR64.pack(0x08074b50, entry.crc, entry.compressed_size, entry.size))
+        else:
+            self._write(_DATA_DESCRIPTOR.pack(0x08074b50, entry.crc, entry.compressed_size, entry.size))
+
+        self._entries.append(entry)
+
+    def close(self):
+        """ Writes the central directory """
+        if self._closed:
+            return
+        self._closed = True
+
+        directory_offset = self._offset
+
+        for entry in self._entries:
+            values = []
+            size = entry.size
+            compressed_size = entry.compressed_size
+            offset = entry.offset
+
+            if size > ZIP32_LIMIT or entry.zip64:
+                values.append(size)
+                size = ZIP32_LIMIT
+            if compressed_size > ZIP32_LIMIT or entry.zip64:
+                values.append(compressed_size)
+                compressed_size = ZIP32_LIMIT
+            if offset > ZIP32_LIMIT:
+                values.append(offset)
+                offset = ZIP32_LIMIT
+
+            extra = struct.pack("<HH" + "Q" * len(values), _ZIP64_EXTRA, 8 * len(values), *values) if values else b""
+            version = _VERSION_ZIP64 if values else _VERSION
+
+            self._write(_CENTRAL_HEADER.pack(
+                0x02014b50, version | _CREATE_SYSTEM_UNIX << 8, version, entry.flags, entry.method,
+                self._time, self._date, entry.crc, compressed_size, size,
+                len(entry.name), len(extra), 0, 0, 0, self.PERMISSIONS << 16, offset
+            ))
+            self._write(entry.name)
+            self._write(extra)
+
+        directory_size = self._offset - directory_offset
+        count = len(self._entries)
+
+        if count > ZIP32_MAX_ENTRIES or directory_size > ZIP32_LIMIT or directory_offset > ZIP32_LIMIT:
+            end64_offset = self._offset
+            self._write(_END_OF_CENTRAL_DIRECTORY64.pack(
+                0x06064b50, _END_OF_CENTRAL_DIRECTORY64.size - 12, _VERSION_ZIP64, _VERSION_ZIP64,
+                0, 0, count, count, directory_size, directory_offset
+            ))
+            self._write(_END_OF_CENTRAL_DIRECTORY64_LOCATOR.pack(0x07064b50, 0, end64_offset, 1))
+
+        self._write(_END_OF_CENTRAL_DIRECTORY.pack(
+            0x06054b50, 0, 0, min(count, ZIP32_MAX_ENTRIES), min(count, ZIP32_MAX_ENTRIES),
+            min(directory_size, ZIP32_LIMIT), min(directory_offset, ZIP32_LIMIT), 0
+        ))
+
+        if self._owned:
+            self._file.close()
+
+    def _write(self, data: bytes) -> int:
+        if data:
+            self._file.write(data)
+            self._offset += len(data)
+        return len(data)
+
+    @staticmethod
+    def _dosDateTime(date_time: Tuple[int, int, int, int, int, int]) -> Tuple[int, int]:
+        year, month, day, hour, minute, second = date_time
+        return (year - 1980) << 9 | month << 5 | day, hour << 11 | minute << 5 | second // 2
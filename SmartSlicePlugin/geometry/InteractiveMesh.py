@@ -0,0 +1,429 @@
+from typing import Iterable, List, Optional, Tuple, Union
+
+import math
+import numpy
+
+from .MeshTopology import MeshTopology
+
+"""
+  InteractiveMesh
+
+    Compact replacement for the pywim.geom.tri.Mesh that backs face selection in the
+    Smart Slice stage. All of the data lives in the contiguous arrays of a MeshTopology,
+    the Vertex / Triangle / Face classes below are thin __slots__ views that are only
+    created when the rest of the plugin asks for them. The public names follow pywim
+    (select_planar_face, face_from_ids, planar_axis, rotation_axis, ...) so the scene
+    and the select tool can use either one.
+
+"""
+
+class Vertex:
+    __slots__ = ('id', 'x', 'y', 'z')
+
+    def __init__(self, id: int, x: float, y: float, z: float):
+        self.id = id
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __repr__(self):
+        return 'Vertex({}, {}, {}, {})'.format(self.id, self.x, self.y, self.z)
+
+
+class Triangle:
+    __slots__ = ('_mesh', 'id')
+
+    def __init__(self, mesh: 'InteractiveMesh', id: int):
+        self._mesh = mesh
+        self.id = id
+
+    def __eq__(self, other):
+        return isinstance(other, Triangle) and self.id == other.id and self._mesh is other._mesh
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return 'Triangle({})'.format(self.id)
+
+    def _vertex(self, corner: int) -> Vertex:
+        vertex_id = int(self._mesh.topology.triangles[self.id, corner])
+        x, y, z = self._mesh.topology.vertices[vertex_id].tolist()
+        return Vertex(vertex_id, x, y, z)
+
+    @property
+    def v1(self) -> Vertex:
+        return self._vertex(0)
+
+    @property
+    def v2(self) -> Vertex:
+        return self._vertex(1)
+
+    @property
+    def v3(self) -> Vertex:
+        return self._vertex(2)
+
+    @property
+    def normal(self) -> Tuple[float, float, float]:
+        return tuple(self._mesh.topology.normals[self.id].tolist())
+
+
+class Face:
+    """
+    A set of triangles of an InteractiveMesh, stored as a sorted int32 array of triangle ids
+    """
+
+    __slots__ = ('_mesh', 'ids', '_triangles', '_axes')
+
+    def __init__(self, mesh: 'InteractiveMesh' = None, ids: Optional[numpy.ndarray] = None, axes: dict = None):
+        self._mesh = mesh
+        self.ids = numpy.empty(0, dtype=numpy.int32) if ids is None else numpy.asarray(ids, dtype=numpy.int32)
+        self._triangles = None
+
+        # Axes already known for this face, e.g. from the segmentation: 'planar' / 'rotation' -> (origin, direction) or None
+        self._axes = axes or {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def mesh(self) -> 'InteractiveMesh':
+        return self._mesh
+
+    @property
+    def triangles(self) -> List[Triangle]:
+        if self._triangles is None:
+            self._triangles = [Triangle(self._mesh, i) for i in self.ids.tolist()]
+        return self._triangles
+
+    def vertex_arrays(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Unindexed (3K, 3) vertices and normals of the face's triangles, gathered from the
+        mesh in one step. The normals are the mesh's face normals. Both arrays are read-only
+        so MeshData can take them over without copying.
+        """
+        if self._mesh is None:
+            vertices = numpy.empty((0, 3), dtype=numpy.float32)
+            normals = numpy.empty((0, 3), dtype=numpy.float32)
+        else:
+            topology = self._mesh.topology
+            vertices = topology.vertices[topology.triangles[self.ids].ravel()]
+            normals = numpy.repeat(topology.normals[self.ids], 3, axis=0)
+
+        vertices.flags.writeable = False
+        normals.flags.writeable = False
+
+        return vertices, normals
+
+    def planar_axis(self) -> Optional['pywim.geom.Vector']:
+        if self._mesh is None:
+            return None
+        if 'planar' not in self._axes:
+            self._axes['planar'] = planarAxis(self._mesh.topology, self.ids)
+        return makeAxis(self._axes['planar'])
+
+    def rotation_axis(self) -> Optional['pywim.geom.Vector']:
+        if self._mesh is None:
+            return None
+        if 'rotation' not in self._axes:
+            self._axes['rotation'] = rotationAxis(self._mesh.topology, self.ids)
+        return makeAxis(self._axes['rotation'])
+
+
+class InteractiveMesh:
+    """
+    Face selection on top of a MeshTopology. Triangles are flood filled across the edges
+    whose neighbors satisfy the requested surface type:
+
+      planar  - the normals of both triangles agree within PLANAR_ANGLE, and the normal
+                of the triangle being added agrees with the clicked triangle's within
+                PLANAR_ANGLE too, so the selection can't creep around a finely
+                tessellated curve in steps that are each small enough
+      concave - the surface bends towards the normals by less than CURVED_ANGLE
+      convex  - the surface bends away from the normals by less than CURVED_ANGLE
+
+    Edges across which both triangles are coplanar are followed by the concave and
+    convex selections as well, e.g. along the length of a cylinder.
+
+    Once a SurfaceSegmentation has been assigned to segmentation, selections are
+    looked up from it instead of flood filled.
+    """
+
+    AXIS_TYPES = {
+        'planar': 'planar',
+        'concave': 'rotation',
+        'convex': 'rotation'
+    }
+
+    PLANAR_ANGLE = math.radians(0.25)
+    CURVED_ANGLE = math.radians(45.)
+
+    def __init__(self, topology: MeshTopology):
+        if topology.neighbors is None:
+            topology.build()
+
+        self.topology = topology
+
+        self._edge_masks = None
+
+        self.segmentation = None # SurfaceSegmentation
+
+    @property
+    def triangle_count(self) -> int:
+        return self.topology.triangle_count
+
+    def triangle(self, id: int) -> Triangle:
+        return Triangle(self, id)
+
+    def face_from_ids(self, ids: Iterable[int]) -> Face:
+        ids = numpy.asarray(list(ids), dtype=numpy.int64)
+        ids = ids[(ids >= 0) & (ids < self.triangle_count)]
+        return Face(self, numpy.unique(ids).astype(numpy.int32))
+
+    def select_planar_face(self, triangle: Union[int, Triangle]) -> Face:
+        return self._select(triangle, 'planar')
+
+    def select_concave_face(self, triangle: Union[int, Triangle]) -> Face:
+        return self._select(triangle, 'concave')
+
+    def select_convex_face(self, triangle: Union[int, Triangle]) -> Face:
+        return self._select(triangle, 'convex')
+
+    def edgeMasks(self) -> dict:
+        """
+        (M, 3) boolean arrays, one per surface type, telling whether the flood
+        fill may cross edge k of triangle i
+        """
+        if self._edge_masks is None:
+            self._edge_masks = computeEdgeMasks(self.topology, self.PLANAR_ANGLE, self.CURVED_ANGLE)
+        return self._edge_masks
+
+    def _select(self, triangle: Union[int, Triangle], surface: str) -> Face:
+        seed = triangle.id if isinstance(triangle, Triangle) else int(triangle)
+
+        if seed < 0 or seed >= self.triangle_count:
+            return Face(self)
+
+        segmentation = self.segmentation
+        if segmentation is not None:
+            ids, axis = segmentation.region(surface, seed)
+            return Face(self, ids, {self.AXIS_TYPES[surface]: axis})
+
+        return Face(self, self.floodFill(surface, seed))
+
+    def floodFill(self, surface: str, seed: int) -> numpy.ndarray:
+        """ Sorted ids of the triangles selected from seed for the surface type, without the segmentation """
+        allowed = None
+        if surface == 'planar':
+            allowed = planarTriangles(self.topology, self.topology.normals[seed], self.PLANAR_ANGLE)
+
+        return floodFill(self.topology.neighbors, self.edgeMasks()[surface], seed, allowed)
+
+
+def computeEdgeMasks(topology: MeshTopology, planar_angle: float, curved_angle: float) -> dict:
+    neighbors = topology.neighbors
+    normals = topology.normals
+
+    triangles = topology.triangles
+    vertices = topology.vertices
+    centroids = (vertices[triangles[:, 0]] + vertices[triangles[:, 1]] + vertices[triangles[:, 2]]) / 3.
+
+    flat = numpy.zeros(neighbors.shape, dtype=bool)
+    concave = numpy.zeros(neighbors.shape, dtype=bool)
+    convex = numpy.zeros(neighbors.shape, dtype=bool)
+
+    # One edge column at a time keeps the temporaries at (M, 3) instead of (M, 3, 3)
+    for k in range(3):
+        has_neighbor = neighbors[:, k] >= 0
+        other = numpy.where(has_neighbor, neighbors[:, k], 0)
+
+        other_normals = normals[other]
+        cos_angle = numpy.einsum('ij,ij->i', normals, other_normals)
+
+        # Positive when the normals spread apart going across the edge (convex), negative when they
+        # converge (concave). Symmetric in the two triangles so both half edges agree.
+        bend = numpy.einsum('ij,ij->i', other_normals - normals, centroids[other] - centroids)
+
+        flat[:, k] = has_neighbor & (cos_angle >= math.cos(planar_angle))
+        smooth = has_neighbor & (cos_angle >= math.cos(curved_angle))
+
+        concave[:, k] = flat[:, k] | (smooth & (bend < 0.))
+        convex[:, k] = flat[:, k] | (smooth & (bend > 0.))
+
+    return {
+        'planar': flat,
+        'concave': concave,
+        'convex': convex,
+    }
+
+
+def floodFill(
+    neighbors: numpy.ndarray, edge_mask: numpy.ndarray, seed: int, allowed: Optional[numpy.ndarray] = None
+) -> numpy.ndarray:
+    """
+    Sorted ids of all triangles reachable from seed through edges allowed by edge_mask,
+    only passing through the triangles set in allowed if it's given
+    """
+    selected = numpy.zeros(len(neighbors), dtype=bool)
+    selected[seed] = True
+
+    frontier = numpy.array([seed], dtype=numpy.int32)
+
+    while len(frontier) > 0:
+        candidates = neighbors[frontier][edge_mask[frontier]]
+        candidates = candidates[~selected[candidates]]
+        if allowed is not None:
+            candidates = candidates[allowed[candidates]]
+        candidates = numpy.unique(candidates)
+        selected[candidates] = True
+        frontier = candidates
+
+    return numpy.flatnonzero(selected).astype(numpy.int32)
+
+
+def planarTriangles(topology: MeshTopology, normal: numpy.ndarray, planar_angle: float) -> numpy.ndarray:
+    """ (M,) mask of the triangles whose normal is within planar_angle of the given one """
+    return numpy.dot(topology.normals, normal) >= math.cos(planar_angle)
+
+
+def planarAxis(topology: MeshTopology, ids: numpy.ndarray) -> Optional[Tuple[numpy.ndarray, numpy.ndarray]]:
+    """ Area weighted centroid and mean normal of the triangles """
+    if len(ids) == 0:
+        return None
+
+    origins, directions, valid = planarAxes(topology, ids, numpy.zeros(len(ids), dtype=numpy.int32), 1)
+
+    return (origins[0], directions[0]) if valid[0] else None
+
+
+def rotationAxis(topology: MeshTopology, ids: numpy.ndarray) -> Optional[Tuple[numpy.ndarray, numpy.ndarray]]:
+    """
+    Axis of the cylinder / cone best fitting the triangles: the direction is the one most
+    perpendicular to all normals, the origin is the point on the axis closest to the
+    triangles' centroid, found from the least squares intersection of the normal lines.
+    """
+    if len(ids) < 2:
+        return None
+
+    origins, directions, valid = rotationAxes(topology, ids, numpy.zeros(len(ids), dtype=numpy.int32), 1)
+
+    return (origins[0], directions[0]) if valid[0] else None
+
+
+def planarAxes(
+    topology: MeshTopology, ids: numpy.ndarray, labels: numpy.ndarray, region_count: int
+) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    planarAxis for many regions at once. labels[i] is the region of triangle ids[i].
+    Returns the (R, 3) origins and directions and an (R,) mask of the regions that have an axis.
+    """
+    areas, normals, centroids = _triangleData(topology, ids)
+
+    weights = numpy.bincount(labels, areas, minlength=region_count)
+    origins = _regionSums(labels, areas[:, None] * centroids, region_count)
+    directions = _regionSums(labels, areas[:, None] * normals, region_count)
+
+    lengths = numpy.linalg.norm(directions, axis=1)
+    valid = (weights > 0.) & (lengths >= 1.e-9)
+
+    origins[valid] /= weights[valid, None]
+    directions[valid] /= lengths[valid, None]
+
+    return origins, directions, valid
+
+
+def rotationAxes(
+    topology: MeshTopology, ids: numpy.ndarray, labels: numpy.ndarray, region_count: int
+) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """ rotationAxis for many regions at once, see planarAxes """
+    areas, normals, centroids = _triangleData(topology, ids)
+
+    counts = numpy.bincount(labels, minlength=region_count)
+    weights = numpy.bincount(labels, areas, minlength=region_count)
+
+    valid = (counts >= 2) & (weights > 0.)
+    safe_weights = numpy.where(valid, weights, 1.)
+
+    centers = _regionSums(labels, areas[:, None] * centroids, region_count) / safe_weights[:, None]
+
+    scatter = numpy.empty((region_count, 3, 3))
+    for row in range(3):
+        for column in range(row, 3):
+            scatter[:, row, column] = numpy.bincount(labels, areas * normals[:, row] * normals[:, column], minlength=region_count)
+            scatter[:, column, row] = scatter[:, row, column]
+    eigenvalues, eigenvectors = numpy.linalg.eigh(scatter)
+
+    # The normals of a curved surface span (at least) a plane. If they don't, it's flat.
+    valid &= eigenvalues[:, 1] >= 1.e-6 * eigenvalues[:, 2]
+
+    directions = eigenvectors[:, :, 0]
+
+    # Least squares point closest to every normal line, restricted to the plane
+    # through the center perpendicular to the axis
+    projected_centroids = centroids - normals * numpy.einsum('ij,ij->i', normals, centroids)[:, None]
+    lhs = weights[:, None, None] * numpy.eye(3)[None, :, :] - scatter
+    rhs = _regionSums(labels, areas[:, None] * projected_centroids, region_count)
+
+    stiffness = eigenvalues[:, 2]
+    lhs += directions[:, :, None] * directions[:, None, :] * stiffness[:, None, None]
+    rhs += directions * (numpy.einsum('ij,ij->i', directions, centers) * stiffness)[:, None]
+
+    origins = numpy.zeros((region_count, 3))
+    regions = numpy.flatnonzero(valid)
+
+    try:
+        origins[regions] = numpy.linalg.solve(lhs[regions], rhs[regions][:, :, None])[:, :, 0]
+    except numpy.linalg.LinAlgError:
+        # One of the systems is singular, solve them one by one to find out which
+        for region in regions:
+            try:
+                origins[region] = numpy.linalg.solve(lhs[region], rhs[region])
+            except numpy.linalg.LinAlgError:
+                valid[region] = False
+
+    return origins, _canonicalDirections(directions), valid
+
+
+def makeAxis(axis: Optional[Tuple[numpy.ndarray, numpy.ndarray]]) -> Optional['pywim.geom.Vector']:
+    if axis is None:
+        return None
+
+    import pywim
+
+    origin, direction = axis
+
+    vector = pywim.geom.Vector(float(direction[0]), float(direction[1]), float(direction[2]))
+    vector.origin = pywim.geom.Vertex(float(origin[0]), float(origin[1]), float(origin[2]))
+
+    return vector
+
+
+def _triangleData(topology: MeshTopology, ids: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    triangles = topology.triangles[ids]
+    vertices = topology.vertices
+
+    areas = topology.areas[ids].astype(numpy.float64)
+    normals = topology.normals[ids].astype(numpy.float64)
+    centroids = (
+        vertices[triangles[:, 0]].astype(numpy.float64) + vertices[triangles[:, 1]] + vertices[triangles[:, 2]]
+    ) / 3.
+
+    return areas, normals, centroids
+
+
+def _regionSums(labels: numpy.ndarray, values: numpy.ndarray, region_count: int) -> numpy.ndarray:
+    """ Sums the (n, 3) rows of values per label """
+    sums = numpy.empty((region_count, 3))
+    for column in range(3):
+        sums[:, column] = numpy.bincount(labels, values[:, column], minlength=region_count)
+    return sums
+
+
+def _canonicalDirections(directions: numpy.ndarray) -> numpy.ndarray:
+    # An axis has no preferred sign, pick one so the same surface always gives the same vector
+    largest = numpy.argmax(numpy.abs(directions), axis=1)
+    signs = numpy.where(directions[numpy.arange(len(directions)), largest] < 0., -1., 1.)
+    return directions * signs[:, None]
@@ -0,0 +1,100 @@
+from typing import Optional
+
+import hashlib
+import os
+import numpy
+
+from .MeshTopology import MeshTopology
+from .InteractiveMesh import InteractiveMesh
+from .Segmentation import SurfaceRegions, SurfaceSegmentation
+
+"""
+  MeshCache
+
+    Persists analyzed interactive meshes (topology and segmentation) so re-opening a part
+    skips the analysis. Entries are keyed by a hash of the raw vertex / index buffers and
+    every array is stored as its own .npy file, which is memory mapped read-only when the
+    mesh is loaded back - nothing is read until a selection touches it.
+
+    The cache itself is any store with the get / put / remove interface of utils.DiskCache.
+
+"""
+
+class MeshCache:
+    # Bump whenever the stored arrays or the analysis producing them change
+    FORMAT_VERSION = 3
+
+    TOPOLOGY_ARRAYS = ('vertices', 'triangles', 'normals', 'areas', 'neighbors')
+
+    def __init__(self, store: 'DiskCache'):
+        self.store = store
+
+    @classmethod
+    def key(cls, vertices: numpy.ndarray, indices: Optional[numpy.ndarray] = None) -> str:
+        hasher = hashlib.sha1()
+
+        hasher.update('{}:{}:{}'.format(
+            cls.FORMAT_VERSION, InteractiveMesh.PLANAR_ANGLE, InteractiveMesh.CURVED_ANGLE
+        ).encode())
+
+        for array in (vertices, indices):
+            if array is None:
+                hasher.update(b'none')
+                continue
+
+            array = numpy.ascontiguousarray(array)
+            hasher.update('{}{}'.format(array.dtype.str, array.shape).encode())
+            hasher.update(array.view(numpy.uint8))
+
+        return hasher.hexdigest()
+
+    def load(self, key: str) -> Optional[InteractiveMesh]:
+        """ The cached, already segmented mesh for key, or None """
+        entry = self.store.get(key)
+
+        if entry is None:
+            return None
+
+        try:
+            arrays = {}
+            for name in self.TOPOLOGY_ARRAYS:
+                arrays[name] = self._loadArray(entry, name)
+
+            topology = MeshTopology(arrays['vertices'], arrays['triangles'])
+            topology.normals = arrays['normals']
+            topology.areas = arrays['areas']
+            topology.neighbors = arrays['neighbors']
+
+            mesh = InteractiveMesh(topology)
+
+            segmentation = SurfaceSegmentation(mesh)
+            for surface in SurfaceSegmentation.SURFACES:
+                segmentation.surfaces[surface] = SurfaceRegions(
+                    *[self._loadArray(entry, surface + '_' + name) for name in SurfaceRegions.ARRAYS]
+                )
+        except (IOError, OSError, ValueError):
+            # Incomplete or corrupt, it will be stored again
+            self.store.remove(key)
+            return None
+
+        mesh.segmentation = segmentation
+
+        return mesh
+
+    def save(self, key: str, mesh: InteractiveMesh):
+        """ Stores a mesh, which has to be segmented """
+        segmentation = mesh.segmentation
+
+        def write(path):
+            for name in self.TOPOLOGY_ARRAYS:
+                numpy.save(os.path.join(path, name + '.npy'), getattr(mesh.topology, name))
+
+            for surface in SurfaceSegmentation.SURFACES:
+                regions = segmentation.surfaces[surface]
+                for name in SurfaceRegions.ARRAYS:
+                    numpy.save(os.path.join(path, surface + '_' + name + '.npy'), getattr(regions, name))
+
+        self.store.put(key, write)
+
+    def _loadArray(self, entry: str, name: str) -> numpy.ndarray:
+        return numpy.load(os.path.join(entry, name + '.npy'), mmap_mode='r')
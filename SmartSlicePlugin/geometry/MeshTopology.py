@@ -0,0 +1,214 @@
+from typing import Optional, Tuple
+
+import concurrent.futures
+import os
+import numpy
+
+"""
+  MeshTopology
+
+    Array based representation of a triangle mesh and its edge connectivity.
+    Everything here is built with vectorized numpy operations directly from
+    the vertex / index buffers Cura keeps in MeshData, so the cost of entering
+    the Smart Slice stage no longer scales with a Python loop per triangle.
+
+    This module does not depend on Uranium or Cura so it can be used
+    (and benchmarked) outside of the application.
+
+"""
+
+class MeshTopology:
+    """
+    Struct-of-arrays triangle mesh:
+
+      vertices  - (N, 3) float32
+      triangles - (M, 3) int32, indices into vertices. Row i is Cura's triangle i,
+                  degenerate triangles included, so face ids stay valid.
+      normals   - (M, 3) float32 unit normals, zero for degenerate triangles
+      areas     - (M,) float32
+      neighbors - (M, 3) int32, the triangle sharing edge (v[k], v[k + 1]) of each
+                  triangle, or -1 for boundary / non-manifold / degenerate edges
+    """
+
+    NO_NEIGHBOR = -1
+
+    # Below this the thread start up costs more than the parallel sort saves
+    PARALLEL_ADJACENCY_TRIANGLES = 200000
+    MAX_ADJACENCY_WORKERS = 4
+
+    # Vertices of unindexed meshes closer than this (mm, per coordinate) are merged
+    WELD_TOLERANCE = 1.e-4
+
+    def __init__(self, vertices: numpy.ndarray, triangles: numpy.ndarray):
+        self.vertices = numpy.ascontiguousarray(vertices, dtype=numpy.float32).reshape(-1, 3)
+        self.triangles = numpy.ascontiguousarray(triangles, dtype=numpy.int32).reshape(-1, 3)
+
+        self.normals = None
+        self.areas = None
+        self.neighbors = None
+
+    @classmethod
+    def fromArrays(cls, vertices: numpy.ndarray, indices: Optional[numpy.ndarray] = None) -> 'MeshTopology':
+        vertices = numpy.asarray(vertices).reshape(-1, 3)
+
+        if indices is not None:
+            return cls(vertices, indices)
+
+        # Unindexed mesh - every 3 vertices make up triangle i // 3. Welding the
+        # coincident copies keeps that numbering and gives the edges shared ids.
+        return cls(*weldVertices(vertices, cls.WELD_TOLERANCE))
+
+    @classmethod
+    def fromMeshData(cls, mesh_data: 'UM.Mesh.MeshData.MeshData') -> 'MeshTopology':
+        return cls.fromArrays(mesh_data.getVertices(), mesh_data.getIndices())
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def triangle_count(self) -> int:
+        return len(self.triangles)
+
+    def build(self) -> 'MeshTopology':
+        self.computeNormals()
+        self.computeAdjacency()
+        return self
+
+    def computeNormals(self):
+        first = self.vertices[self.triangles[:, 0]].astype(numpy.float64)
+
+        cross = numpy.cross(
+            self.vertices[self.triangles[:, 1]] - first,
+            self.vertices[self.triangles[:, 2]] - first
+        )
+        lengths = numpy.sqrt(numpy.einsum('ij,ij->i', cross, cross))
+
+        normals = numpy.zeros_like(cross)
+        valid = lengths > 0.
+        normals[valid] = cross[valid] / lengths[valid, None]
+
+        self.normals = normals.astype(numpy.float32)
+        self.areas = (0.5 * lengths).astype(numpy.float32)
+
+    def computeAdjacency(self, workers: Optional[int] = None):
+        """
+        Builds the edge neighbors. workers is the number of threads pairing the edges,
+        by default large meshes use up to MAX_ADJACENCY_WORKERS, one per core.
+        """
+        if self.areas is None:
+            self.computeNormals()
+
+        if workers is None:
+            workers = 1
+            if self.triangle_count >= self.PARALLEL_ADJACENCY_TRIANGLES:
+                workers = min(self.MAX_ADJACENCY_WORKERS, os.cpu_count() or 1)
+
+        self.neighbors = edgeNeighbors(self.triangles, self.areas > 0., workers)
+
+    def degenerateTriangles(self) -> numpy.ndarray:
+        if self.areas is None:
+            self.computeNormals()
+
+        return numpy.flatnonzero(self.areas <= 0.)
+
+
+def edgeNeighbors(triangles: numpy.ndarray, usable: Optional[numpy.ndarray] = None, workers: int = 1) -> numpy.ndarray:
+    """
+    Pairs up the half edges of the triangles. Edge k of a triangle runs from
+    vertex k to vertex (k + 1) % 3. Only edges shared by exactly two usable
+    triangles get a neighbor, everything else is marked with -1.
+
+    With more than one worker the edges are partitioned by their lower vertex id
+    and every partition is paired on its own thread. All half edges of an edge
+    land in the same partition and are paired in the same order, so the result
+    is identical to the sequential build.
+    """
+    triangles = numpy.asarray(triangles).reshape(-1, 3)
+    triangle_count = len(triangles)
+
+    neighbors = numpy.full(3 * triangle_count, MeshTopology.NO_NEIGHBOR, dtype=numpy.int32)
+
+    if triangle_count == 0:
+        return neighbors.reshape(-1, 3)
+
+    start = triangles.ravel()
+    end = triangles[:, [1, 2, 0]].ravel()
+
+    low = numpy.minimum(start, end)
+    high = numpy.maximum(start, end)
+    vertex_range = int(high.max()) + 1
+    keys = low.astype(numpy.int64) * vertex_range + high
+
+    valid = low != high
+    if usable is not None:
+        valid &= numpy.repeat(numpy.asarray(usable, dtype=bool), 3)
+    del start, end, high
+
+    if workers <= 1:
+        _pairHalfEdges(keys, numpy.flatnonzero(valid), neighbors)
+        return neighbors.reshape(-1, 3)
+
+    bounds = numpy.linspace(0, vertex_range, workers + 1).astype(numpy.int64)
+
+    def pairPartition(partition):
+        in_partition = valid & (low >= bounds[partition]) & (low < bounds[partition + 1])
+        _pairHalfEdges(keys, numpy.flatnonzero(in_partition), neighbors)
+
+    # numpy releases the GIL for the heavy lifting (sorting, comparisons, gathers)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(pairPartition, range(workers)))
+
+    return neighbors.reshape(-1, 3)
+
+
+def _pairHalfEdges(keys: numpy.ndarray, half_edges: numpy.ndarray, neighbors: numpy.ndarray):
+    """ Pairs the given half edges (ascending) among themselves, writing into neighbors """
+
+    # Stable sort so the pairing is deterministic regardless of how the keys were produced
+    half_edges = half_edges[numpy.argsort(keys[half_edges], kind='mergesort')]
+    sorted_keys = keys[half_edges]
+
+    if len(sorted_keys) == 0:
+        return
+
+    group_starts = numpy.flatnonzero(numpy.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    group_sizes = numpy.diff(numpy.r_[group_starts, len(sorted_keys)])
+
+    pairs = group_starts[group_sizes == 2]
+    first = half_edges[pairs]
+    second = half_edges[pairs + 1]
+
+    # A triangle can't be its own neighbor
+    distinct = (first // 3) != (second // 3)
+    first = first[distinct]
+    second = second[distinct]
+
+    neighbors[first] = second // 3
+    neighbors[second] = first // 3
+
+
+def weldVertices(vertices: numpy.ndarray, tolerance: float = 0.) -> Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Turns an unindexed vertex buffer, where every 3 vertices are a triangle, into
+    shared vertices and (M, 3) triangles with triangle i made of vertices 3i..3i + 2.
+    Coordinates are snapped to a grid of the given tolerance (0 for exact matches)
+    and vertices in the same grid cell are merged, keeping the first one's position.
+    """
+    vertices = numpy.asarray(vertices, dtype=numpy.float32).reshape(-1, 3)
+    vertices = vertices[:len(vertices) - len(vertices) % 3]
+
+    if tolerance > 0.:
+        # Rounding to integers also folds -0. into 0.
+        quantized = numpy.rint(vertices / numpy.float64(tolerance)).astype(numpy.int64)
+    else:
+        # Adding 0. folds -0. into 0. so both compare equal byte-wise
+        quantized = vertices + numpy.float32(0.)
+
+    packed = numpy.ascontiguousarray(quantized)
+    packed = packed.view(numpy.dtype((numpy.void, packed.dtype.itemsize * 3))).ravel()
+    del quantized
+
+    _, first, inverse = numpy.unique(packed, return_index=True, return_inverse=True)
+
+    return vertices[first], inverse.astype(numpy.int32).reshape(-1, 3)
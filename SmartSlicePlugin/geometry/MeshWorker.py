@@ -0,0 +1,251 @@
+from typing import Callable, Optional
+
+import ctypes
+import multiprocessing
+import os
+import queue
+import runpy
+import sys
+import time
+import traceback
+
+import numpy
+
+"""
+  MeshWorker
+
+    Runs the interactive mesh analysis (topology and segmentation) in a separate
+    process so it doesn't compete with the UI for the interpreter lock. All of the
+    mesh sized arrays - the vertex and index buffers going in, the topology and
+    region labels coming out - live in shared memory (multiprocessing RawArrays)
+    and are never copied or pickled. Only the per region axes and progress updates
+    go through a queue.
+
+    The worker is started with the 'spawn' method and runs this file through runpy,
+    so the child only needs the standard library, numpy and the geometry package -
+    it never imports the plugin, Uranium or Cura. It does need an executable that
+    multiprocessing can spawn Python with, which not every Cura build provides, so
+    callers should be ready to fall back to analyzing in process. The worker reports
+    that it started before analyzing anything; a worker that doesn't within the
+    startup timeout (e.g. a frozen build spawning itself instead of Python) is
+    terminated and treated as one that couldn't be started.
+
+"""
+
+WORKER_RUN_NAME = '__smartslice_mesh_worker__'
+
+# Seconds a spawned worker has to report that it started
+STARTUP_TIMEOUT = 30.
+
+# Shared arrays returned by the worker, all of them (M,) or (M, 3) sized
+_TOPOLOGY_OUTPUTS = (
+    ('normals', ctypes.c_float, 3),
+    ('areas', ctypes.c_float, 1),
+    ('neighbors', ctypes.c_int32, 3),
+)
+_REGION_OUTPUTS = (
+    ('labels', ctypes.c_int32),
+    ('order', ctypes.c_int32),
+)
+_SURFACES = ('planar', 'concave', 'convex')
+
+
+class MeshWorkerError(Exception):
+    pass
+
+
+def analyzeInProcess(
+    vertices: numpy.ndarray, indices: Optional[numpy.ndarray] = None,
+    progress: Callable[[str], None] = None,
+    should_stop: Callable[[], bool] = None,
+    poll_interval: float = 0.1,
+    startup_timeout: float = STARTUP_TIMEOUT
+) -> Optional['InteractiveMesh']:
+    """
+    Analyzes the mesh in a worker process and returns the segmented InteractiveMesh, or None
+    if should_stop returned True, in which case the worker is terminated. progress is called
+    with the name of every finished phase: ingest, normals, adjacency, edges, planar, concave
+    and convex. Raises MeshWorkerError if the worker can't be started, doesn't report that it
+    started within startup_timeout seconds, or fails.
+    """
+    from .MeshTopology import MeshTopology
+    from .InteractiveMesh import InteractiveMesh
+    from .Segmentation import SurfaceRegions, SurfaceSegmentation
+
+    context = multiprocessing.get_context('spawn')
+
+    vertices = numpy.asarray(vertices, dtype=numpy.float32).reshape(-1, 3)
+    vertex_count = len(vertices)
+
+    if indices is not None:
+        indices = numpy.asarray(indices, dtype=numpy.int32).reshape(-1, 3)
+        triangle_count = len(indices)
+    else:
+        triangle_count = vertex_count // 3
+
+    if triangle_count == 0:
+        raise MeshWorkerError('Mesh has no triangles')
+
+    # The worker writes the welded vertices and triangles of unindexed meshes back into these
+    shared = {
+        'vertices': _sharedArray(context, ctypes.c_float, vertex_count * 3),
+        'indices': _sharedArray(context, ctypes.c_int32, triangle_count * 3),
+    }
+
+    _asArray(shared['vertices'], numpy.float32)[:] = vertices.ravel()
+    if indices is not None:
+        _asArray(shared['indices'], numpy.int32)[:] = indices.ravel()
+
+    for name, ctype, width in _TOPOLOGY_OUTPUTS:
+        shared[name] = _sharedArray(context, ctype, triangle_count * width)
+
+    for surface in _SURFACES:
+        for name, ctype in _REGION_OUTPUTS:
+            shared[surface + '_' + name] = _sharedArray(context, ctype, triangle_count)
+
+    messages = context.Queue()
+
+    arguments = {
+        'shared': shared,
+        'messages': messages,
+        'indexed': indices is not None,
+    }
+
+    process = context.Process(
+        target=runpy.run_path,
+        args=(os.path.abspath(__file__), {'WORKER_ARGUMENTS': arguments}, WORKER_RUN_NAME),
+        name='SmartSliceMeshWorker',
+        daemon=True
+    )
+    process.start()
+
+    result = None
+    welded_count = None
+    started = False
+    startup_deadline = time.monotonic() + startup_timeout
+
+    try:
+        while result is None:
+            if should_stop and should_stop():
+                return None
+
+            try:
+                message = messages.get(timeout=poll_interval)
+            except queue.Empty:
+                if not process.is_alive():
+                    raise MeshWorkerError('Mesh worker exited with code {}'.format(process.exitcode))
+                if not started and time.monotonic() > startup_deadline:
+                    raise MeshWorkerError('Mesh worker didn\'t start within {:.0f} s'.format(startup_timeout))
+                continue
+
+            started = True
+
+            kind = message[0]
+            if kind == 'started':
+                pass
+            elif kind == 'progress':
+                if progress:
+                    progress(message[1])
+            elif kind == 'error':
+                raise MeshWorkerError(message[1])
+            elif kind == 'done':
+                welded_count, result = message[1], message[2]
+    finally:
+        if process.is_alive() and result is None:
+            process.terminate()
+        process.join(1.)
+
+    vertices = _asArray(shared['vertices'], numpy.float32)
+    if indices is None:
+        # Only keep the welded vertices, not the whole input buffer
+        vertices = vertices[:welded_count * 3].copy()
+
+    topology = MeshTopology(vertices, _asArray(shared['indices'], numpy.int32))
+    topology.normals = _asArray(shared['normals'], numpy.float32).reshape(-1, 3)
+    topology.areas = _asArray(shared['areas'], numpy.float32)
+    topology.neighbors = _asArray(shared['neighbors'], numpy.int32).reshape(-1, 3)
+
+    mesh = InteractiveMesh(topology)
+
+    segmentation = SurfaceSegmentation(mesh)
+    for surface in _SURFACES:
+        offsets, origins, directions, valid, exact = result[surface]
+        segmentation.surfaces[surface] = SurfaceRegions(
+            _asArray(shared[surface + '_labels'], numpy.int32),
+            _asArray(shared[surface + '_order'], numpy.int32),
+            offsets, origins, directions, valid, exact
+        )
+
+    mesh.segmentation = segmentation
+
+    return mesh
+
+
+def _workerMain(shared: dict, messages: 'multiprocessing.Queue', indexed: bool):
+    """ Runs in the worker process """
+    from .MeshTopology import MeshTopology
+    from .InteractiveMesh import InteractiveMesh
+    from .Segmentation import SurfaceSegmentation
+
+    messages.put(('started',))
+
+    try:
+        vertices = _asArray(shared['vertices'], numpy.float32).reshape(-1, 3)
+
+        if indexed:
+            topology = MeshTopology.fromArrays(vertices, _asArray(shared['indices'], numpy.int32).reshape(-1, 3))
+        else:
+            topology = MeshTopology.fromArrays(vertices)
+
+            _asArray(shared['vertices'], numpy.float32)[:topology.vertex_count * 3] = topology.vertices.ravel()
+            _asArray(shared['indices'], numpy.int32)[:] = topology.triangles.ravel()
+        messages.put(('progress', 'ingest'))
+
+        topology.computeNormals()
+        messages.put(('progress', 'normals'))
+
+        topology.computeAdjacency()
+        messages.put(('progress', 'adjacency'))
+
+        mesh = InteractiveMesh(topology)
+        mesh.edgeMasks()
+        messages.put(('progress', 'edges'))
+
+        _asArray(shared['normals'], numpy.float32)[:] = topology.normals.ravel()
+        _asArray(shared['areas'], numpy.float32)[:] = topology.areas
+        _asArray(shared['neighbors'], numpy.int32)[:] = topology.neighbors.ravel()
+
+        segmentation = SurfaceSegmentation(mesh)
+        result = {}
+
+        for surface in _SURFACES:
+            regions = segmentation.computeSurface(surface)
+
+            _asArray(shared[surface + '_labels'], numpy.int32)[:] = regions.labels
+            _asArray(shared[surface + '_order'], numpy.int32)[:] = regions.order
+
+            result[surface] = (regions.offsets, regions.origins, regions.directions, regions.valid, regions.exact)
+
+            messages.put(('progress', surface))
+
+        messages.put(('done', topology.vertex_count, result))
+    except Exception:
+        messages.put(('error', traceback.format_exc()))
+
+
+def _sharedArray(context, ctype, size: int):
+    return context.RawArray(ctype, size)
+
+
+def _asArray(shared, dtype) -> numpy.ndarray:
+    # A view of the shared memory, no copy
+    return numpy.frombuffer(shared, dtype=dtype)
+
+
+if __name__ == WORKER_RUN_NAME:
+    # Started through runpy in a fresh interpreter - import the geometry package from the plugin directory
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from geometry.MeshWorker import _workerMain as workerMain
+
+    workerMain(**WORKER_ARGUMENTS)
@@ -0,0 +1,275 @@
+from typing import Callable, Optional, Tuple
+
+import math
+import numpy
+
+from .MeshTopology import MeshTopology
+from .InteractiveMesh import InteractiveMesh, Face, planarAxis, planarAxes, rotationAxis, rotationAxes
+
+"""
+  Segmentation
+
+    Splits an InteractiveMesh into its planar, concave and convex regions once, so
+    selecting a face becomes a lookup instead of a flood fill per click. A region of
+    a surface type is exactly the set of triangles InteractiveMesh would flood fill
+    for that type, and every region's fitted axis is computed up front.
+
+    Planar selections also compare every triangle with the clicked one, so the
+    triangles linked by nearly coplanar edges only form a single selection if they
+    are all close enough to the region's normal. Those that aren't, e.g. around a
+    finely tessellated cylinder, select differently depending on the triangle that
+    is clicked and are still flood filled.
+
+"""
+
+class SurfaceRegions:
+    """
+    Regions of one surface type:
+
+      labels  - (M,) int32 region of every triangle
+      order   - (M,) int32 triangle ids sorted by region, ascending within a region
+      offsets - (R + 1,) region r is order[offsets[r]:offsets[r + 1]]
+      origins, directions, valid - fitted axis of every region
+      exact   - (R,) whether selecting any triangle of the region gives the whole region,
+                the others are flood filled from the selected triangle
+    """
+
+    ARRAYS = ('labels', 'order', 'offsets', 'origins', 'directions', 'valid', 'exact')
+
+    def __init__(
+        self, labels: numpy.ndarray, order: numpy.ndarray, offsets: numpy.ndarray,
+        origins: numpy.ndarray, directions: numpy.ndarray, valid: numpy.ndarray,
+        exact: Optional[numpy.ndarray] = None
+    ):
+        self.labels = labels
+        self.order = order
+        self.offsets = offsets
+
+        self.origins = origins
+        self.directions = directions
+        self.valid = valid
+
+        self.exact = numpy.ones(len(offsets) - 1, dtype=bool) if exact is None else exact
+
+    @classmethod
+    def fromLabels(
+        cls, labels: numpy.ndarray, axes: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray],
+        exact: Optional[numpy.ndarray] = None
+    ) -> 'SurfaceRegions':
+        order = numpy.argsort(labels, kind='mergesort').astype(numpy.int32)
+        offsets = numpy.r_[0, numpy.cumsum(numpy.bincount(labels))].astype(numpy.int64)
+
+        return cls(labels, order, offsets, *axes, exact=exact)
+
+    @property
+    def region_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def triangles(self, region: int) -> numpy.ndarray:
+        return self.order[self.offsets[region]:self.offsets[region + 1]]
+
+    def axis(self, region: int) -> Optional[Tuple[numpy.ndarray, numpy.ndarray]]:
+        if not self.valid[region]:
+            return None
+        return self.origins[region], self.directions[region]
+
+
+class SurfaceSegmentation:
+    SURFACES = ('planar', 'concave', 'convex')
+
+    def __init__(self, mesh: InteractiveMesh):
+        self.mesh = mesh
+        self.surfaces = {}
+
+    def compute(self, should_stop: Callable[[], bool] = None) -> Optional['SurfaceSegmentation']:
+        """
+        Segments every surface type. should_stop is polled between surface types,
+        if it returns True the segmentation is abandoned and None is returned.
+        """
+        for surface in self.SURFACES:
+            if should_stop and should_stop():
+                return None
+            self.computeSurface(surface)
+        return self
+
+    def computeSurface(self, surface: str) -> SurfaceRegions:
+        topology = self.mesh.topology
+
+        labels = connectedComponents(topology.neighbors, self.mesh.edgeMasks()[surface])
+
+        ids = numpy.arange(len(labels), dtype=numpy.int32)
+        region_count = int(labels.max()) + 1 if len(labels) > 0 else 0
+
+        if surface == 'planar':
+            axes = planarAxes(topology, ids, labels, region_count)
+            exact = planarRegionsExact(topology, labels, axes, self.mesh.PLANAR_ANGLE)
+        else:
+            axes = rotationAxes(topology, ids, labels, region_count)
+            exact = None
+
+        regions = SurfaceRegions.fromLabels(labels, axes, exact)
+        self.surfaces[surface] = regions
+
+        return regions
+
+    def region(self, surface: str, triangle: int) -> Tuple[numpy.ndarray, Optional[Tuple[numpy.ndarray, numpy.ndarray]]]:
+        """ Triangle ids and fitted axis of the region of the given surface type containing triangle """
+        regions = self.surfaces[surface]
+        label = regions.labels[triangle]
+
+        if not regions.exact[label]:
+            ids = self.mesh.floodFill(surface, triangle)
+            return ids, _faceAxis(self.mesh, surface, ids)
+
+        return regions.triangles(label), regions.axis(label)
+
+
+def classifyFace(mesh: InteractiveMesh, face: Face) -> Tuple[Optional[str], Optional[Tuple[numpy.ndarray, numpy.ndarray]]]:
+    """
+    Finds the surface type ('planar', then 'concave', then 'convex') for which the face is
+    exactly the selection made from its first triangle, along with the face's fitted axis.
+    Returns None, None if the face isn't a selection of any type.
+
+    Uses the segmentation when it is available, otherwise checks all the types together
+    with a single pass over the face's own triangles - no region is grown.
+    """
+    ids = face.ids
+    if len(ids) == 0:
+        return None, None
+
+    segmentation = mesh.segmentation
+    face_edges = None
+
+    for surface in SurfaceSegmentation.SURFACES:
+        if segmentation is not None:
+            regions = segmentation.surfaces[surface]
+            label = regions.labels[ids[0]]
+
+            if regions.exact[label]:
+                if regions.offsets[label + 1] - regions.offsets[label] == len(ids) and (regions.labels[ids] == label).all():
+                    return surface, regions.axis(label)
+                continue
+
+        if face_edges is None:
+            face_edges = _faceEdges(mesh, ids)
+
+        if _isSelection(mesh, ids, surface, *face_edges):
+            return surface, _faceAxis(mesh, surface, ids)
+
+    return None, None
+
+
+def planarRegionsExact(
+    topology: MeshTopology, labels: numpy.ndarray, axes: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray], planar_angle: float
+) -> numpy.ndarray:
+    """
+    Which of the planar regions are the same selection from any of their triangles: those
+    made of a single triangle, and those where every triangle is within half of planar_angle
+    of the region's normal, so any two of them are within planar_angle of each other
+    """
+    _, directions, valid = axes
+
+    if len(labels) == 0:
+        return numpy.ones(len(valid), dtype=bool)
+
+    order = numpy.argsort(labels, kind='mergesort')
+    sorted_labels = labels[order]
+    starts = numpy.flatnonzero(numpy.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+
+    cos_angle = numpy.einsum('ij,ij->i', topology.normals[order], directions[sorted_labels])
+    worst = numpy.minimum.reduceat(cos_angle, starts)
+
+    counts = numpy.bincount(labels, minlength=len(valid))
+
+    return (counts == 1) | (valid & (worst >= math.cos(planar_angle / 2.)))
+
+
+def _faceEdges(mesh: InteractiveMesh, ids: numpy.ndarray) -> Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """ The neighbors of the face's triangles, whether they are in the face and their ids local to the face """
+    inside = numpy.zeros(mesh.triangle_count, dtype=bool)
+    inside[ids] = True
+
+    neighbors = mesh.topology.neighbors[ids]
+    neighbor_inside = (neighbors >= 0) & inside[neighbors]
+
+    # Neighbor ids local to the face, face.ids is sorted
+    local_neighbors = numpy.where(neighbor_inside, numpy.searchsorted(ids, neighbors), -1)
+
+    return neighbors, neighbor_inside, local_neighbors
+
+
+def _isSelection(
+    mesh: InteractiveMesh, ids: numpy.ndarray, surface: str,
+    neighbors: numpy.ndarray, neighbor_inside: numpy.ndarray, local_neighbors: numpy.ndarray
+) -> bool:
+    """ Whether selecting the surface type from the face's first triangle gives exactly the face """
+    edge_mask = mesh.edgeMasks()[surface][ids]
+    leaving = edge_mask & ~neighbor_inside
+
+    if surface == 'planar':
+        normal = mesh.topology.normals[ids[0]]
+        normals = mesh.topology.normals
+
+        # The face has to be close enough to its first triangle, and the selection stops at the
+        # neighbors that aren't
+        if not (numpy.dot(normals[ids], normal) >= math.cos(mesh.PLANAR_ANGLE)).all():
+            return False
+        leaving[leaving] = numpy.dot(normals[neighbors[leaving]], normal) >= math.cos(mesh.PLANAR_ANGLE)
+
+    # The region would grow past the face
+    if leaving.any():
+        return False
+
+    # The face is more than one region
+    return connectedComponents(local_neighbors, edge_mask & neighbor_inside).max() == 0
+
+
+def _faceAxis(mesh: InteractiveMesh, surface: str, ids: numpy.ndarray) -> Optional[Tuple[numpy.ndarray, numpy.ndarray]]:
+    if surface == 'planar':
+        return planarAxis(mesh.topology, ids)
+    return rotationAxis(mesh.topology, ids)
+
+
+def connectedComponents(neighbors: numpy.ndarray, edge_mask: numpy.ndarray) -> numpy.ndarray:
+    """
+    Labels the connected components of the triangle graph made of the masked edges,
+    0 to R - 1 in order of each component's lowest triangle id
+    """
+    triangle_count = len(neighbors)
+
+    first, edge = numpy.nonzero(edge_mask)
+    second = neighbors[first, edge]
+
+    # Every edge is in the mask twice, once from each side
+    keep = first < second
+    first = first[keep].astype(numpy.int32)
+    second = second[keep]
+
+    # Hook the higher root onto the lower one until no edge joins two trees,
+    # flattening the trees after every round
+    parent = numpy.arange(triangle_count, dtype=numpy.int32)
+
+    while len(first) > 0:
+        root_first = parent[first]
+        root_second = parent[second]
+
+        joined = root_first != root_second
+        if not joined.any():
+            break
+
+        first = first[joined]
+        second = second[joined]
+        low = numpy.minimum(root_first[joined], root_second[joined])
+        high = numpy.maximum(root_first[joined], root_second[joined])
+
+        numpy.minimum.at(parent, high, low)
+
+        while True:
+            grandparent = parent[parent]
+            if numpy.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+    _, labels = numpy.unique(parent, return_inverse=True)
+
+    return labels.astype(numpy.int32)
@@ -17,30 +17,31 @@ class LoadArrow(LoadToolHandle):
 
         super().buildMesh()
 
-        start = Vector(0, 0, 0)
-
-        if pull:
-            self.direction = -self.direction
-        else:
-            start -= LoadToolHandle.ARROW_TOTAL_LENGTH * self.direction
-
-        mb = self._arrow(
-            start,
-            LoadToolHandle.ARROW_TAIL_WIDTH,
-            LoadToolHandle.ARROW_TAIL_LENGTH,
-            LoadToolHandle.ARROW_HEAD_WIDTH,
-            self._y_axis_color
-        )
-        self.setSolidMesh(mb.build())
-
-        mb = self._arrow(
-            start,
-            LoadToolHandle.ACTIVE_ARROW_TAIL_WIDTH,
-            LoadToolHandle.ACTIVE_ARROW_TAIL_LENGTH,
-            LoadToolHandle.ACTIVE_ARROW_HEAD_WIDTH,
-            ToolHandle.YAxisSelectionColor
-        )
-        self.setSelectionMesh(mb.build())
+        # The meshes are shared by all arrows, they point along X and the
+        # arrow is turned through its transform from there
+        self.direction = Vector.Unit_X if pull else -Vector.Unit_X
+
+        self.setSolidMesh(LoadToolHandle.templateMesh(
+            ("arrow_solid", pull),
+            lambda: self._arrow(
+                pull,
+                LoadToolHandle.ARROW_TAIL_WIDTH,
+                LoadToolHandle.ARROW_TAIL_LENGTH,
+                LoadToolHandle.ARROW_HEAD_WIDTH,
+                self._y_axis_color
+            ).build()
+        ))
+
+        self.setSelectionMesh(LoadToolHandle.templateMesh(
+            ("arrow_selection", pull),
+            lambda: self._arrow(
+                pull,
+                LoadToolHandle.ACTIVE_ARROW_TAIL_WIDTH,
+                LoadToolHandle.ACTIVE_ARROW_TAIL_LENGTH,
+                LoadToolHandle.ACTIVE_ARROW_HEAD_WIDTH,
+                ToolHandle.YAxisSelectionColor
+            ).build()
+        ))
 
     @property
     def headPosition(self):
@@ -50,20 +51,28 @@ class LoadArrow(LoadToolHandle):
     def tailPosition(self):
         return self.getPosition() - self.direction * self.ARROW_TOTAL_LENGTH
 
-    def _arrow(self, start: Vector, tail_width, tail_length, head_width, color) -> MeshBuilder:
+    @staticmethod
+    def _arrow(pull: bool, tail_width, tail_length, head_width, color) -> MeshBuilder:
 
         mb = MeshBuilder()
 
+        # A pulling arrow starts at the origin, a pushing one ends there
+        direction = Vector.Unit_X if pull else -Vector.Unit_X
+
+        start = Vector(0, 0, 0)
+        if not pull:
+            start -= LoadToolHandle.ARROW_TOTAL_LENGTH * direction
+
         p_head = Vector(
-            start.x + self.direction.x * LoadToolHandle.ARROW_TOTAL_LENGTH,
-            start.y + self.direction.y * LoadToolHandle.ARROW_TOTAL_LENGTH,
-            start.z + self.direction.z * LoadToolHandle.ARROW_TOTAL_LENGTH
+            start.x + direction.x * LoadToolHandle.ARROW_TOTAL_LENGTH,
+            start.y + direction.y * LoadToolHandle.ARROW_TOTAL_LENGTH,
+            start.z + direction.z * LoadToolHandle.ARROW_TOTAL_LENGTH
         )
 
         p_base0 = Vector(
-            start.x + self.direction.x * tail_length,
-            start.y + self.direction.y * tail_length,
-            start.z + self.direction.z * tail_length
+            start.x + direction.x * tail_length,
+            start.y + direction.y * tail_length,
+            start.z + direction.z * tail_length
         )
 
         p_tail0 = start
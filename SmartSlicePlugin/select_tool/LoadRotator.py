@@ -1,5 +1,6 @@
 from UM.Math.Vector import Vector
 from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Mesh.MeshData import MeshData
 from UM.Scene.ToolHandle import ToolHandle
 
 from .LoadToolHandle import LoadToolHandle
@@ -19,29 +20,37 @@ class LoadRotator(LoadToolHandle):
     def buildMesh(self):
         super().buildMesh()
 
+        self.setSolidMesh(LoadToolHandle.templateMesh(
+            "rotator_solid",
+            lambda: self._donut(
+                LoadToolHandle.INNER_RADIUS,
+                LoadToolHandle.OUTER_RADIUS,
+                LoadToolHandle.LINE_WIDTH,
+                self._y_axis_color
+            )
+        ))
+
+        self.setSelectionMesh(LoadToolHandle.templateMesh(
+            "rotator_selection",
+            lambda: self._donut(
+                LoadToolHandle.ACTIVE_INNER_RADIUS,
+                LoadToolHandle.ACTIVE_OUTER_RADIUS,
+                LoadToolHandle.ACTIVE_LINE_WIDTH,
+                ToolHandle.YAxisSelectionColor
+            )
+        ))
+
+    @staticmethod
+    def _donut(inner_radius, outer_radius, width, color) -> MeshData:
+        # Always built around Z, the rotator is turned through its transform
         mb = MeshBuilder()
 
-        #SOLIDMESH
         mb.addDonut(
-            inner_radius = LoadToolHandle.INNER_RADIUS,
-            outer_radius = LoadToolHandle.OUTER_RADIUS,
-            width = LoadToolHandle.LINE_WIDTH,
-            axis = self.rotation_axis,
-            color = self._y_axis_color
+            inner_radius = inner_radius,
+            outer_radius = outer_radius,
+            width = width,
+            axis = Vector.Unit_Z,
+            color = color
         )
 
-        self.setSolidMesh(mb.build())
-
-        mb = MeshBuilder()
-
-        #SELECTIONMESH
-        mb.addDonut(
-            inner_radius = LoadToolHandle.ACTIVE_INNER_RADIUS,
-            outer_radius = LoadToolHandle.ACTIVE_OUTER_RADIUS,
-            width = LoadToolHandle.ACTIVE_LINE_WIDTH,
-            axis = self.rotation_axis,
-            color = ToolHandle.YAxisSelectionColor
-        )
-
-        self.setSelectionMesh(mb.build())
-
+        return mb.build()
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Callable, Optional
 
 from UM.Math.Color import Color
 from UM.Scene.ToolHandle import ToolHandle
@@ -27,6 +27,10 @@ class LoadToolHandle(ToolHandle):
     ACTIVE_OUTER_RADIUS = OUTER_RADIUS + PADDING
     ACTIVE_LINE_WIDTH = LINE_WIDTH + PADDING
 
+    # Tool meshes are the same for every handle of a kind, so they are built once per
+    # process and shared. MeshData is immutable, the handles are oriented by their transform.
+    _template_meshes = {}
+
     def __init__(self, parent = None, name: str = ""):
         super().__init__(parent)
         self._auto_scale = False
@@ -58,6 +62,14 @@ class LoadToolHandle(ToolHandle):
             self.AllAxis: self._all_axis_color
         }
 
+    @staticmethod
+    def templateMesh(key, build: Callable[[], MeshData]) -> MeshData:
+        mesh = LoadToolHandle._template_meshes.get(key)
+        if mesh is None:
+            mesh = build()
+            LoadToolHandle._template_meshes[key] = mesh
+        return mesh
+
     # We need to override this to not show the Tool handle in the Preview stage
     # For some reason, SimulationView does not check visibility of meshes for ToolHandles before
     # it renders them. This will cause RenderBatch to throw warnings of empty meshes
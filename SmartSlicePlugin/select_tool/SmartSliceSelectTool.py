@@ -23,6 +23,7 @@ from UM.PluginRegistry import PluginRegistry
 from UM.View.SelectionPass import SelectionPass
 
 from ..stage import SmartSliceScene
+from ..geometry.InteractiveMesh import Face
 from ..utils import getPrintableNodes
 from ..utils import findChildSceneNode
 from ..utils import angleBetweenVectors
@@ -140,7 +141,7 @@ class SmartSliceSelectTool(Tool):
         self,
         current_surface : Tuple[SceneNode, int],
         surface_type : SmartSliceScene.HighlightFace.SurfaceType
-    ) -> Tuple[pywim.geom.tri.Face, pywim.geom.Vector]:
+    ) -> Tuple[Face, pywim.geom.Vector]:
 
         if current_surface is None:
             current_surface = Selection.getSelectedFace()
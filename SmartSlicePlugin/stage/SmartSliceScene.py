@@ -1,4 +1,4 @@
-from typing import List, Any, Union
+from typing import List, Any, Optional, Tuple, Union
 from enum import Enum
 
 import math
@@ -6,7 +6,7 @@ import time
 
 from UM.Job import Job
 from UM.Logger import Logger
-from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Mesh.MeshData import MeshData
 from UM.Message import Message
 from UM.Math.Color import Color
 from UM.Math.Vector import Vector
@@ -21,6 +21,11 @@ from UM.Application import Application
 from UM.i18n import i18nCatalog
 
 from ..utils import makeInteractiveMesh, getPrintableNodes, angleBetweenVectors
+from ..utils import getMeshCache, interactiveMeshCacheKey
+from ..geometry.MeshTopology import MeshTopology
+from ..geometry.InteractiveMesh import InteractiveMesh, Face, makeAxis
+from ..geometry.Segmentation import SurfaceSegmentation, classifyFace
+from ..geometry.MeshWorker import analyzeInProcess
 from ..select_tool.LoadArrow import LoadArrow
 from .. select_tool.LoadRotator import LoadRotator
 from .. select_tool.LoadToolHandle import LoadToolHandle
@@ -105,7 +110,7 @@ class HighlightFace(SceneNode):
     def __init__(self, name: str = ""):
         super().__init__(name=name, visible=True)
 
-        self.face = pywim.geom.tri.Face()
+        self.face = Face()
         self._surface_type = self.SurfaceType.Flat
         self.axis = None #pywim.geom.vector
         self.selection = None
@@ -131,35 +136,31 @@ class HighlightFace(SceneNode):
         pass
 
     def getTriangleIndices(self) -> List[int]:
-        return [t.id for t in self.face.triangles]
+        return self.face.ids.tolist()
 
     def getTriangles(self):
         return self.face.triangles
 
     def clearSelection(self):
-        self.face = pywim.geom.tri.Face()
+        self.face = Face()
         self.axis = None
         super().setMeshData(None)
 
     def setMeshDataFromPywimTriangles(
-        self, face: pywim.geom.tri.Face,
+        self, face: Face,
         axis: pywim.geom.Vector = None
     ):
 
-        if len(face.triangles) == 0:
+        if len(face) == 0:
             return
 
         self.face = face
         self.axis = axis
 
-        mb = MeshBuilder()
+        # Read-only arrays gathered from the interactive mesh, MeshData keeps them without a copy
+        vertices, normals = self.face.vertex_arrays()
 
-        for tri in self.face.triangles:
-            mb.addFace(tri.v1, tri.v2, tri.v3)
-
-        mb.calculateNormals()
-
-        self.setMeshData(mb.build())
+        self.setMeshData(MeshData(vertices=vertices, normals=normals))
 
         self._setupTools()
 
@@ -191,7 +192,7 @@ class AnchorFace(HighlightFace):
         return anchor
 
     def setMeshDataFromPywimTriangles(
-        self, tris: List[pywim.geom.tri.Triangle],
+        self, tris: Face,
         axis: pywim.geom.Vector = None
     ):
         axis = None
@@ -237,7 +238,7 @@ class LoadFace(HighlightFace):
             self.enableRotatorIfNeeded()
 
     def setMeshDataFromPywimTriangles(
-        self, tris: List[pywim.geom.tri.Triangle],
+        self, tris: Face,
         axis: pywim.geom.Vector = None
     ):
 
@@ -441,10 +442,16 @@ class Root(SceneNode):
 
         self._interactive_mesh = None
         self._mesh_analyzing_message = None
+        self._mesh_analysis_job = None
+        self._watched_parent = None
 
     def initialize(self, parent: SceneNode, step=None, callback=None):
         parent.addChild(self)
 
+        # Any analysis in progress is for a mesh we no longer belong to / that no longer exists
+        self.parentChanged.connect(self._onParentChanged)
+        self._watchParent(parent)
+
         mesh_data = parent.getMeshData()
 
         if mesh_data:
@@ -452,33 +459,97 @@ class Root(SceneNode):
 
             if mesh_data.getVertexCount() < 1000:
                 self._interactive_mesh = makeInteractiveMesh(mesh_data)
+                self._interactive_mesh.segmentation = SurfaceSegmentation(self._interactive_mesh).compute()
                 if step:
                     self.loadStep(step)
                     self.setOrigin()
                 if callback:
                     callback()
             else:
-                job = AnalyzeMeshJob(mesh_data, step, callback)
-                job.finished.connect(self._process_mesh_analysis)
-
-                self._mesh_analyzing_message = Message(
-                    title=i18n_catalog.i18n("Smart Slice"),
-                    text=i18n_catalog.i18n("Analyzing geometry - this may take a few moments"),
-                    progress=-1,
-                    dismissable=False,
-                    lifetime=0,
-                    use_inactivity_timer=False
-                )
-                self._mesh_analyzing_message.show()
-
-                job.start()
+                self._analyzeMesh(mesh_data, step, callback)
 
         self.rootChanged.emit(self)
 
+    def _analyzeMesh(self, mesh_data, step=None, callback=None):
+        self._cancelMeshAnalysis()
+
+        self._mesh_analyzing_message = Message(
+            title=i18n_catalog.i18n("Smart Slice"),
+            text=i18n_catalog.i18n("Analyzing geometry - this may take a few moments"),
+            progress=0,
+            dismissable=False,
+            lifetime=0,
+            use_inactivity_timer=False
+        )
+        self._mesh_analyzing_message.show()
+
+        use_process = Application.getInstance().getPreferences().getValue(AnalyzeMeshJob.process_preference)
+
+        self._mesh_analysis_job = AnalyzeMeshJob(mesh_data, step, callback, self._mesh_analyzing_message, bool(use_process))
+        self._mesh_analysis_job.finished.connect(self._process_mesh_analysis)
+        self._mesh_analysis_job.start()
+
+    def _cancelMeshAnalysis(self):
+        job = self._mesh_analysis_job
+        self._mesh_analysis_job = None
+
+        if job:
+            Logger.log('d', 'Cancelling stale mesh analysis')
+            job.cancel()
+            job.canceled = True
+
+        if self._mesh_analyzing_message:
+            self._mesh_analyzing_message.hide()
+            self._mesh_analyzing_message = None
+
+    def _watchParent(self, parent: Optional[SceneNode]):
+        # Only stay connected to the mesh we belong to, so removed meshes don't keep us alive or call us
+        if parent is self._watched_parent:
+            return
+
+        if self._watched_parent:
+            self._watched_parent.parentChanged.disconnect(self._onParentChanged)
+            self._watched_parent.meshDataChanged.disconnect(self._onParentMeshDataChanged)
+
+        self._watched_parent = parent
+
+        if parent:
+            parent.parentChanged.connect(self._onParentChanged)
+            parent.meshDataChanged.connect(self._onParentMeshDataChanged)
+
+    def _onParentChanged(self, node: SceneNode):
+        # Either we were removed from our mesh (also how we're torn down), or the mesh was removed from the scene
+        parent = self.getParent()
+        self._watchParent(parent)
+
+        if self._mesh_analysis_job and (parent is None or parent.getParent() is None):
+            self._cancelMeshAnalysis()
+
+    def _onParentMeshDataChanged(self, node: SceneNode):
+        # Mesh data changes of our own children bubble up through the parent, only react to the parent's mesh
+        parent = self.getParent()
+        if node is not parent or parent is None:
+            return
+
+        job = self._mesh_analysis_job
+        if job and job.mesh_data is not parent.getMeshData():
+            self._interactive_mesh = None
+            if parent.getMeshData():
+                self._analyzeMesh(parent.getMeshData(), job.step, job.callback)
+            else:
+                self._cancelMeshAnalysis()
+
     def _process_mesh_analysis(self, job : "AnalyzeMeshJob"):
+        # A newer analysis replaced this one
+        if job.canceled or job is not self._mesh_analysis_job:
+            return
+
+        self._mesh_analysis_job = None
+
         self._interactive_mesh = job.interactive_mesh
         if self._mesh_analyzing_message:
             self._mesh_analyzing_message.hide()
+            self._mesh_analyzing_message = None
 
         exc = job.getError()
 
@@ -496,7 +567,7 @@ class Root(SceneNode):
             if job.callback:
                 job.callback()
 
-    def getInteractiveMesh(self) -> pywim.geom.tri.Mesh:
+    def getInteractiveMesh(self) -> InteractiveMesh:
         return self._interactive_mesh
 
     def addFace(self, bc):
@@ -515,14 +586,9 @@ class Root(SceneNode):
             face = AnchorFace(str(bc.name))
             face.selection = (selected_node, bc.face[0])
 
+            axis = None
             if len(selected_face.triangles) > 0:
-                face.surface_type = self._guessSurfaceTypeFromTriangles(selected_face)
-
-                axis = None
-                if face.surface_type == HighlightFace.SurfaceType.Flat:
-                    axis = selected_face.planar_axis()
-                elif face.surface_type != face.SurfaceType.Unknown:
-                    axis = selected_face.rotation_axis()
+                face.surface_type, axis = self._guessSurfaceTypeFromTriangles(selected_face)
 
             face.setMeshDataFromPywimTriangles(selected_face, axis)
             face.disableTools()
@@ -569,14 +635,9 @@ class Root(SceneNode):
                 origin[2]
             )
 
+            axis = None
             if len(selected_face.triangles) > 0:
-                face.surface_type = self._guessSurfaceTypeFromTriangles(selected_face)
-
-                axis = None
-                if face.surface_type == HighlightFace.SurfaceType.Flat:
-                    axis = selected_face.planar_axis()
-                elif face.surface_type != face.SurfaceType.Unknown:
-                    axis =selected_face.rotation_axis()
+                face.surface_type, axis = self._guessSurfaceTypeFromTriangles(selected_face)
 
                 face.force.setFromVectorAndAxis(rotated_load, axis)
 
@@ -630,22 +691,21 @@ class Root(SceneNode):
         camTool = controller.getCameraTool()
         camTool.setOrigin(self.getParent().getBoundingBox().center)
 
-    def _guessSurfaceTypeFromTriangles(self, face: pywim.geom.tri.Face) -> HighlightFace.SurfaceType:
+    def _guessSurfaceTypeFromTriangles(self, face: Face) -> Tuple[HighlightFace.SurfaceType, pywim.geom.Vector]:
         """
-            Attempts to determine the face type from a pywim face
-            Will return Unknown if it cannot determine the type
+            Attempts to determine the face type from an interactive mesh face, along with
+            the axis fitted to it. Will return Unknown and no axis if it cannot determine the type
         """
-        triangle_list = list(face.triangles)
-        if not face.triangles:
-            return HighlightFace.SurfaceType.Unknown
-        elif len(self._interactive_mesh.select_planar_face(triangle_list[0]).triangles) == len(face.triangles):
-            return HighlightFace.SurfaceType.Flat
-        elif len(self._interactive_mesh.select_concave_face(triangle_list[0]).triangles) == len(face.triangles):
-            return HighlightFace.SurfaceType.Concave
-        elif len(self._interactive_mesh.select_convex_face(triangle_list[0]).triangles) == len(face.triangles):
-            return HighlightFace.SurfaceType.Convex
-
-        return HighlightFace.SurfaceType.Unknown
+        surface, axis = classifyFace(self._interactive_mesh, face)
+
+        if surface == 'planar':
+            return HighlightFace.SurfaceType.Flat, makeAxis(axis)
+        elif surface == 'concave':
+            return HighlightFace.SurfaceType.Concave, makeAxis(axis)
+        elif surface == 'convex':
+            return HighlightFace.SurfaceType.Convex, makeAxis(axis)
+
+        return HighlightFace.SurfaceType.Unknown, None
 
     # Removes any defined faces
     def clearFaces(self):
@@ -655,15 +715,120 @@ class Root(SceneNode):
 
 
 class AnalyzeMeshJob(Job):
-    def __init__(self, mesh_data, step, callback):
+    """
+    Builds the interactive mesh (or loads it from the mesh cache) in phases. Progress is
+    reported to the given message, and canceled is checked in between every phase.
+    With use_process the phases run in a worker process instead, falling back to this
+    thread if the worker can't be used.
+    """
+
+    process_preference = "smartslice/analyze_mesh_in_process"
+
+    # Share of the total progress of every phase
+    PHASES = (
+        ("ingest", 5),
+        ("normals", 10),
+        ("adjacency", 25),
+        ("edges", 15),
+        ("planar", 15),
+        ("concave", 15),
+        ("convex", 15),
+    )
+
+    def __init__(self, mesh_data, step, callback, message: Message = None, use_process: bool = False):
         super().__init__()
         self.mesh_data = mesh_data
         self.step = step
         self.callback = callback
         self.interactive_mesh = None
+        self.cache_key = None
+        self.canceled = False
+        self.use_process = use_process
+
+        self._message = message
+        self._progress = 0
 
     def run(self):
-        # Sleep for a second to allow the UI to catch up (hopefully) and display the progress message
-        time.sleep(1)
-        self.interactive_mesh = makeInteractiveMesh(self.mesh_data)
+        start = time.time()
+
+        try:
+            self.cache_key = interactiveMeshCacheKey(self.mesh_data)
+            self.interactive_mesh = getMeshCache().load(self.cache_key)
+        except Exception:
+            Logger.logException("w", "Unable to read the interactive mesh cache")
+
+        if self.interactive_mesh:
+            Logger.log("d", "Loaded interactive mesh {} from cache".format(self.cache_key))
+            self._setProgress(100)
+            return
+
+        mesh = None
+
+        if self.use_process:
+            try:
+                mesh = analyzeInProcess(
+                    self.mesh_data.getVertices(), self.mesh_data.getIndices(),
+                    progress=self._finishedPhase,
+                    should_stop=lambda: self.canceled
+                )
+            except Exception:
+                Logger.logException("w", "Unable to analyze the mesh in a worker process, analyzing it in Cura instead")
+                self._setProgress(0)
+
+        if mesh is None and not self.canceled:
+            mesh = self._analyze()
+
+        if mesh is None:
+            Logger.log("d", "Mesh analysis canceled")
+            return
+
+        self.interactive_mesh = mesh
+
+        Logger.log("d", "Analyzed interactive mesh with {} triangles in {:.2f} s".format(
+            mesh.triangle_count, time.time() - start
+        ))
+
+        if self.cache_key:
+            try:
+                getMeshCache().save(self.cache_key, mesh)
+            except Exception:
+                Logger.logException("w", "Unable to store the interactive mesh in the cache")
+
+    def _analyze(self) -> InteractiveMesh:
+        topology = None
+        mesh = None
+        segmentation = None
+
+        for phase, _ in self.PHASES:
+            if self.canceled:
+                return None
+
+            if phase == "ingest":
+                topology = MeshTopology.fromMeshData(self.mesh_data)
+            elif phase == "normals":
+                topology.computeNormals()
+            elif phase == "adjacency":
+                topology.computeAdjacency()
+                mesh = InteractiveMesh(topology)
+                segmentation = SurfaceSegmentation(mesh)
+            elif phase == "edges":
+                mesh.edgeMasks()
+            else:
+                segmentation.computeSurface(phase)
+
+            self._finishedPhase(phase)
+
+            # Give the UI thread a chance to draw the progress
+            Job.yieldThread()
+
+        mesh.segmentation = segmentation
+
+        return mesh
+
+    def _finishedPhase(self, phase: str):
+        self._setProgress(self._progress + dict(self.PHASES).get(phase, 0))
 
+    def _setProgress(self, progress: int):
+        self._progress = progress
+        if self._message:
+            self._message.setProgress(progress)
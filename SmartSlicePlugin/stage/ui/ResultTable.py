@@ -80,6 +80,12 @@ class ResultTableData(QAbstractListModel):
             if rank - 1 == requested_result:
                 row = rank - 1
 
+        # None of the results met the requirements, the table stays empty
+        if len(self._resultsDict) == 0:
+            self.selectedRow = 0
+            self.resultsUpdated.emit()
+            return
+
         self.beginInsertRows(QModelIndex(), 0, len(self._resultsDict) - 1)
         self.endInsertRows()
 
@@ -159,7 +165,7 @@ class ResultTableData(QAbstractListModel):
     @pyqtSlot(int)
     def sortByColumn(self, column=0, order=None):
 
-        if column >= ResultsTableHeader.numRoles():
+        if column >= ResultsTableHeader.numRoles() or len(self._resultsDict) == 0:
             return
 
         if order is None:
@@ -209,6 +215,21 @@ class ResultTableData(QAbstractListModel):
     def previewClicked(self):
         Application.getInstance().getController().setActiveStage("PreviewStage")
 
+    @classmethod
+    def feasibleAnalyses(
+        self, analyses: List[pywim.smartslice.result.Analysis], target_safety_factor: float, max_displacement: float
+    ) -> List[pywim.smartslice.result.Analysis]:
+        """
+        The analyses that meet the requirements, in the order of their rank. The analyses come
+        ranked by the optimization objective, which the job doesn't carry, so the server's order
+        is kept - sorting by the margins to the requirements would put the objective second.
+        """
+        return [
+            analysis for analysis in analyses
+            if analysis.structural.min_safety_factor >= target_safety_factor and
+                analysis.structural.max_displacement <= max_displacement
+        ]
+
     @classmethod
     def analysisToResultDict(self, rank, result: pywim.smartslice.result.Analysis):
         material_data = self.calculateAdditionalMaterialInfo(result)
@@ -119,6 +119,12 @@ MouseArea {
                         visible: true
 
                         states: [
+                            State {
+                                name: "offline"
+                                when: smartSliceMain.api.badCredentials == false && smartSliceMain.api.connectionState == "offline"
+
+                                PropertyChanges { target: statusText; text: "Unable to reach Smart Slice, check your connection" }
+                            },
                             State {
                                 name: "noStatus"
                                 when: smartSliceMain.api.badCredentials == false
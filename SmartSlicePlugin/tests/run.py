@@ -51,6 +51,17 @@ class SmartSliceLoads(_SmartSliceTestCase):
         self.assertIsNotNone(path)
 
 from test_API import *
+from test_ChunkedUpload import *
+from test_JobPackage import *
+from test_Compression import *
+from test_ZipStream import *
+from test_JobScheduler import *
+from test_ResultCache import *
+from test_InFlightJobs import *
+from test_MeshTopology import *
+from test_Segmentation import *
+from test_MeshCache import *
+from test_MeshWorker import *
 
 if __name__ == "__main__":
     app = cura_app_mock()
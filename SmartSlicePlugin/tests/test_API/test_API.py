@@ -1,3 +1,4 @@
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -84,6 +85,31 @@ class test_API(_SmartSliceTestCase):
     def tearDown(self):
         pass
 
+    # The calls run in the background and their outcomes are handled on the UI thread
+    def waitFor(self, condition, timeout=10.):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail("Timed out waiting for the API call")
+            time.sleep(0.05)
+
+    def checkToken(self):
+        self._api._authenticating = True
+        self._api._checkToken()
+        self.waitFor(lambda: not self._api._authenticating)
+
+    def login(self):
+        self._api._authenticating = True
+        self.assertTrue(self._api._login())
+        self.waitFor(lambda: not self._api._authenticating)
+
+    def subscription(self):
+        received = self._api.connector.subscriptionReceived.emit
+        received.reset_mock()
+        self._api.requestSubscription()
+        self.waitFor(lambda: received.called)
+        return self._api.subscriptionFrom(*received.call_args[0])
+
     def test_0_check_token_create(self):
         self._api._token = "good"
         self._api._createTokenFile()
@@ -95,13 +121,15 @@ class test_API(_SmartSliceTestCase):
         self.assertEqual(self._api._token, "good")
 
     def test_1_check_token_good(self):
-        self._api._checkToken()
+        self._api._token = "good"
+        self.checkToken()
 
         self.assertEqual(self._api._client._token, "good")
+        self.assertTrue(self._api.logged_in)
 
     def test_2_check_token_bad(self):
         self._api._token = None
-        self._api._checkToken()
+        self.checkToken()
 
         self.assertNotEqual(self._api._client._token, "good")
 
@@ -111,7 +139,7 @@ class test_API(_SmartSliceTestCase):
 
         self.assertFalse(self._api.logged_in)
 
-        self._api._login()
+        self.login()
 
         self.assertFalse(self._api.badCredentials)
         self.assertEqual(self._api._login_password, "")
@@ -123,7 +151,7 @@ class test_API(_SmartSliceTestCase):
         self._api._login_username = "bad"
         self._api._login_password = "nopass"
 
-        self._api._login()
+        self.login()
 
         self.assertTrue(self._api.badCredentials)
         self.assertEqual(self._api._login_password, "")
@@ -135,13 +163,15 @@ class test_API(_SmartSliceTestCase):
         self._api._login_username = "good@email.com"
         self._api._login_password = "goodpass"
         self._api._client._active_connection = False
+        self._api._connectivity.recordTransportError()
 
-        self._api._login()
+        self.login()
 
         self.assertIsNotNone(self._api._error_message)
         self.assertEqual(self._api._error_message.getText(), "Internet connection issue:\nPlease check your connection and try again.")
         self.assertTrue(self._api._error_message.visible)
         self.assertFalse(self._api.logged_in)
+        self.assertEqual(self._api.connectionState, "offline")
 
     def test_6_logout(self):
         self._api._token = "good"
@@ -157,14 +187,14 @@ class test_API(_SmartSliceTestCase):
     def test_7_subscription_active(self):
         self._api._client._subscription = True
 
-        subscription = self._api.getSubscription()
+        subscription = self.subscription()
 
         self.assertEqual(subscription, "active")
 
     def test_8_subscription_inactive(self):
         self._api._client._subscription = False
 
-        subscription = self._api.getSubscription()
+        subscription = self.subscription()
 
         self.assertEqual(subscription, "inactive")
 
@@ -0,0 +1,130 @@
+import hashlib
+import re
+import unittest
+
+import requests
+
+from SmartSlicePlugin.cloud.ChunkedUpload import ChunkedUpload, ChunkedUploadCanceled, ChunkedUploadError
+
+class MockResponse():
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = dict(headers or {})
+
+class MockChunkServer():
+    """ Keeps the chunks like the geometry endpoint, optionally losing the reply to some of them """
+    def __init__(self, received=b"", drop=()):
+        self.received = bytearray(received)
+        self.drop = set(drop)
+        self.puts = 0
+        self.heads = 0
+
+    def put(self, url, data=None, headers=None, timeout=None):
+        self.puts += 1
+
+        first, last, total = re.match(r"bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)", headers["Content-Range"]).groups()
+        if first is not None and int(first) == len(self.received):
+            self.received += data
+
+        if self.puts in self.drop:
+            raise requests.ConnectionError("Dropped")
+
+        if total != "*" and len(self.received) == int(total):
+            digest = headers.get(ChunkedUpload.DIGEST_HEADER)
+            if digest and digest != "sha-256=" + hashlib.sha256(self.received).hexdigest():
+                self.received = bytearray()
+                return MockResponse(409)
+            return MockResponse(201)
+
+        return MockResponse(308, {ChunkedUpload.OFFSET_HEADER: str(len(self.received))})
+
+    def head(self, url, headers=None, timeout=None):
+        self.heads += 1
+        return MockResponse(404, {ChunkedUpload.OFFSET_HEADER: str(len(self.received))})
+
+class ChunkedUploadTest(unittest.TestCase):
+    def setUp(self):
+        self.payload = bytes(range(256)) * 40
+        ChunkedUpload.RETRY_DELAY = 0.
+
+    def test_upload_in_chunks(self):
+        server = MockChunkServer()
+        reports = []
+
+        upload = ChunkedUpload(
+            "url", self.payload, chunk_size=1000, session=server,
+            progress=lambda sent, total, throughput: reports.append((sent, total))
+        )
+        response = upload.upload()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(bytes(server.received), self.payload)
+        self.assertEqual(server.puts, 11)
+        self.assertEqual(reports[-1], (len(self.payload), len(self.payload)))
+
+    def test_resume_from_offset(self):
+        server = MockChunkServer(self.payload[:2500])
+
+        response = ChunkedUpload("url", self.payload, chunk_size=1000, session=server).upload(2500)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(bytes(server.received), self.payload)
+        self.assertEqual(server.puts, 8)
+
+    def test_resume_after_connection_error(self):
+        server = MockChunkServer(drop=(3,))
+
+        response = ChunkedUpload("url", self.payload, chunk_size=1000, session=server).upload()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(bytes(server.received), self.payload)
+        self.assertEqual(server.heads, 1)
+
+    def test_resume_generator_within_pending_chunk(self):
+        server = MockChunkServer(drop=(2,))
+        chunks = (self.payload[i:i + 700] for i in range(0, len(self.payload), 700))
+
+        response = ChunkedUpload("url", chunks, chunk_size=1000, session=server).upload()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(bytes(server.received), self.payload)
+
+    def test_server_offset_mismatch(self):
+        # The server has less than the client assumed and tells it where to continue
+        server = MockChunkServer(self.payload[:1500])
+
+        response = ChunkedUpload("url", self.payload, chunk_size=1000, session=server).upload(3000)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(bytes(server.received), self.payload)
+
+    def test_resume_on_other_bytes_is_rejected(self):
+        server = MockChunkServer(b"\xff" * 2500)
+        upload = ChunkedUpload("url", self.payload, chunk_size=1000, session=server)
+
+        self.assertEqual(upload.upload(2500).status_code, 409)
+
+        self.assertEqual(upload.upload(0).status_code, 201)
+        self.assertEqual(bytes(server.received), self.payload)
+
+    def test_generator_cannot_rewind(self):
+        server = MockChunkServer()
+        chunks = (self.payload[i:i + 1000] for i in range(0, len(self.payload), 1000))
+        upload = ChunkedUpload("url", chunks, chunk_size=1000, session=server)
+        upload.upload()
+
+        with self.assertRaises(ChunkedUploadError):
+            upload.upload(0)
+
+    def test_cancel(self):
+        server = MockChunkServer()
+        calls = []
+
+        def should_stop():
+            calls.append(None)
+            return len(calls) > 2
+
+        with self.assertRaises(ChunkedUploadCanceled):
+            ChunkedUpload("url", self.payload, chunk_size=1000, session=server, should_stop=should_stop).upload()
+
+        self.assertEqual(len(server.received), 2000)
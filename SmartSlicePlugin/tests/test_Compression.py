@@ -0,0 +1,59 @@
+import unittest
+
+import numpy
+
+from SmartSlicePlugin.cloud.Compression import CompressionPolicy, CompressionSelector, compressionFor
+from SmartSlicePlugin.cloud.JobPackage import JobPackage
+from SmartSlicePlugin.cloud.ThreeMF import ThreeMFObject
+
+def make_package(seed=0):
+    random = numpy.random.RandomState(seed)
+    return JobPackage([ThreeMFObject("part", random.rand(2000, 3), random.randint(0, 2000, (3000, 3)))], "{}")
+
+class CompressionSelectorTest(unittest.TestCase):
+    def test_fixed_policy(self):
+        selector = CompressionSelector(CompressionPolicy.max)
+
+        self.assertEqual(selector.compression(make_package()), compressionFor(CompressionPolicy.max))
+        self.assertEqual(len(selector.choices()), 0)
+
+    def test_unmeasured_choice_is_kept(self):
+        selector = CompressionSelector(CompressionPolicy.auto)
+        package = make_package()
+
+        first = selector.compression(package)
+        self.assertEqual(first, compressionFor(CompressionPolicy.default))
+
+        # A very slow link would favour another compression for new geometry only
+        selector.recordThroughput(100.)
+        self.assertEqual(selector.compression(package), first)
+        self.assertNotEqual(selector.compression(make_package(1)), first)
+
+    def test_measured_choice_is_kept(self):
+        selector = CompressionSelector(CompressionPolicy.auto)
+        package = make_package()
+
+        selector.recordThroughput(100.)
+        first = selector.compression(package)
+
+        selector.recordThroughput(1.e12)
+        self.assertEqual(selector.compression(package), first)
+
+    def test_choices_restored(self):
+        selector = CompressionSelector(CompressionPolicy.auto)
+        selector.recordThroughput(100.)
+        first = selector.compression(make_package())
+
+        restored = CompressionSelector(CompressionPolicy.auto, dict(selector.choices(), other="unknown"))
+        restored.recordThroughput(1.e12)
+
+        self.assertEqual(restored.compression(make_package()), first)
+        self.assertEqual(restored.choices(), selector.choices())
+
+    def test_choices_bounded(self):
+        selector = CompressionSelector(CompressionPolicy.auto)
+        for seed in range(CompressionSelector.MAX_CHOICES + 3):
+            selector.compression(make_package(seed))
+
+        self.assertEqual(len(selector.choices()), CompressionSelector.MAX_CHOICES)
+        self.assertNotIn(make_package(0).geometry_hash, selector.choices())
@@ -0,0 +1,79 @@
+import unittest
+
+from SmartSlicePlugin.cloud.InFlightJobs import InFlightJobs
+
+class InFlightJobsTest(unittest.TestCase):
+    def setUp(self):
+        self.canceled = set()
+        self.jobs = InFlightJobs(lambda primary: primary not in self.canceled)
+
+    def test_first_job_is_primary(self):
+        self.assertIsNone(self.jobs.attach("hash", "a"))
+        self.assertIsNone(self.jobs.attach("hash", "a"))
+
+        self.assertEqual(self.jobs.primary("hash"), "a")
+        self.assertEqual(self.jobs.followers("a"), [])
+
+    def test_identical_jobs_follow(self):
+        self.jobs.attach("hash", "a")
+
+        self.assertEqual(self.jobs.attach("hash", "b"), "a")
+        self.assertEqual(self.jobs.attach("hash", "c"), "a")
+        self.assertIsNone(self.jobs.attach("other hash", "d"))
+
+        self.assertEqual(self.jobs.followers("a"), ["b", "c"])
+        self.assertEqual(self.jobs.followers("d"), [])
+
+    def test_detach(self):
+        self.jobs.attach("hash", "a")
+        self.jobs.attach("hash", "b")
+
+        self.assertEqual(self.jobs.detach("b"), "a")
+        self.assertIsNone(self.jobs.detach("b"))
+        self.assertIsNone(self.jobs.detach("a"))
+        self.assertEqual(self.jobs.followers("a"), [])
+
+    def test_release_returns_followers(self):
+        self.jobs.attach("hash", "a")
+        self.jobs.attach("hash", "b")
+        self.jobs.attach("hash", "c")
+
+        self.assertEqual(self.jobs.release("hash", "a"), ["b", "c"])
+        self.assertIsNone(self.jobs.primary("hash"))
+        self.assertEqual(self.jobs.followers("a"), [])
+        self.assertIsNone(self.jobs.detach("b"))
+
+        # The next identical job is in flight on its own
+        self.assertIsNone(self.jobs.attach("hash", "d"))
+
+    def test_release_only_by_primary(self):
+        self.jobs.attach("hash", "a")
+        self.jobs.attach("hash", "b")
+
+        self.assertEqual(self.jobs.release("hash", "b"), [])
+        self.assertEqual(self.jobs.primary("hash"), "a")
+        self.assertEqual(self.jobs.followers("a"), ["b"])
+
+    def test_canceled_primary_takes_no_followers(self):
+        self.jobs.attach("hash", "a")
+        self.jobs.attach("hash", "b")
+        self.canceled.add("a")
+
+        # The new job is submitted by itself, the canceled one keeps its follower
+        self.assertIsNone(self.jobs.attach("hash", "c"))
+        self.assertEqual(self.jobs.primary("hash"), "c")
+        self.assertEqual(self.jobs.attach("hash", "d"), "c")
+        self.assertEqual(self.jobs.followers("a"), ["b"])
+
+        self.assertEqual(self.jobs.release("hash", "a"), ["b"])
+        self.assertEqual(self.jobs.primary("hash"), "c")
+        self.assertEqual(self.jobs.followers("c"), ["d"])
+
+    def test_removed_primary(self):
+        self.jobs.attach("hash", "a")
+
+        self.assertTrue(self.jobs.remove("hash", "a"))
+        self.assertFalse(self.jobs.remove("hash", "a"))
+        self.assertIsNone(self.jobs.attach("hash", "b"))
+        self.assertEqual(self.jobs.release("hash", "a"), [])
+        self.assertEqual(self.jobs.primary("hash"), "b")
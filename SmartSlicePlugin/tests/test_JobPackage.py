@@ -0,0 +1,63 @@
+import unittest
+import zipfile
+
+import numpy
+
+from SmartSlicePlugin.cloud.Compression import ArchiveCompression
+from SmartSlicePlugin.cloud.JobPackage import JobPackage
+from SmartSlicePlugin.cloud.ThreeMF import ThreeMFObject
+
+def make_package(job_json="{}", metadata=None, seed=0):
+    random = numpy.random.RandomState(seed)
+    vertices = random.rand(300, 3)
+    indices = random.randint(0, 300, (500, 3))
+    return JobPackage([ThreeMFObject("part", vertices, indices)], job_json, metadata)
+
+class JobPackageBytesTest(unittest.TestCase):
+    def test_same_package_same_bytes(self):
+        self.assertEqual(make_package().threemf(), make_package().threemf())
+
+    def test_volatile_metadata_same_geometry(self):
+        first = make_package(metadata={"Application": "Cura", "CreationDate": "2020-01-01 10:00:00"})
+        second = make_package(metadata={"Application": "Cura", "CreationDate": "2020-01-01 10:00:01"})
+
+        self.assertEqual(first.geometry_hash, second.geometry_hash)
+        self.assertEqual(first.geometryThreemf(), second.geometryThreemf())
+        self.assertNotEqual(first.threemf(), second.threemf())
+
+    def test_stable_metadata_in_geometry_hash(self):
+        first = make_package(metadata={"Application": "Cura 4.7"})
+        second = make_package(metadata={"Application": "Cura 4.8"})
+
+        self.assertNotEqual(first.geometry_hash, second.geometry_hash)
+        self.assertNotEqual(first.geometryThreemf(), second.geometryThreemf())
+
+class JobPackageHashTest(unittest.TestCase):
+    def test_job_change_keeps_geometry_hash(self):
+        first = make_package('{"loads": [1]}')
+        second = make_package('{"loads": [2]}')
+
+        self.assertEqual(first.geometry_hash, second.geometry_hash)
+        self.assertNotEqual(first.job_hash, second.job_hash)
+
+    def test_canonical_job_json(self):
+        first = make_package('{"a": 1, "b": {"c": 2}}')
+        second = make_package('{ "b": {"c": 2},\n  "a": 1 }')
+
+        self.assertEqual(first.job_hash, second.job_hash)
+
+    def test_geometry_change(self):
+        first = make_package(seed=0)
+        second = make_package(seed=1)
+
+        self.assertNotEqual(first.geometry_hash, second.geometry_hash)
+        self.assertNotEqual(first.job_hash, second.job_hash)
+
+    def test_compression_not_hashed(self):
+        first = make_package()
+        second = make_package()
+        second.compression = ArchiveCompression(zipfile.ZIP_STORED)
+
+        self.assertEqual(first.geometry_hash, second.geometry_hash)
+        self.assertEqual(first.job_hash, second.job_hash)
+        self.assertNotEqual(first.geometryThreemf(), second.geometryThreemf())
@@ -0,0 +1,121 @@
+import time
+import unittest
+
+from SmartSlicePlugin.cloud.JobScheduler import JobScheduler, JobState
+
+class JobSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.started = []
+        self.changes = []
+        self.scheduler = JobScheduler(
+            self.started.append, 2, lambda job, state: self.changes.append((job, state))
+        )
+
+    def tearDown(self):
+        if self.scheduler._timer:
+            self.scheduler._timer.cancel()
+
+    def test_bounded_in_flight(self):
+        for job in ("a", "b", "c"):
+            self.scheduler.add(job)
+
+        self.assertEqual(self.started, ["a", "b"])
+        self.assertEqual(self.scheduler.state("c"), JobState.pending)
+
+        self.scheduler.finish("a")
+
+        self.assertEqual(self.started, ["a", "b", "c"])
+        self.assertIsNone(self.scheduler.state("a"))
+        self.assertIn(("a", JobState.finished), self.changes)
+
+    def test_priority_order(self):
+        self.scheduler.max_in_flight = 0
+        for job, priority in (("optimize", 1), ("validate", 0), ("optimize again", 1)):
+            self.scheduler.add(job, priority)
+
+        self.scheduler.max_in_flight = 1
+        self.scheduler.requeue("validate")
+
+        self.assertEqual(self.started, ["validate"])
+        self.assertEqual(self.scheduler.jobs(JobState.pending), ["optimize", "optimize again"])
+
+    def test_hold_blocks_dispatch(self):
+        self.scheduler.HOLD_DELAY = 60.
+        self.scheduler.add("a")
+        self.scheduler.add("b")
+        self.scheduler.add("c")
+
+        self.scheduler.hold("a")
+
+        self.assertEqual(self.scheduler.state("a"), JobState.held)
+        self.assertEqual(self.scheduler.inFlight, 1)
+        self.assertEqual(self.started, ["a", "b"])
+
+        # One of ours ended, the API's queue has room again
+        self.scheduler.finish("b")
+
+        self.assertEqual(self.started, ["a", "b", "a", "c"])
+
+    def test_hold_delay_doubles(self):
+        self.scheduler.HOLD_DELAY = 0.05
+        self.scheduler._hold_delay = 0.05
+        self.scheduler.add("a")
+
+        self.scheduler.hold("a")
+        self.assertEqual(self.scheduler._hold_delay, 0.1)
+
+        time.sleep(0.5)
+        self.assertEqual(self.started, ["a", "a"])
+
+        self.scheduler.submitted("a")
+        self.assertEqual(self.scheduler._hold_delay, 0.05)
+
+    def test_attach_and_requeue(self):
+        self.scheduler.add("a")
+        self.scheduler.add("b")
+        self.scheduler.add("c")
+
+        self.scheduler.attach("b")
+
+        self.assertEqual(self.scheduler.state("b"), JobState.attached)
+        self.assertEqual(self.started, ["a", "b", "c"])
+
+        self.scheduler.finish("a")
+        self.scheduler.requeue("b")
+
+        self.assertEqual(self.started, ["a", "b", "c", "b"])
+        self.assertEqual(self.scheduler.state("b"), JobState.submitting)
+
+    def test_attempt_ends_only_its_submission(self):
+        self.scheduler.HOLD_DELAY = 60.
+        self.scheduler.add("a")
+        first = self.scheduler.attempt("a")
+
+        # Held during the first attempt, submitted again before its end is handled
+        self.scheduler.hold("a")
+        self.scheduler._held_until = None
+        self.scheduler._dispatch()
+
+        self.assertFalse(self.scheduler.finish("a", JobState.failed, first))
+        self.assertEqual(self.scheduler.state("a"), JobState.submitting)
+
+        second = self.scheduler.attempt("a")
+        self.assertNotEqual(first, second)
+        self.assertTrue(self.scheduler.finish("a", JobState.failed, second))
+        self.assertIsNone(self.scheduler.state("a"))
+
+    def test_attempt_handed_on(self):
+        self.scheduler.add("a")
+        attempt = self.scheduler.attempt("a")
+        self.scheduler.submitted("a")
+
+        self.assertFalse(self.scheduler.finish("a", JobState.finished, attempt))
+        self.assertEqual(self.scheduler.state("a"), JobState.watching)
+
+    def test_cancel(self):
+        self.scheduler.max_in_flight = 0
+        self.scheduler.add("a")
+        self.scheduler.cancel("a")
+
+        self.assertEqual(self.scheduler.jobs(), [])
+        self.assertEqual(self.changes[-1], ("a", JobState.canceled))
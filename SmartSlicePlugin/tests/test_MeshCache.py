@@ -0,0 +1,167 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from SmartSlicePlugin.geometry.MeshCache import MeshCache
+from SmartSlicePlugin.geometry.Segmentation import SurfaceSegmentation
+from SmartSlicePlugin.utils.DiskCache import DiskCache
+
+from test_Segmentation import make_cylinder, make_mesh
+
+def write_bytes(size):
+    def writer(path):
+        with open(os.path.join(path, "data"), "wb") as f:
+            f.write(b"x" * size)
+    return writer
+
+class DiskCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        cache = DiskCache(self.path, 1000)
+
+        self.assertIsNone(cache.get("a"))
+
+        entry = cache.put("a", write_bytes(100))
+        self.assertEqual(cache.get("a"), entry)
+        self.assertEqual(cache.size(), 100)
+
+        # An existing entry is kept as it is
+        self.assertEqual(cache.put("a", write_bytes(200)), entry)
+        self.assertEqual(cache.size(), 100)
+
+        self.assertTrue(cache.remove("a"))
+        self.assertFalse(cache.remove("a"))
+        self.assertIsNone(cache.get("a"))
+
+    def test_failed_write_leaves_nothing(self):
+        cache = DiskCache(self.path, 1000)
+
+        def writer(path):
+            write_bytes(100)(path)
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            cache.put("a", writer)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(os.listdir(self.path), [])
+
+    def test_evicts_least_recently_used(self):
+        cache = DiskCache(self.path, 250)
+
+        for age, key in enumerate(("a", "b")):
+            cache.put(key, write_bytes(100))
+            os.utime(cache.entryPath(key), (1000. + age, 1000. + age))
+
+        # Using an entry makes it the most recent one
+        cache.get("a")
+        cache.put("c", write_bytes(100))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertLessEqual(cache.size(), 250)
+
+    def test_clear(self):
+        cache = DiskCache(self.path, 1000)
+        cache.put("a", write_bytes(10))
+        cache.put("b", write_bytes(10))
+
+        cache.clear()
+
+        self.assertEqual(cache.size(), 0)
+        self.assertIsNone(cache.get("a"))
+
+class MeshCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = DiskCache(os.path.join(self.directory.name, "cache"), 100 * 1024 ** 2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def saveCylinder(self, cache, segments=24):
+        vertices, triangles = make_cylinder(segments)
+
+        mesh = make_mesh(vertices, triangles)
+        mesh.segmentation = SurfaceSegmentation(mesh).compute()
+
+        key = MeshCache.key(vertices, triangles)
+        cache.save(key, mesh)
+
+        return key, mesh
+
+    def test_round_trip(self):
+        cache = MeshCache(self.store)
+        key, mesh = self.saveCylinder(cache)
+
+        loaded = cache.load(key)
+
+        self.assertIsNotNone(loaded)
+        for name in MeshCache.TOPOLOGY_ARRAYS:
+            numpy.testing.assert_array_equal(getattr(loaded.topology, name), getattr(mesh.topology, name))
+
+        for triangle in range(mesh.triangle_count):
+            for surface in SurfaceSegmentation.SURFACES:
+                ids, axis = loaded.segmentation.region(surface, triangle)
+                expected_ids, expected_axis = mesh.segmentation.region(surface, triangle)
+
+                numpy.testing.assert_array_equal(ids, expected_ids)
+                if expected_axis is None:
+                    self.assertIsNone(axis)
+                else:
+                    numpy.testing.assert_array_equal(axis[0], expected_axis[0])
+                    numpy.testing.assert_array_equal(axis[1], expected_axis[1])
+
+    def test_loaded_memory_mapped(self):
+        cache = MeshCache(self.store)
+        key, _ = self.saveCylinder(cache)
+
+        loaded = cache.load(key)
+
+        self.assertIsInstance(loaded.topology.neighbors, numpy.memmap)
+        self.assertIsInstance(loaded.segmentation.surfaces['planar'].labels, numpy.memmap)
+        self.assertFalse(loaded.topology.vertices.flags.writeable)
+
+        # Selections work straight off the mapped arrays
+        self.assertEqual(len(loaded.select_convex_face(0)), 4 * 24)
+
+    def test_missing(self):
+        self.assertIsNone(MeshCache(self.store).load(MeshCache.key(*make_cylinder(8))))
+
+    def test_incomplete_entry_removed(self):
+        cache = MeshCache(self.store)
+        key, _ = self.saveCylinder(cache)
+
+        os.remove(os.path.join(self.store.get(key), "convex_labels.npy"))
+
+        self.assertIsNone(cache.load(key))
+        self.assertIsNone(self.store.get(key))
+
+    def test_key(self):
+        vertices, triangles = make_cylinder(24)
+        key = MeshCache.key(vertices, triangles)
+
+        self.assertEqual(MeshCache.key(vertices.copy(), triangles.copy()), key)
+        self.assertNotEqual(MeshCache.key(vertices, triangles[:, ::-1]), key)
+        self.assertNotEqual(MeshCache.key(vertices[triangles].reshape(-1, 3)), key)
+
+    def test_evicted_at_size_cap(self):
+        first = MeshCache(self.store)
+        key, _ = self.saveCylinder(first)
+        size = self.store.size()
+
+        cache = MeshCache(DiskCache(self.store.path, int(1.5 * size)))
+        os.utime(self.store.get(key), (1000., 1000.))
+        other_key, _ = self.saveCylinder(cache, 32)
+
+        self.assertIsNone(cache.load(key))
+        self.assertIsNotNone(cache.load(other_key))
@@ -0,0 +1,164 @@
+import unittest
+
+import numpy
+
+from SmartSlicePlugin.geometry.MeshTopology import MeshTopology, edgeNeighbors, weldVertices
+
+def make_box():
+    vertices = numpy.array([
+        [0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+        [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]
+    ], dtype=numpy.float32)
+
+    # Outward facing, two triangles per side
+    triangles = numpy.array([
+        [0, 2, 1], [0, 3, 2], # bottom
+        [4, 5, 6], [4, 6, 7], # top
+        [0, 1, 5], [0, 5, 4], # front
+        [1, 2, 6], [1, 6, 5], # right
+        [2, 3, 7], [2, 7, 6], # back
+        [3, 0, 4], [3, 4, 7], # left
+    ], dtype=numpy.int32)
+
+    return vertices, triangles
+
+class MeshTopologyTest(unittest.TestCase):
+    def test_closed_box(self):
+        topology = MeshTopology(*make_box()).build()
+
+        self.assertEqual(topology.triangle_count, 12)
+        self.assertTrue((topology.neighbors >= 0).all())
+        numpy.testing.assert_allclose(topology.areas, 0.5)
+        numpy.testing.assert_allclose(topology.normals[0], [0, 0, -1])
+        numpy.testing.assert_allclose(topology.normals[2], [0, 0, 1])
+
+        # Every edge is paired both ways
+        for triangle, neighbors in enumerate(topology.neighbors):
+            for neighbor in neighbors:
+                self.assertIn(triangle, topology.neighbors[neighbor])
+
+        # The two triangles of a side share their diagonal
+        self.assertEqual(topology.neighbors[0, 0], 1)
+        self.assertEqual(topology.neighbors[1, 2], 0)
+
+    def test_degenerate_triangle_keeps_id(self):
+        vertices, triangles = make_box()
+        triangles = numpy.insert(triangles, 2, [[0, 1, 1], [4, 5, 4]], axis=0)
+
+        topology = MeshTopology(vertices, triangles).build()
+
+        self.assertEqual(topology.triangle_count, 14)
+        self.assertEqual(list(topology.degenerateTriangles()), [2, 3])
+        self.assertTrue((topology.normals[[2, 3]] == 0.).all())
+        self.assertTrue((topology.neighbors[[2, 3]] == MeshTopology.NO_NEIGHBOR).all())
+
+        # The others are unaffected and keep their ids after the degenerate ones
+        self.assertTrue((numpy.delete(topology.neighbors, [2, 3], axis=0) >= 0).all())
+        numpy.testing.assert_allclose(topology.normals[4], [0, 0, 1])
+        self.assertNotIn(2, topology.neighbors)
+        self.assertNotIn(3, topology.neighbors)
+
+    def test_duplicate_triangle_keeps_id(self):
+        vertices, triangles = make_box()
+        triangles = numpy.vstack([triangles, triangles[[4]]])
+
+        topology = MeshTopology(vertices, triangles).build()
+
+        self.assertEqual(topology.triangle_count, 13)
+        numpy.testing.assert_allclose(topology.normals[12], topology.normals[4])
+        numpy.testing.assert_allclose(topology.areas[12], 0.5)
+
+        # Edges shared by three triangles are non-manifold, the duplicates have no neighbors there
+        self.assertTrue((topology.neighbors[12] == MeshTopology.NO_NEIGHBOR).all())
+        self.assertTrue((topology.neighbors[4] == MeshTopology.NO_NEIGHBOR).all())
+        self.assertEqual(topology.neighbors[5, 0], MeshTopology.NO_NEIGHBOR)
+
+class WeldVerticesTest(unittest.TestCase):
+    def test_keeps_triangle_numbering(self):
+        vertices, triangles = make_box()
+        unindexed = vertices[triangles].reshape(-1, 3)
+
+        welded, welded_triangles = weldVertices(unindexed)
+
+        self.assertEqual(len(welded), 8)
+        self.assertEqual(welded_triangles.shape, triangles.shape)
+        numpy.testing.assert_array_equal(welded[welded_triangles], vertices[triangles])
+
+    def test_tolerance(self):
+        vertices, triangles = make_box()
+        unindexed = vertices[triangles].reshape(-1, 3)
+        unindexed[1::3] += numpy.float32(MeshTopology.WELD_TOLERANCE / 10.)
+
+        self.assertGreater(len(weldVertices(unindexed)[0]), 8)
+        self.assertEqual(len(weldVertices(unindexed, MeshTopology.WELD_TOLERANCE)[0]), 8)
+
+    def test_negative_zero(self):
+        unindexed = numpy.array([
+            [0, 0, 0], [1, 0, 0], [0, 1, 0],
+            [-0., 0, 0], [0, -1, 0], [1, 0, 0]
+        ], dtype=numpy.float32)
+
+        welded, triangles = weldVertices(unindexed)
+
+        self.assertEqual(len(welded), 4)
+        self.assertEqual(triangles[0, 0], triangles[1, 0])
+
+    def test_unindexed_box_matches_indexed(self):
+        vertices, triangles = make_box()
+        triangles = numpy.insert(triangles, 3, [[0, 1, 1]], axis=0)
+
+        indexed = MeshTopology.fromArrays(vertices, triangles).build()
+        unindexed = MeshTopology.fromArrays(vertices[triangles].reshape(-1, 3)).build()
+
+        self.assertEqual(unindexed.triangle_count, 13)
+        self.assertEqual(unindexed.vertex_count, 8)
+        self.assertEqual(list(unindexed.degenerateTriangles()), [3])
+        numpy.testing.assert_array_equal(unindexed.neighbors, indexed.neighbors)
+        numpy.testing.assert_allclose(unindexed.normals, indexed.normals)
+
+def make_grid(size, seed=0):
+    """ Triangulated size x size grid with shuffled vertex and triangle order """
+    random = numpy.random.RandomState(seed)
+
+    x, y = numpy.meshgrid(numpy.arange(size + 1), numpy.arange(size + 1))
+    vertices = numpy.column_stack([x.ravel(), y.ravel(), random.rand(x.size)]).astype(numpy.float32)
+
+    corners = (numpy.arange(size)[:, None] * (size + 1) + numpy.arange(size)[None, :]).ravel()
+    triangles = numpy.vstack([
+        numpy.column_stack([corners, corners + 1, corners + size + 2]),
+        numpy.column_stack([corners, corners + size + 2, corners + size + 1])
+    ])
+
+    renumbering = random.permutation(len(vertices))
+    triangles = renumbering[triangles][random.permutation(len(triangles))]
+
+    return vertices[numpy.argsort(renumbering)], triangles.astype(numpy.int32)
+
+class EdgeNeighborsTest(unittest.TestCase):
+    def test_parallel_matches_sequential(self):
+        vertices, triangles = make_grid(60)
+
+        # Non-manifold edges and degenerate triangles, spread over the partitions
+        triangles = numpy.vstack([triangles, triangles[::97], [[5, 5, 9], [17, 3, 17]]])
+        usable = MeshTopology(vertices, triangles).build().areas > 0.
+
+        sequential = edgeNeighbors(triangles, usable, workers=1)
+
+        for workers in (2, 3, 4, 7):
+            numpy.testing.assert_array_equal(edgeNeighbors(triangles, usable, workers=workers), sequential)
+
+        self.assertTrue((sequential >= 0).any())
+        self.assertTrue((sequential[-2:] == MeshTopology.NO_NEIGHBOR).all())
+
+    def test_parallel_topology(self):
+        vertices, triangles = make_grid(20, 1)
+
+        sequential = MeshTopology(vertices, triangles)
+        sequential.computeAdjacency(workers=1)
+        parallel = MeshTopology(vertices, triangles)
+        parallel.computeAdjacency(workers=4)
+
+        numpy.testing.assert_array_equal(parallel.neighbors, sequential.neighbors)
+
+        # Only the border of the grid has no neighbors
+        self.assertEqual(int((sequential.neighbors == MeshTopology.NO_NEIGHBOR).sum()), 4 * 20)
@@ -0,0 +1,54 @@
+import sys
+import unittest
+
+import numpy
+
+from SmartSlicePlugin.geometry.MeshTopology import MeshTopology
+from SmartSlicePlugin.geometry.InteractiveMesh import InteractiveMesh
+from SmartSlicePlugin.geometry.MeshWorker import analyzeInProcess
+from SmartSlicePlugin.geometry.Segmentation import SurfaceRegions, SurfaceSegmentation
+
+from test_Segmentation import make_cylinder
+
+@unittest.skipIf(getattr(sys, "frozen", False), "A frozen build can't spawn the worker")
+class MeshWorkerTest(unittest.TestCase):
+    def assertSameAnalysis(self, mesh, expected):
+        for name in ('vertices', 'triangles', 'normals', 'areas', 'neighbors'):
+            numpy.testing.assert_array_equal(getattr(mesh.topology, name), getattr(expected.topology, name))
+
+        for surface in SurfaceSegmentation.SURFACES:
+            regions = mesh.segmentation.surfaces[surface]
+            expected_regions = expected.segmentation.surfaces[surface]
+            for name in SurfaceRegions.ARRAYS:
+                numpy.testing.assert_array_equal(getattr(regions, name), getattr(expected_regions, name))
+
+    def test_indexed(self):
+        # Fine enough for planar regions that aren't the same selection from all of their triangles
+        vertices, triangles = make_cylinder(1500, rows=1)
+
+        phases = []
+        mesh = analyzeInProcess(vertices, triangles, progress=phases.append)
+
+        expected = InteractiveMesh(MeshTopology.fromArrays(vertices, triangles).build())
+        expected.segmentation = SurfaceSegmentation(expected).compute()
+
+        self.assertSameAnalysis(mesh, expected)
+        self.assertFalse(mesh.segmentation.surfaces['planar'].exact.all())
+        self.assertEqual(phases, ['ingest', 'normals', 'adjacency', 'edges', 'planar', 'concave', 'convex'])
+
+    def test_unindexed(self):
+        vertices, triangles = make_cylinder(24)
+        unindexed = vertices[triangles].reshape(-1, 3)
+
+        mesh = analyzeInProcess(unindexed)
+
+        expected = InteractiveMesh(MeshTopology.fromArrays(unindexed).build())
+        expected.segmentation = SurfaceSegmentation(expected).compute()
+
+        self.assertSameAnalysis(mesh, expected)
+        self.assertEqual(mesh.topology.vertex_count, len(vertices))
+
+    def test_stopped(self):
+        vertices, triangles = make_cylinder(24)
+
+        self.assertIsNone(analyzeInProcess(vertices, triangles, should_stop=lambda: True))
@@ -0,0 +1,165 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from SmartSlicePlugin.cloud.ResultCache import ResultCache
+from SmartSlicePlugin.utils.DiskCache import DiskCache
+
+def make_result(value, padding=0):
+    return {"value": value, "padding": "x" * padding}
+
+class ResultCacheTest(unittest.TestCase):
+    def test_get_returns_copy(self):
+        cache = ResultCache()
+        result = make_result(1)
+        cache.put("a", result)
+
+        result["value"] = 2
+        stored = cache.get("a")
+        stored["value"] = 3
+
+        self.assertEqual(cache.get("a")["value"], 1)
+        self.assertEqual((cache.hits, cache.misses), (2, 0))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.misses, 1)
+
+    def test_from_dict(self):
+        class Result:
+            def __init__(self, value):
+                self.value = value
+
+            def to_dict(self):
+                return {"value": self.value}
+
+        cache = ResultCache(lambda d: Result(d["value"]))
+        cache.put("a", Result(4))
+
+        self.assertEqual(cache.get("a").value, 4)
+
+    def test_evicts_least_recently_used_entry(self):
+        cache = ResultCache(max_entries=2)
+        cache.put("a", make_result(1))
+        cache.put("b", make_result(2))
+        cache.get("a")
+        cache.put("c", make_result(3))
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_evicts_by_bytes(self):
+        cache = ResultCache(max_bytes=2500)
+        cache.put("a", make_result(1, 1000))
+        cache.put("b", make_result(2, 1000))
+        cache.put("c", make_result(3, 1000))
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("a"))
+        self.assertLessEqual(cache.size, 2500)
+
+    def test_too_large_not_stored(self):
+        cache = ResultCache(max_bytes=100)
+        cache.put("a", make_result(1))
+
+        self.assertFalse(cache.put("a", make_result(2, 1000)))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.size, 0)
+
+    def test_expires(self):
+        cache = ResultCache(max_age=0.05)
+        cache.put("a", make_result(1))
+        time.sleep(0.1)
+
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate_geometry(self):
+        cache = ResultCache()
+        cache.put("a", make_result(1), "geometry")
+        cache.put("b", make_result(2), "geometry")
+        cache.put("c", make_result(3), "other geometry")
+
+        self.assertEqual(cache.invalidateGeometry("geometry"), 2)
+        self.assertEqual(len(cache), 1)
+        self.assertIsNotNone(cache.get("c"))
+
+        self.assertTrue(cache.invalidate("c"))
+        self.assertFalse(cache.invalidate("c"))
+        self.assertEqual(cache.size, 0)
+
+class StoredResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = DiskCache(os.path.join(self.directory.name, "results"), 1024 ** 2)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_persisted(self):
+        ResultCache(store=self.store).put("a", make_result(1), "geometry")
+
+        cache = ResultCache(store=self.store)
+        self.assertEqual(cache.get("a")["value"], 1)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.misses, 1)
+
+    def test_replaced(self):
+        cache = ResultCache(store=self.store)
+        cache.put("a", make_result(1))
+        cache.put("a", make_result(2))
+
+        self.assertEqual(ResultCache(store=self.store).get("a")["value"], 2)
+
+    def test_kept_after_memory_eviction(self):
+        cache = ResultCache(max_entries=1, store=self.store)
+        cache.put("a", make_result(1))
+        cache.put("b", make_result(2))
+
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get("a")["value"], 1)
+
+    def test_expires(self):
+        cache = ResultCache(store=self.store)
+        cache.put("a", make_result(1))
+
+        entry = os.path.join(self.store.get("a"), ResultCache.ENTRY_FILE)
+        with open(entry, "w") as f:
+            json.dump({"geometry_hash": None, "stored": time.time() - ResultCache.MAX_AGE - 1.}, f)
+
+        self.assertIsNone(ResultCache(store=self.store).get("a"))
+        self.assertIsNone(self.store.get("a"))
+
+    def test_corrupt_entry_removed(self):
+        ResultCache(store=self.store).put("a", make_result(1))
+        os.remove(os.path.join(self.store.get("a"), ResultCache.RESULT_FILE))
+
+        self.assertIsNone(ResultCache(store=self.store).get("a"))
+        self.assertIsNone(self.store.get("a"))
+
+    def test_clear(self):
+        cache = ResultCache(store=self.store)
+        cache.put("a", make_result(1))
+        cache.clear()
+
+        self.assertIsNone(ResultCache(store=self.store).get("a"))
+        self.assertEqual(self.store.keys(), [])
+
+    def test_invalidate(self):
+        cache = ResultCache(store=self.store)
+        cache.put("a", make_result(1), "geometry")
+        cache.put("b", make_result(2), "geometry")
+        cache.put("c", make_result(3), "other geometry")
+
+        restarted = ResultCache(store=self.store)
+        self.assertEqual(restarted.invalidateGeometry("geometry"), 2)
+        self.assertTrue(restarted.invalidate("c"))
+        self.assertFalse(restarted.invalidate("c"))
+
+        self.assertEqual(self.store.keys(), [])
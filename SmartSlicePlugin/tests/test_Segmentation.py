@@ -0,0 +1,202 @@
+import math
+import unittest
+
+import numpy
+
+from SmartSlicePlugin.geometry.MeshTopology import MeshTopology
+from SmartSlicePlugin.geometry.InteractiveMesh import InteractiveMesh
+from SmartSlicePlugin.geometry.Segmentation import SurfaceSegmentation, classifyFace
+
+from test_MeshTopology import make_box
+
+def make_cylinder(segments, rows=2, radius=5., height=10., inward=False):
+    """ Closed cylinder along z, or a cylindrical hole when inward """
+    angles = numpy.linspace(0., 2. * math.pi, segments, endpoint=False)
+    ring = numpy.column_stack([radius * numpy.cos(angles), radius * numpy.sin(angles)])
+
+    vertices = numpy.vstack([
+        numpy.column_stack([ring, numpy.full(segments, z)]) for z in numpy.linspace(0., height, rows + 1)
+    ] + [[[0., 0., 0.], [0., 0., height]]]).astype(numpy.float32)
+
+    current = numpy.arange(segments)
+    following = numpy.roll(current, -1)
+
+    triangles = []
+    for row in range(rows):
+        low = row * segments
+        high = low + segments
+        triangles.append(numpy.column_stack([low + current, low + following, high + following]))
+        triangles.append(numpy.column_stack([low + current, high + following, high + current]))
+
+    bottom = len(vertices) - 2
+    top = bottom + 1
+    triangles.append(numpy.column_stack([numpy.full(segments, bottom), following, current]))
+    triangles.append(numpy.column_stack([numpy.full(segments, top), rows * segments + current, rows * segments + following]))
+
+    triangles = numpy.vstack(triangles).astype(numpy.int32)
+    if inward:
+        triangles = triangles[:, ::-1]
+
+    return vertices, triangles
+
+def make_mesh(vertices, triangles):
+    return InteractiveMesh(MeshTopology(vertices, triangles).build())
+
+class SurfaceSegmentationTest(unittest.TestCase):
+    def assertMatchesFloodFill(self, vertices, triangles, step=1):
+        mesh = make_mesh(vertices, triangles)
+        segmentation = SurfaceSegmentation(make_mesh(vertices, triangles)).compute()
+
+        selections = {
+            'planar': mesh.select_planar_face,
+            'concave': mesh.select_concave_face,
+            'convex': mesh.select_convex_face
+        }
+
+        for surface, select in selections.items():
+            regions = segmentation.surfaces[surface]
+            self.assertEqual(len(regions.labels), mesh.triangle_count)
+
+            for triangle in range(0, mesh.triangle_count, step):
+                ids, _ = segmentation.region(surface, triangle)
+                numpy.testing.assert_array_equal(ids, select(triangle).ids)
+
+        return segmentation
+
+    def test_box(self):
+        segmentation = self.assertMatchesFloodFill(*make_box())
+
+        planar = segmentation.surfaces['planar']
+        self.assertEqual(planar.region_count, 6)
+        self.assertTrue(planar.valid.all())
+        numpy.testing.assert_allclose(planar.axis(planar.labels[0])[0], [0.5, 0.5, 0.])
+        numpy.testing.assert_allclose(planar.axis(planar.labels[0])[1], [0., 0., -1.])
+
+        # The sides of a box meet at 90 degrees, nothing is curved
+        self.assertEqual(segmentation.surfaces['convex'].region_count, 6)
+        self.assertEqual(segmentation.surfaces['concave'].region_count, 6)
+
+    def test_cylinder(self):
+        segments = 24
+        segmentation = self.assertMatchesFloodFill(*make_cylinder(segments))
+
+        # One strip per facet and the caps
+        self.assertEqual(segmentation.surfaces['planar'].region_count, segments + 2)
+
+        convex = segmentation.surfaces['convex']
+        self.assertEqual(convex.region_count, 3)
+
+        side = convex.labels[0]
+        self.assertEqual(len(convex.triangles(side)), 4 * segments)
+        origin, direction = convex.axis(side)
+        numpy.testing.assert_allclose(direction, [0., 0., 1.], atol=1.e-6)
+        numpy.testing.assert_allclose(origin[:2], [0., 0.], atol=1.e-4)
+
+        # No concave edges, every triangle's concave region is its planar one
+        numpy.testing.assert_array_equal(segmentation.surfaces['concave'].labels, segmentation.surfaces['planar'].labels)
+
+    def test_hole(self):
+        segmentation = self.assertMatchesFloodFill(*make_cylinder(24, inward=True))
+
+        concave = segmentation.surfaces['concave']
+        self.assertEqual(concave.region_count, 3)
+        self.assertEqual(len(concave.triangles(concave.labels[0])), 4 * 24)
+        self.assertEqual(segmentation.surfaces['convex'].region_count, 24 + 2)
+
+    def test_coarse_cylinder_is_not_curved(self):
+        # 90 degrees between the facets is past the curved angle
+        segmentation = self.assertMatchesFloodFill(*make_cylinder(4))
+
+        self.assertEqual(segmentation.surfaces['convex'].region_count, 6)
+
+    def test_fine_cylinder(self):
+        # The facets are less than the planar angle apart, the planar selection must not follow them around
+        segments = 1500
+        segmentation = self.assertMatchesFloodFill(*make_cylinder(segments, rows=1), step=311)
+        mesh = segmentation.mesh
+
+        planar = segmentation.surfaces['planar']
+        self.assertFalse(planar.exact[planar.labels[0]])
+        self.assertTrue(planar.exact[planar.labels[2 * segments]])
+
+        # The clicked facet and the one on either side
+        for triangle in (0, segments + 700):
+            ids, axis = segmentation.region('planar', triangle)
+            self.assertEqual(len(ids), 3 * 2)
+
+            normals = mesh.topology.normals[ids]
+            self.assertTrue((numpy.dot(normals, mesh.topology.normals[triangle]) >= math.cos(InteractiveMesh.PLANAR_ANGLE)).all())
+            numpy.testing.assert_allclose(axis[1], mesh.topology.normals[triangle], atol=1.e-5)
+
+        # The caps are flat
+        self.assertEqual(len(segmentation.region('planar', 2 * segments)[0]), segments)
+
+        # The side is still one curved region
+        self.assertEqual(len(segmentation.region('convex', 0)[0]), 2 * segments)
+
+class ClassifyFaceTest(unittest.TestCase):
+    def assertSameClassification(self, vertices, triangles, ids, expected):
+        single_pass = make_mesh(vertices, triangles)
+        segmented = make_mesh(vertices, triangles)
+        segmented.segmentation = SurfaceSegmentation(segmented).compute()
+
+        surface, axis = classifyFace(single_pass, single_pass.face_from_ids(ids))
+        segmented_surface, segmented_axis = classifyFace(segmented, segmented.face_from_ids(ids))
+
+        self.assertEqual(surface, expected)
+        self.assertEqual(segmented_surface, expected)
+
+        if axis is None or segmented_axis is None:
+            self.assertIs(axis, segmented_axis)
+        else:
+            numpy.testing.assert_allclose(axis[0], segmented_axis[0], atol=1.e-5)
+            numpy.testing.assert_allclose(axis[1], segmented_axis[1], atol=1.e-6)
+
+    def assertRegionsClassified(self, vertices, triangles):
+        segmentation = SurfaceSegmentation(make_mesh(vertices, triangles)).compute()
+
+        for surface in SurfaceSegmentation.SURFACES:
+            regions = segmentation.surfaces[surface]
+            for region in range(regions.region_count):
+                ids = regions.triangles(region)
+
+                # A region of several types is classified as the first one
+                expected = next(
+                    s for s in SurfaceSegmentation.SURFACES
+                    if numpy.array_equal(segmentation.region(s, ids[0])[0], ids)
+                )
+                self.assertSameClassification(vertices, triangles, ids, expected)
+
+    def test_box(self):
+        self.assertRegionsClassified(*make_box())
+
+    def test_cylinder(self):
+        self.assertRegionsClassified(*make_cylinder(24))
+
+    def test_hole(self):
+        self.assertRegionsClassified(*make_cylinder(24, inward=True))
+
+    def test_fine_cylinder(self):
+        segments = 1500
+        vertices, triangles = make_cylinder(segments, rows=1)
+        mesh = make_mesh(vertices, triangles)
+
+        # Facets 699 to 701, the first triangle is in facet 699 which selects 698 to 700
+        ids = mesh.select_planar_face(700).ids
+        self.assertSameClassification(vertices, triangles, ids, None)
+
+        # Facets 1499, 0 and 1, the first triangle is the one in facet 0
+        ids = mesh.select_planar_face(0).ids
+        self.assertSameClassification(vertices, triangles, ids, 'planar')
+
+    def test_not_a_region(self):
+        vertices, triangles = make_cylinder(24)
+
+        # Part of the side, the side and a cap, a single triangle of a cap
+        self.assertSameClassification(vertices, triangles, numpy.arange(24), None)
+        self.assertSameClassification(vertices, triangles, numpy.arange(4 * 24 + 24), None)
+        self.assertSameClassification(vertices, triangles, [4 * 24], None)
+
+    def test_empty_face(self):
+        mesh = make_mesh(*make_box())
+        self.assertEqual(classifyFace(mesh, mesh.face_from_ids([])), (None, None))
@@ -0,0 +1,53 @@
+import io
+import unittest
+import zipfile
+import zlib
+
+from SmartSlicePlugin.cloud.Compression import ParallelDeflate
+from SmartSlicePlugin.cloud.ZipStream import ZipStream
+
+class ZipStreamTest(unittest.TestCase):
+    def setUp(self):
+        self.data = b"".join(b"<vertex x=\"%d\" />" % i for i in range(200000))
+
+    def write(self, compressor, zip64=False) -> zipfile.ZipFile:
+        stream = io.BytesIO()
+        with ZipStream(stream) as archive:
+            archive.writestr("first.txt", "first", zlib.compressobj(6, zlib.DEFLATED, -15))
+            archive.write("data", [self.data[i:i + 65536] for i in range(0, len(self.data), 65536)], compressor, zip64)
+        return zipfile.ZipFile(io.BytesIO(stream.getvalue()))
+
+    def test_stored(self):
+        archive = self.write(None)
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.getinfo("data").compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(archive.read("data"), self.data)
+        self.assertEqual(archive.read("first.txt"), b"first")
+
+    def test_deflate_levels(self):
+        sizes = []
+        for level in (1, 9):
+            archive = self.write(zlib.compressobj(level, zlib.DEFLATED, -15))
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.read("data"), self.data)
+            sizes.append(archive.getinfo("data").compress_size)
+        self.assertLess(sizes[1], sizes[0])
+
+    def test_parallel_deflate(self):
+        archive = self.write(ParallelDeflate(6, 4))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.read("data"), self.data)
+
+    def test_zip64_entry(self):
+        archive = self.write(zlib.compressobj(6, zlib.DEFLATED, -15), zip64=True)
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.read("data"), self.data)
+
+    def test_same_entries_same_bytes(self):
+        streams = []
+        for _ in range(2):
+            stream = io.BytesIO()
+            with ZipStream(stream) as archive:
+                archive.writestr("data", self.data, zlib.compressobj(6, zlib.DEFLATED, -15))
+            streams.append(stream.getvalue())
+        self.assertEqual(streams[0], streams[1])
@@ -0,0 +1,147 @@
+from typing import Callable, List, Optional, Tuple
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+"""
+  DiskCache
+
+    Size bounded, least recently used store of entries on disk. Every entry is a
+    directory named after its key, so an entry can hold any number of files
+    (e.g. numpy arrays that are memory mapped when read back). Entries are written
+    to a temporary directory first and renamed into place, so a reader never sees
+    a partially written entry. The modification time of an entry's directory is
+    its last use.
+
+"""
+
+class DiskCache:
+    STALE_STAGING_AGE = 24 * 60 * 60 # seconds
+
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+
+    def entryPath(self, key: str) -> str:
+        return os.path.join(self.path, key)
+
+    def get(self, key: str) -> Optional[str]:
+        """ Directory of the entry for key, or None if there isn't one """
+        entry = self.entryPath(key)
+
+        if not os.path.isdir(entry):
+            return None
+
+        try:
+            os.utime(entry, None)
+        except OSError:
+            pass
+
+        return entry
+
+    def put(self, key: str, writer: Callable[[str], None]) -> Optional[str]:
+        """
+        Creates the entry for key by calling writer with an empty directory to fill in.
+        An existing entry for key is kept as is. Returns the entry directory.
+        """
+        entry = self.entryPath(key)
+
+        if os.path.isdir(entry):
+            return self.get(key)
+
+        os.makedirs(self.path, exist_ok=True)
+
+        staging = tempfile.mkdtemp(prefix='.' + key + '-', dir=self.path)
+
+        try:
+            writer(staging)
+            os.rename(staging, entry)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            if os.path.isdir(entry):
+                # Someone else stored the same entry in the meantime
+                return entry
+            raise
+
+        self.evict()
+
+        return entry
+
+    def remove(self, key: str) -> bool:
+        entry = self.entryPath(key)
+        if not os.path.isdir(entry):
+            return False
+
+        shutil.rmtree(entry, ignore_errors=True)
+
+        return not os.path.isdir(entry)
+
+    def clear(self):
+        for _, key, _ in self._entries():
+            self.remove(key)
+
+    def keys(self) -> List[str]:
+        return [key for _, key, _ in self._entries()]
+
+    def size(self) -> int:
+        return sum(size for _, _, size in self._entries())
+
+    def evict(self):
+        """ Removes the least recently used entries until the cache fits in max_size """
+        with self._lock:
+            self._removeStaleStaging()
+
+            entries = sorted(self._entries())
+            total = sum(size for _, _, size in entries)
+
+            for _, key, size in entries:
+                if total <= self.max_size:
+                    break
+
+                # Entries that are still in use can't be removed on some platforms, they stay
+                if self.remove(key):
+                    total -= size
+
+    def _removeStaleStaging(self):
+        # Left behind if the application went away while writing an entry
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return
+
+        for name in names:
+            staging = os.path.join(self.path, name)
+            try:
+                if name.startswith('.') and os.path.isdir(staging) and time.time() - os.path.getmtime(staging) > self.STALE_STAGING_AGE:
+                    shutil.rmtree(staging, ignore_errors=True)
+            except OSError:
+                continue
+
+    def _entries(self) -> List[Tuple[float, str, int]]:
+        """ (last use, key, size in bytes) of all complete entries """
+        entries = []
+
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return entries
+
+        for name in names:
+            entry = os.path.join(self.path, name)
+            if name.startswith('.') or not os.path.isdir(entry):
+                continue
+
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(entry) for f in files
+                )
+                entries.append((os.path.getmtime(entry), name, size))
+            except OSError:
+                continue
+
+        return entries
@@ -1,6 +1,9 @@
 from typing import Optional
+import os
 import numpy
 
+from PyQt5.QtCore import QStandardPaths
+
 from UM.Math.Vector import Vector
 from UM.Mesh.MeshData import MeshData
 from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
@@ -10,39 +13,48 @@ from cura.CuraApplication import CuraApplication
 from cura.Settings.ExtruderStack import ExtruderStack
 from UM.Scene.SceneNode import SceneNode
 
+from ..geometry.MeshTopology import MeshTopology
+from ..geometry.InteractiveMesh import InteractiveMesh
+from ..geometry.MeshCache import MeshCache
+from .DiskCache import DiskCache
 
-def makeInteractiveMesh(mesh_data: MeshData) -> 'pywim.geom.tri.Mesh':
-    import pywim
 
-    int_mesh = pywim.geom.tri.Mesh()
+def makeInteractiveMesh(mesh_data: MeshData) -> InteractiveMesh:
+    # Row i of the topology triangles is Cura's triangle i (i // 3 for unindexed meshes).
+    # Cura keeps around degenerate triangles, so we need to as well
+    # so we don't end up with a mismatch in triangle ids
+    return InteractiveMesh(makeMeshTopology(mesh_data))
 
-    verts = mesh_data.getVertices()
 
-    for i in range(mesh_data.getVertexCount()):
-        int_mesh.add_vertex(i, verts[i][0], verts[i][1], verts[i][2])
+def makeMeshTopology(mesh_data: MeshData) -> MeshTopology:
+    return MeshTopology.fromMeshData(mesh_data).build()
 
-    faces = mesh_data.getIndices()
 
-    if faces is not None:
-        for i in range(mesh_data.getFaceCount()):
-            v1 = int_mesh.vertices[faces[i][0]]
-            v2 = int_mesh.vertices[faces[i][1]]
-            v3 = int_mesh.vertices[faces[i][2]]
+def interactiveMeshCacheKey(mesh_data: MeshData) -> str:
+    return MeshCache.key(mesh_data.getVertices(), mesh_data.getIndices())
 
-            int_mesh.add_triangle(i, v1, v2, v3)
-    else:
-        for i in range(0, len(int_mesh.vertices), 3):
-            v1 = int_mesh.vertices[i]
-            v2 = int_mesh.vertices[i + 1]
-            v3 = int_mesh.vertices[i + 2]
 
-            int_mesh.add_triangle(i // 3, v1, v2, v3)
+MESH_CACHE_SIZE = 2 * 1024 ** 3 # bytes
 
-    # Cura keeps around degenerate triangles, so we need to as well
-    # so we don't end up with a mismatch in triangle ids
-    int_mesh.analyze_mesh(remove_degenerate_triangles=False)
+_mesh_cache = None
 
-    return int_mesh
+def getMeshCache() -> MeshCache:
+    global _mesh_cache
+    if _mesh_cache is None:
+        _mesh_cache = MeshCache(DiskCache(getConfigPath("mesh_cache"), MESH_CACHE_SIZE))
+    return _mesh_cache
+
+
+RESULT_CACHE_SIZE = 256 * 1024 ** 2 # bytes
+
+def getResultCacheStore() -> DiskCache:
+    return DiskCache(getConfigPath("result_cache"), RESULT_CACHE_SIZE)
+
+
+def getConfigPath(*path: str) -> str:
+    return os.path.join(
+        QStandardPaths.writableLocation(QStandardPaths.GenericConfigLocation), "smartslice", *path
+    )
 
 
 def getNodes(func):
@@ -0,0 +1,68 @@
+"""
+  Scaling of the partitioned edge adjacency build.
+
+    Times edgeNeighbors with 1, 2, 4 and 8 worker threads on the same mesh and
+    checks that every parallel result is identical to the sequential one. The
+    speedup is bounded by the number of cores available to the process.
+
+    python benchmarks/bench_adjacency_scaling.py --triangles 2000000
+    python benchmarks/bench_adjacency_scaling.py --triangles 2000000 --unindexed
+
+"""
+
+import argparse
+import os
+import sys
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "SmartSlicePlugin"))
+
+from bench_interactive_mesh import torus, timeit
+from geometry.MeshTopology import MeshTopology, edgeNeighbors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--triangles', type=int, default=1000000)
+    parser.add_argument('--unindexed', action='store_true', help='Use an unindexed vertex buffer, like Cura does for STL files')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    vertices, triangles = torus(args.triangles)
+    indices = triangles
+    if args.unindexed:
+        vertices = vertices[triangles].reshape(-1, 3)
+        indices = None
+
+    topology = MeshTopology.fromArrays(vertices, indices)
+    topology.computeNormals()
+
+    edge_keys = topology.triangles
+    usable = topology.areas > 0.
+
+    print('Mesh: {} triangles, {}, {} cores'.format(
+        topology.triangle_count, 'unindexed' if args.unindexed else 'indexed', os.cpu_count()
+    ))
+
+    sequential_time, reference = timeit(lambda: edgeNeighbors(edge_keys, usable, 1), args.repeat)
+    identical = True
+
+    for workers in args.workers:
+        elapsed, neighbors = timeit(lambda: edgeNeighbors(edge_keys, usable, workers), args.repeat)
+
+        matches = numpy.array_equal(neighbors, reference)
+        identical &= matches
+
+        print('  {:2d} workers: {:8.3f} s   speedup {:5.2f}x   identical {}'.format(
+            workers, elapsed, sequential_time / max(elapsed, 1.e-9), matches
+        ))
+
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+  Benchmark for building the interactive (face selection) mesh.
+
+    Compares the vectorized MeshTopology build against the per vertex / per
+    triangle loop that makeInteractiveMesh used to run. When pywim is importable
+    the original pywim loop (including analyze_mesh) is timed, otherwise a pure
+    Python edge adjacency build with the same element-by-element access pattern
+    is used as the reference, and its output is checked against the vectorized one.
+
+    python benchmarks/bench_interactive_mesh.py --triangles 300000
+    python benchmarks/bench_interactive_mesh.py --triangles 300000 --unindexed
+
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+import numpy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "SmartSlicePlugin"))
+
+from geometry.MeshTopology import MeshTopology
+
+
+def torus(triangle_count, major=40., minor=10.):
+    """ Closed, manifold test mesh with roughly the requested number of triangles """
+    n = max(3, int(math.sqrt(triangle_count / 2.)))
+    u, v = numpy.meshgrid(numpy.linspace(0., 2. * math.pi, n, endpoint=False),
+                          numpy.linspace(0., 2. * math.pi, n, endpoint=False), indexing='ij')
+
+    vertices = numpy.stack([
+        (major + minor * numpy.cos(v)) * numpy.cos(u),
+        minor * numpy.sin(v),
+        (major + minor * numpy.cos(v)) * numpy.sin(u)
+    ], axis=-1).reshape(-1, 3).astype(numpy.float32)
+
+    i, j = numpy.meshgrid(numpy.arange(n), numpy.arange(n), indexing='ij')
+    a = (i * n + j).ravel()
+    b = (((i + 1) % n) * n + j).ravel()
+    c = (((i + 1) % n) * n + (j + 1) % n).ravel()
+    d = (i * n + (j + 1) % n).ravel()
+
+    triangles = numpy.empty((2 * len(a), 3), dtype=numpy.int32)
+    triangles[0::2] = numpy.stack([a, b, c], axis=-1)
+    triangles[1::2] = numpy.stack([a, c, d], axis=-1)
+
+    return vertices, triangles
+
+
+def legacyPywim(vertices, indices):
+    import pywim
+
+    int_mesh = pywim.geom.tri.Mesh()
+
+    for i in range(len(vertices)):
+        int_mesh.add_vertex(i, vertices[i][0], vertices[i][1], vertices[i][2])
+
+    if indices is not None:
+        for i in range(len(indices)):
+            v1 = int_mesh.vertices[indices[i][0]]
+            v2 = int_mesh.vertices[indices[i][1]]
+            v3 = int_mesh.vertices[indices[i][2]]
+            int_mesh.add_triangle(i, v1, v2, v3)
+    else:
+        for i in range(0, len(int_mesh.vertices), 3):
+            int_mesh.add_triangle(i // 3, int_mesh.vertices[i], int_mesh.vertices[i + 1], int_mesh.vertices[i + 2])
+
+    int_mesh.analyze_mesh(remove_degenerate_triangles=False)
+
+    return int_mesh
+
+
+def legacyPython(vertices, indices):
+    """ Element-by-element adjacency build, returns the same layout as MeshTopology.neighbors """
+    keys = {}
+    vertex_ids = []
+    for i in range(len(vertices)):
+        vertex_ids.append(keys.setdefault((float(vertices[i][0]) + 0., float(vertices[i][1]) + 0., float(vertices[i][2]) + 0.), len(keys)))
+
+    triangles = []
+    if indices is not None:
+        for i in range(len(indices)):
+            triangles.append((vertex_ids[indices[i][0]], vertex_ids[indices[i][1]], vertex_ids[indices[i][2]]))
+    else:
+        for i in range(0, len(vertices) - len(vertices) % 3, 3):
+            triangles.append((vertex_ids[i], vertex_ids[i + 1], vertex_ids[i + 2]))
+
+    edges = {}
+    for t, tri in enumerate(triangles):
+        for k in range(3):
+            a, b = tri[k], tri[(k + 1) % 3]
+            if a != b:
+                edges.setdefault((min(a, b), max(a, b)), []).append(3 * t + k)
+
+    neighbors = [-1] * (3 * len(triangles))
+    for half_edges in edges.values():
+        if len(half_edges) == 2 and half_edges[0] // 3 != half_edges[1] // 3:
+            neighbors[half_edges[0]] = half_edges[1] // 3
+            neighbors[half_edges[1]] = half_edges[0] // 3
+
+    return numpy.array(neighbors, dtype=numpy.int32).reshape(-1, 3)
+
+
+def timeit(func, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--triangles', type=int, default=200000)
+    parser.add_argument('--unindexed', action='store_true', help='Use an unindexed vertex buffer, like Cura does for STL files')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-legacy', action='store_true')
+    args = parser.parse_args()
+
+    vertices, triangles = torus(args.triangles)
+    indices = triangles
+    if args.unindexed:
+        vertices = vertices[triangles].reshape(-1, 3)
+        indices = None
+
+    print('Mesh: {} vertices, {} triangles, {}'.format(
+        len(vertices), len(triangles), 'unindexed' if args.unindexed else 'indexed'
+    ))
+
+    vectorized_time, topology = timeit(lambda: MeshTopology.fromArrays(vertices, indices).build(), args.repeat)
+    print('  vectorized MeshTopology:  {:8.3f} s'.format(vectorized_time))
+
+    if args.skip_legacy:
+        return
+
+    try:
+        import pywim
+        legacy_name = 'legacy pywim loop'
+        legacy = legacyPywim
+    except ImportError:
+        legacy_name = 'legacy python loop'
+        legacy = legacyPython
+
+    legacy_time, legacy_result = timeit(lambda: legacy(vertices, indices), 1)
+    print('  {:24s} {:8.3f} s'.format(legacy_name + ':', legacy_time))
+    print('  speedup:                  {:8.1f}x'.format(legacy_time / max(vectorized_time, 1.e-9)))
+
+    if legacy is legacyPython:
+        matches = numpy.array_equal(legacy_result, topology.neighbors)
+        print('  adjacency matches:        {}'.format(matches))
+        if not matches:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+  Peak memory of the interactive (face selection) mesh.
+
+    Every variant is built in a fresh interpreter and the peak and final resident
+    set size of that process are reported, relative to a process that only creates
+    the input arrays so the mesh's own share can be read off directly.
+
+      baseline - input vertex / index arrays only
+      pywim    - pywim.geom.tri.Mesh built the way makeInteractiveMesh used to (needs pywim)
+      objects  - one Python object per vertex and triangle plus an edge dictionary, the
+                 same layout as pywim's mesh, as a reference where pywim isn't installed
+      compact  - geometry.InteractiveMesh, including the selection edge masks
+
+    python benchmarks/bench_mesh_memory.py --triangles 1000000
+
+"""
+
+import argparse
+import gc
+import os
+import resource
+import subprocess
+import sys
+
+import numpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_interactive_mesh import torus, legacyPywim
+
+
+def peakRssMB() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024. * 1024.) if sys.platform == 'darwin' else peak / 1024.
+
+
+def currentRssMB() -> float:
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize() / (1024. * 1024.)
+    except (IOError, OSError):
+        return float('nan')
+
+
+class _Vertex:
+    def __init__(self, id, x, y, z):
+        self.id = id
+        self.x = x
+        self.y = y
+        self.z = z
+        self.triangles = []
+
+
+class _Triangle:
+    def __init__(self, id, v1, v2, v3):
+        self.id = id
+        self.v1 = v1
+        self.v2 = v2
+        self.v3 = v3
+        self.neighbors = []
+
+        ax, ay, az = v2.x - v1.x, v2.y - v1.y, v2.z - v1.z
+        bx, by, bz = v3.x - v1.x, v3.y - v1.y, v3.z - v1.z
+        self.normal = (ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx)
+
+
+def legacyObjects(vertices, triangles):
+    """ Object per vertex / triangle, connected through an edge dictionary like pywim's analyze_mesh """
+    mesh_vertices = [_Vertex(i, float(x), float(y), float(z)) for i, (x, y, z) in enumerate(vertices.tolist())]
+    mesh_triangles = []
+    edges = {}
+
+    for i, (a, b, c) in enumerate(triangles.tolist()):
+        triangle = _Triangle(i, mesh_vertices[a], mesh_vertices[b], mesh_vertices[c])
+        mesh_triangles.append(triangle)
+
+        for first, second in ((a, b), (b, c), (c, a)):
+            mesh_vertices[first].triangles.append(triangle)
+            edges.setdefault((min(first, second), max(first, second)), []).append(triangle)
+
+    for shared in edges.values():
+        if len(shared) == 2:
+            shared[0].neighbors.append(shared[1])
+            shared[1].neighbors.append(shared[0])
+
+    return mesh_vertices, mesh_triangles, edges
+
+
+def child(variant, triangle_count):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "SmartSlicePlugin"))
+
+    vertices, triangles = torus(triangle_count)
+
+    if variant == 'pywim':
+        mesh = legacyPywim(vertices, triangles)
+        mesh.select_planar_face(0)
+    elif variant == 'objects':
+        mesh = legacyObjects(vertices, triangles)
+        del vertices, triangles
+    elif variant == 'compact':
+        from geometry.MeshTopology import MeshTopology
+        from geometry.InteractiveMesh import InteractiveMesh
+
+        mesh = InteractiveMesh(MeshTopology.fromArrays(vertices, triangles).build())
+        del vertices, triangles
+        mesh.select_planar_face(0)
+
+    gc.collect()
+    print('{:.1f} {:.1f}'.format(peakRssMB(), currentRssMB()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--triangles', type=int, default=1000000)
+    parser.add_argument('--variant', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        child(args.variant, args.triangles)
+        return
+
+    print('Peak RSS, {} triangles'.format(args.triangles))
+
+    baseline = None
+    for variant in ('baseline', 'pywim', 'objects', 'compact'):
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--triangles', str(args.triangles), '--variant', variant],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True
+        )
+
+        if result.returncode != 0:
+            print('  {:9s} skipped ({})'.format(variant, result.stderr.strip().splitlines()[-1]))
+            continue
+
+        peak, resident = [float(value) for value in result.stdout.split()]
+        if baseline is None:
+            baseline = (peak, resident)
+
+        print('  {:9s} peak {:8.1f} MB (+{:6.1f})   resident {:8.1f} MB (+{:6.1f})'.format(
+            variant, peak, peak - baseline[0], resident, resident - baseline[1]
+        ))
+
+
+if __name__ == '__main__':
+    main()
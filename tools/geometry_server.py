@@ -0,0 +1,351 @@
+"""
+  Local stand-in for the Smart Slice API's content addressed job submission.
+
+    Implements the endpoints SmartSlicePlugin/cloud/GeometryUpload.py talks to and
+    the regular full 3MF submission, and counts what was uploaded so the geometry
+    deduplication can be checked without the real service. Jobs are accepted and
+    reported as queued, nothing is solved.
+
+      GET  /smartslice/capabilities
+      HEAD /smartslice/geometry/<hash>         Upload-Offset of a partial upload
+      PUT  /smartslice/geometry/<hash>         whole, or in chunks with Content-Range, checked
+                                               against Upload-Digest once complete
+      POST /smartslice/geometry/<hash>/job
+      POST /smartslice                         full 3MF (the fallback path)
+      GET  /smartslice/<id>                    the job's status
+      GET  /smartslice/<id>/wait               the status once it differs from the
+                                               status / progress parameters (long poll)
+      GET  /stats                              upload counters as JSON
+
+    python tools/geometry_server.py --port 8000
+    python tools/geometry_server.py --port 8000 --legacy    # no geometry endpoints
+    python tools/geometry_server.py --port 8000 --drop-every 3    # lose every 3rd chunk's reply
+    python tools/geometry_server.py --queue-seconds 5 --run-seconds 20    # jobs queue, run and finish
+
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import re
+import socket
+import threading
+import time
+import urllib.parse
+import uuid
+import zipfile
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+GEOMETRY_PATH = re.compile(r"^/smartslice/geometry/([0-9a-f]{64})$")
+GEOMETRY_JOB_PATH = re.compile(r"^/smartslice/geometry/([0-9a-f]{64})/job$")
+JOB_PATH = re.compile(r"^/smartslice/([0-9a-f-]{36})(/wait)?$")
+CONTENT_RANGE = re.compile(r"^bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)$")
+UPLOAD_DIGEST = re.compile(r"^sha-256=([0-9a-f]{64})$")
+
+
+class GeometryStore:
+    def __init__(self, queue_seconds: float = None, run_seconds: float = None):
+        # Jobs stay queued unless run_seconds is given
+        self.queue_seconds = queue_seconds or 0.
+        self.run_seconds = run_seconds
+
+        self.lock = threading.Lock()
+        self.geometry = {}
+        self.partial = {}
+        self.jobs = {}
+        self.stats = {
+            "geometry_uploads": 0,
+            "geometry_bytes": 0,
+            "geometry_chunks": 0,
+            "dropped_chunks": 0,
+            "rejected_uploads": 0,
+            "job_submissions": 0,
+            "job_bytes": 0,
+            "full_submissions": 0,
+            "full_bytes": 0,
+            "status_requests": 0,
+            "long_polls": 0,
+        }
+
+    def count(self, name: str, size: int):
+        counters = {"geometry": "geometry_uploads", "status": "status_requests", "long_poll": "long_polls"}
+        with self.lock:
+            self.stats[counters.get(name, name + "_submissions")] += 1
+            if name + "_bytes" in self.stats:
+                self.stats[name + "_bytes"] += size
+
+    def newJob(self, geometry_hash: str = None) -> dict:
+        job = {
+            "id": str(uuid.uuid4()),
+            "type": "smartslice",
+            "status": "queued",
+            "progress": 0,
+            "geometry": geometry_hash,
+        }
+        with self.lock:
+            self.jobs[job["id"]] = (time.monotonic(), job)
+        return job
+
+    def job(self, job_id: str):
+        """ The job as it is now, None if there is no such job """
+        with self.lock:
+            if job_id not in self.jobs:
+                return None
+            created, job = self.jobs[job_id]
+
+        job = dict(job)
+        if self.run_seconds is None:
+            return job
+
+        elapsed = time.monotonic() - created - self.queue_seconds
+        if elapsed < 0.:
+            pass
+        elif elapsed < self.run_seconds:
+            job["status"] = "running"
+            job["progress"] = int(100 * elapsed / self.run_seconds)
+        else:
+            job["status"] = "finished"
+            job["progress"] = 100
+            job["result"] = {}
+
+        return job
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Keeps connections open between requests like the real API
+    protocol_version = "HTTP/1.1"
+
+    store = None
+    legacy = False
+    drop_every = 0
+
+    def do_GET(self):
+        if self.path == "/smartslice/capabilities" and not self.legacy:
+            return self._json(200, {"geometry_upload": True, "job_long_poll": True})
+        elif self.path == "/stats":
+            with self.store.lock:
+                return self._json(200, dict(self.store.stats))
+
+        url = urllib.parse.urlparse(self.path)
+        match = JOB_PATH.match(url.path)
+        if match:
+            job = self.store.job(match.group(1))
+            if job is None:
+                return self._json(404, {"error": "Unknown job"})
+            if not match.group(2):
+                self.store.count("status", 0)
+                return self._json(200, job)
+            if not self.legacy:
+                return self._json(200, self._waitForChange(job, urllib.parse.parse_qs(url.query)))
+
+        self._json(404, {"error": "Not found"})
+
+    def _waitForChange(self, job: dict, query: dict) -> dict:
+        self.store.count("long_poll", 0)
+
+        status = query.get("status", [job["status"]])[0]
+        progress = query.get("progress", [str(job["progress"])])[0]
+        end = time.monotonic() + min(float(query.get("timeout", ["25"])[0]), 60.)
+
+        while time.monotonic() < end and (job["status"], str(job["progress"])) == (status, progress):
+            time.sleep(0.05)
+            job = self.store.job(job["id"])
+
+        return job
+
+    def do_HEAD(self):
+        match = GEOMETRY_PATH.match(self.path)
+        if not match or self.legacy:
+            return self._empty(404)
+        with self.store.lock:
+            stored = match.group(1) in self.store.geometry
+            partial = self.store.partial.get(match.group(1))
+
+        if stored:
+            return self._empty(200)
+        self._empty(404, {"Upload-Offset": str(len(partial))} if partial else None)
+
+    def do_PUT(self):
+        match = GEOMETRY_PATH.match(self.path)
+        if not match or self.legacy:
+            return self._json(404, {"error": "Not found"})
+
+        body = self._body()
+
+        content_range = self.headers.get("Content-Range")
+        if content_range:
+            body = self._chunk(match.group(1), content_range, body)
+            if body is None:
+                return
+
+        if not self._isThreeMF(body):
+            return self._json(400, {"error": "Geometry is not a 3MF"})
+
+        self.store.count("geometry", len(body))
+        with self.store.lock:
+            self.store.geometry[match.group(1)] = body
+
+        self._json(201, {"hash": match.group(1)})
+
+    def do_POST(self):
+        match = GEOMETRY_JOB_PATH.match(self.path)
+
+        if match and not self.legacy:
+            body = self._body()
+            with self.store.lock:
+                stored = match.group(1) in self.store.geometry
+            if not stored:
+                return self._json(404, {"error": "Unknown geometry"})
+            try:
+                json.loads(body.decode())
+            except ValueError:
+                return self._json(400, {"error": "Job is not JSON"})
+
+            self.store.count("job", len(body))
+            return self._json(200, self.store.newJob(match.group(1)))
+
+        if self.path == "/smartslice":
+            body = self._body()
+            if not self._isThreeMF(body):
+                return self._json(400, {"error": "Job is not a 3MF"})
+
+            self.store.count("full", len(body))
+            return self._json(200, self.store.newJob())
+
+        self._json(404, {"error": "Not found"})
+
+    def _chunk(self, geometry_hash: str, content_range: str, body: bytes):
+        """ Adds a chunk to a partial upload, returns the complete upload or None if it isn't yet """
+        parsed = CONTENT_RANGE.match(content_range)
+        if not parsed:
+            self._json(400, {"error": "Bad Content-Range"})
+            return None
+
+        first, last, total = parsed.groups()
+        total = None if total == "*" else int(total)
+
+        with self.store.lock:
+            partial = self.store.partial.setdefault(geometry_hash, bytearray())
+
+            if first is not None:
+                if int(first) != len(partial) or int(last) - int(first) + 1 != len(body):
+                    # Not where we are, tell the client where to continue
+                    offset = len(partial)
+                    body = None
+                else:
+                    partial += body
+                    offset = len(partial)
+                    self.store.stats["geometry_chunks"] += 1
+            else:
+                offset = len(partial)
+
+            complete = total is not None and offset == total
+            if complete:
+                del self.store.partial[geometry_hash]
+
+            drop = body is not None and self.drop_every and \
+                self.store.stats["geometry_chunks"] % self.drop_every == 0
+            if drop:
+                self.store.stats["dropped_chunks"] += 1
+
+        if drop:
+            # The chunk is stored but the client never hears about it
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            if complete and self._matchesDigest(partial):
+                self._finish(geometry_hash, bytes(partial))
+            return None
+
+        if complete:
+            if not self._matchesDigest(partial):
+                # Parts of different streams, e.g. resumed with other bytes than it started with
+                with self.store.lock:
+                    self.store.stats["rejected_uploads"] += 1
+                self._json(409, {"error": "Upload doesn't match its digest"})
+                return None
+            return bytes(partial)
+
+        self._empty(308, {"Upload-Offset": str(offset)})
+        return None
+
+    def _matchesDigest(self, body: bytes) -> bool:
+        """ Whether body is what the Upload-Digest header says, True without the header """
+        digest = self.headers.get("Upload-Digest")
+        if digest is None:
+            return True
+        parsed = UPLOAD_DIGEST.match(digest)
+        return parsed is not None and hashlib.sha256(body).hexdigest() == parsed.group(1)
+
+    def _finish(self, geometry_hash: str, body: bytes):
+        if self._isThreeMF(body):
+            self.store.count("geometry", len(body))
+            with self.store.lock:
+                self.store.geometry[geometry_hash] = body
+
+    def log_message(self, format, *args):
+        pass
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    @staticmethod
+    def _isThreeMF(body: bytes) -> bool:
+        try:
+            return "3D/3dmodel.model" in zipfile.ZipFile(io.BytesIO(body)).namelist()
+        except zipfile.BadZipFile:
+            return False
+
+    def _json(self, code: int, data: dict):
+        body = json.dumps(data).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _empty(self, code: int, headers: dict = None):
+        self.send_response(code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def makeServer(
+    port: int = 0, legacy: bool = False, drop_every: int = 0, queue_seconds: float = None, run_seconds: float = None
+) -> Server:
+    """ A server on localhost, port 0 picks a free port (server.server_address[1]) """
+    store = GeometryStore(queue_seconds, run_seconds)
+    handler = type(
+        "GeometryHandler", (Handler,), {"store": store, "legacy": legacy, "drop_every": drop_every}
+    )
+    return Server(("127.0.0.1", port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--legacy", action="store_true", help="Behave like a server without geometry upload")
+    parser.add_argument("--drop-every", type=int, default=0, help="Close the connection after every Nth chunk")
+    parser.add_argument("--queue-seconds", type=float, default=0., help="How long jobs are queued")
+    parser.add_argument("--run-seconds", type=float, default=None, help="How long jobs run, they stay queued without")
+    args = parser.parse_args()
+
+    server = makeServer(args.port, args.legacy, args.drop_every, args.queue_seconds, args.run_seconds)
+    print("Serving on http://127.0.0.1:{}".format(server.server_address[1]))
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()